@@ -12,6 +12,10 @@ from discord.ext import commands
 from discord.ext.commands import Cog, when_mentioned_or
 
 from bot import constants
+from bot.utils.api_client import APIClient
+from bot.utils.github import GitHubClient
+from bot.utils.reaction_router import REACTION_EVENTS, ReactionRouter
+from bot.utils.waiters import WaiterRegistry
 
 log = logging.getLogger(__name__)
 
@@ -34,6 +38,10 @@ class Bot(commands.Bot):
         self.http_session = ClientSession(
             connector=TCPConnector(resolver=AsyncResolver(), family=socket.AF_INET)
         )
+        self.api_client = APIClient(self.http_session)
+        self.github_client = GitHubClient(self.api_client)
+        self.waiters = WaiterRegistry()
+        self.reaction_router = ReactionRouter()
         self._guild_available = asyncio.Event()
         self.redis_session = redis_session
         self.loop.create_task(self.check_channels())
@@ -72,6 +80,13 @@ class Bot(commands.Bot):
         if self.redis_session:
             await self.redis_session.close()
 
+    def dispatch(self, event_name: str, *args, **kwargs) -> None:
+        """Dispatch the event as normal, and to `self.waiters` and `self.reaction_router` as well."""
+        super().dispatch(event_name, *args, **kwargs)
+        self.waiters.dispatch(event_name, *args)
+        if event_name in REACTION_EVENTS:
+            self.reaction_router.dispatch(event_name, *args)
+
     def add_cog(self, cog: commands.Cog) -> None:
         """
         Delegate to super to register `cog`.
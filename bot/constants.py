@@ -7,6 +7,7 @@ from typing import NamedTuple
 
 __all__ = (
     "AdventOfCode",
+    "AvatarModification",
     "Branding",
     "Cats",
     "Channels",
@@ -15,6 +16,7 @@ __all__ = (
     "Colours",
     "Emojis",
     "Icons",
+    "Latex",
     "Lovefest",
     "Month",
     "Roles",
@@ -88,11 +90,23 @@ class AdventOfCode:
     ignored_days = environ.get("AOC_IGNORED_DAYS", "").split(",")
     leaderboard_displayed_members = 10
     leaderboard_cache_expiry_seconds = 1800
+    leaderboard_snapshot_expiry_seconds = 86400
+    leaderboard_refresh_cooldown_seconds = 300
+    board_cache_expiry_seconds = 1800
+    max_concurrent_board_requests = 2
+    board_request_spacing_seconds = 1
     max_day_and_star_results = 15
     year = int(environ.get("AOC_YEAR", datetime.utcnow().year))
     role_id = int(environ.get("AOC_ROLE_ID", 518565788744024082))
 
 
+class AvatarModification:
+    render_cache_memory_bytes = 64 * 2**20
+    # The on-disk tier of the render cache is only used if a directory is configured
+    render_cache_dir = environ.get("AVATAR_RENDER_CACHE_DIR")
+    render_cache_disk_bytes = int(environ.get("AVATAR_RENDER_CACHE_DISK_BYTES", 512 * 2**20))
+
+
 class Branding:
     cycle_frequency = int(environ.get("CYCLE_FREQUENCY", 3))  # 0: never, 1: every day, 2: every other day, ...
 
@@ -252,6 +266,12 @@ class Icons:
     )
 
 
+class Latex:
+    render_cache_memory_bytes = 8 * 2**20
+    render_cache_dir = environ.get("LATEX_RENDER_CACHE_DIR", "_latex_cache")
+    render_cache_disk_bytes = int(environ.get("LATEX_RENDER_CACHE_DISK_BYTES", 64 * 2**20))
+
+
 class Lovefest:
     role_id = int(environ.get("LOVEFEST_ROLE_ID", 542431903886606399))
 
@@ -305,6 +325,7 @@ class Tokens(NamedTuple):
 class Wolfram(NamedTuple):
     user_limit_day = int(environ.get("WOLFRAM_USER_LIMIT_DAY", 10))
     guild_limit_day = int(environ.get("WOLFRAM_GUILD_LIMIT_DAY", 67))
+    monthly_limit = int(environ.get("WOLFRAM_MONTHLY_LIMIT", 2000))
     key = environ.get("WOLFRAM_API_KEY")
 
 
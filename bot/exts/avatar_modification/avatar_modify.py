@@ -1,10 +1,10 @@
-import asyncio
 import json
 import logging
 import math
+import random
 import string
 import unicodedata
-from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
 from typing import Callable, Optional, TypeVar, Union
 
@@ -12,15 +12,15 @@ import discord
 from discord.ext import commands
 
 from bot.bot import Bot
-from bot.constants import Colours, Emojis
+from bot.constants import AvatarModification, Colours, Emojis
 from bot.exts.avatar_modification._effects import PfpEffects
 from bot.utils.extensions import invoke_help_command
 from bot.utils.halloween import spookifications
+from bot.utils.image_worker import image_workers, queue_notifier
+from bot.utils.render_cache import RenderCache
 
 log = logging.getLogger(__name__)
 
-_EXECUTOR = ThreadPoolExecutor(10)
-
 FILENAME_STRING = "{effect}_{author}.png"
 
 MAX_SQUARES = 10_000
@@ -29,17 +29,50 @@ T = TypeVar("T")
 
 GENDER_OPTIONS = json.loads(Path("bot/resources/holidays/pride/gender_options.json").read_text("utf8"))
 
+RENDER_CACHE = RenderCache(
+    AvatarModification.render_cache_memory_bytes,
+    Path(AvatarModification.render_cache_dir) if AvatarModification.render_cache_dir else None,
+    AvatarModification.render_cache_disk_bytes,
+)
+
 
-async def in_executor(func: Callable[..., T], *args) -> T:
+async def in_image_worker(ctx: commands.Context, func: Callable[..., T], *args) -> T:
     """
-    Runs the given synchronous function `func` in an executor.
+    Runs the given synchronous function `func` in an image worker process.
 
     This is useful for running slow, blocking code within async
-    functions, so that they don't block the bot.
+    functions, so that they don't block the bot. The job counts
+    towards the image processing limits of the invoking user.
     """
-    log.trace(f"Running {func.__name__} in an executor.")
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(_EXECUTOR, func, *args)
+    log.trace(f"Running {func.__name__} in an image worker.")
+    return await image_workers.run(func, *args, user_id=ctx.author.id, on_queued=queue_notifier(ctx))
+
+
+async def render_effect(
+    ctx: commands.Context,
+    user: discord.User,
+    avatar_size: int,
+    effect: Callable,
+    *args,
+    cache: bool = True
+) -> bytes:
+    """
+    Renders `effect` with `args` on the avatar of `user` and returns the PNG encoded result.
+
+    Renders are cached by the hash of the avatar, the effect and `args`, so the avatar is only
+    downloaded and rendered on a cache miss. Effects with a random result pass `cache=False`,
+    otherwise every later render for the same avatar would come out the same.
+    """
+    key = RenderCache.make_key(user.display_avatar.key, avatar_size, effect.__qualname__, args) if cache else None
+    if key is not None and (image := await RENDER_CACHE.get(key)) is not None:
+        log.trace(f"Serving cached render of {effect.__qualname__} for {user}.")
+        return image
+
+    image_bytes = await user.display_avatar.replace(size=avatar_size).read()
+    image = await in_image_worker(ctx, PfpEffects.apply_effect, image_bytes, effect, *args)
+    if key is not None:
+        await RENDER_CACHE.set(key, image)
+    return image
 
 
 def file_safe_name(effect: str, display_name: str) -> str:
@@ -100,15 +133,10 @@ class AvatarModify(commands.Cog):
                 await ctx.send(f"{Emojis.cross_mark} Could not get user info.")
                 return
 
-            image_bytes = await user.display_avatar.replace(size=1024).read()
             file_name = file_safe_name("eightbit_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
-                PfpEffects.eight_bitify_effect,
-                file_name
-            )
+            image = await render_effect(ctx, user, 1024, PfpEffects.eight_bitify_effect)
+            file = discord.File(BytesIO(image), filename=file_name)
 
             embed = discord.Embed(
                 title="Your 8-bit avatar",
@@ -137,15 +165,10 @@ class AvatarModify(commands.Cog):
                 await ctx.send(f"{Emojis.cross_mark} Could not get user info.")
                 return
 
-            image_bytes = await user.display_avatar.replace(size=1024).read()
             filename = file_safe_name("reverse_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
-                PfpEffects.flip_effect,
-                filename
-            )
+            image = await render_effect(ctx, user, 1024, PfpEffects.flip_effect)
+            file = discord.File(BytesIO(image), filename=filename)
 
             embed = discord.Embed(
                 title="Your reversed avatar.",
@@ -193,16 +216,11 @@ class AvatarModify(commands.Cog):
                     return
                 ctx.send = send_message  # Reassigns ctx.send
 
-            image_bytes = await user.display_avatar.replace(size=256).read()
             file_name = file_safe_name("easterified_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
-                PfpEffects.easterify_effect,
-                file_name,
-                egg
-            )
+            # Only the chocolate bunny is cached, eggs are decorated with a random design
+            image = await render_effect(ctx, user, 256, PfpEffects.easterify_effect, egg, cache=egg is None)
+            file = discord.File(BytesIO(image), filename=file_name)
 
             embed = discord.Embed(
                 title="Your Lovely Easterified Avatar!",
@@ -216,7 +234,7 @@ class AvatarModify(commands.Cog):
     @staticmethod
     async def send_pride_image(
         ctx: commands.Context,
-        image_bytes: bytes,
+        user: discord.User,
         pixels: int,
         flag: str,
         option: str
@@ -225,14 +243,8 @@ class AvatarModify(commands.Cog):
         async with ctx.typing():
             file_name = file_safe_name("pride_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
-                PfpEffects.pridify_effect,
-                file_name,
-                pixels,
-                flag
-            )
+            image = await render_effect(ctx, user, 1024, PfpEffects.pridify_effect, pixels, flag)
+            file = discord.File(BytesIO(image), filename=file_name)
 
             embed = discord.Embed(
                 title="Your Lovely Pride Avatar!",
@@ -268,8 +280,7 @@ class AvatarModify(commands.Cog):
             if not user:
                 await ctx.send(f"{Emojis.cross_mark} Could not get user info.")
                 return
-            image_bytes = await user.display_avatar.replace(size=1024).read()
-            await self.send_pride_image(ctx, image_bytes, pixels, flag, option)
+            await self.send_pride_image(ctx, user, pixels, flag, option)
 
     @prideavatar.command()
     async def flags(self, ctx: commands.Context) -> None:
@@ -296,16 +307,13 @@ class AvatarModify(commands.Cog):
             return
 
         async with ctx.typing():
-            image_bytes = await user.display_avatar.replace(size=1024).read()
-
             file_name = file_safe_name("spooky_avatar", ctx.author.display_name)
 
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                image_bytes,
-                spookifications.get_random_effect,
-                file_name
-            )
+            # The effect is chosen here instead of in the worker, so each effect is cached separately
+            effect = random.choice(spookifications.EFFECTS)
+            log.info(f"Spookyavatar's chosen effect: {effect.__name__}")
+            image = await render_effect(ctx, user, 1024, effect, cache=effect not in spookifications.RANDOM_EFFECTS)
+            file = discord.File(BytesIO(image), filename=file_name)
 
             embed = discord.Embed(
                 title="Is this you or am I just really paranoid?",
@@ -335,15 +343,8 @@ class AvatarModify(commands.Cog):
 
             file_name = file_safe_name("mosaic_avatar", ctx.author.display_name)
 
-            img_bytes = await user.display_avatar.replace(size=1024).read()
-
-            file = await in_executor(
-                PfpEffects.apply_effect,
-                img_bytes,
-                PfpEffects.mosaic_effect,
-                file_name,
-                squares,
-            )
+            image = await render_effect(ctx, user, 1024, PfpEffects.mosaic_effect, squares, cache=False)
+            file = discord.File(BytesIO(image), filename=file_name)
 
             if squares == 1:
                 title = "Hooh... that was a lot of work"
@@ -369,4 +370,5 @@ class AvatarModify(commands.Cog):
 
 def setup(bot: Bot) -> None:
     """Load the AvatarModify cog."""
+    image_workers.register_preloader(PfpEffects.preload_resources)
     bot.add_cog(AvatarModify(bot))
@@ -12,7 +12,7 @@ from sentry_sdk import push_scope
 from bot.bot import Bot
 from bot.constants import Channels, Colours, ERROR_REPLIES, NEGATIVE_REPLIES, RedirectOutput
 from bot.utils.decorators import InChannelCheckFailure, InMonthCheckFailure
-from bot.utils.exceptions import APIError, UserNotPlayingError
+from bot.utils.exceptions import APIError, ImageQueueFullError, UserNotPlayingError
 
 log = logging.getLogger(__name__)
 
@@ -130,6 +130,10 @@ class CommandErrorHandler(commands.Cog):
             )
             return
 
+        if isinstance(error, ImageQueueFullError):
+            await ctx.send(embed=self.error_embed(str(error), NEGATIVE_REPLIES))
+            return
+
         with push_scope() as scope:
             scope.user = {
                 "id": ctx.author.id,
@@ -3,12 +3,12 @@ import asyncio
 import itertools
 import logging
 from contextlib import suppress
-from typing import NamedTuple, Union
+from typing import NamedTuple, Optional, Union
 
-from discord import Colour, Embed, HTTPException, Message, Reaction, User
+from discord import Colour, Embed, HTTPException, Message, Object, RawReactionActionEvent
 from discord.ext import commands
 from discord.ext.commands import CheckFailure, Cog as DiscordCog, Command, Context
-from rapidfuzz import process
+from rapidfuzz import fuzz
 
 from bot import constants
 from bot.bot import Bot
@@ -17,6 +17,7 @@ from bot.utils.pagination import (
     FIRST_EMOJI, LAST_EMOJI,
     LEFT_EMOJI, LinePaginator, RIGHT_EMOJI,
 )
+from bot.utils.search_index import SearchIndex
 
 DELETE_EMOJI = Emojis.trashcan
 
@@ -77,6 +78,10 @@ class HelpSession:
     the regular description (class docstring) of the first cog found in the category.
     """
 
+    # The index of the command and cog names used to suggest close matches, and the names it was built from
+    _name_index: Optional[SearchIndex] = None
+    _indexed_names: frozenset[str] = frozenset()
+
     def __init__(
         self,
         ctx: Context,
@@ -113,6 +118,7 @@ class HelpSession:
         self._current_page = 0
         self.message = None
         self._timeout_task = None
+        self._reaction_route = None
         self.reset_timeout()
 
     def _get_query(self, query: str) -> Union[Command, Cog]:
@@ -156,12 +162,15 @@ class HelpSession:
 
         Will pass on possible close matches along with the `HelpQueryNotFound` exception.
         """
-        # Combine command and cog names
-        choices = list(self._bot.all_commands) + list(self._bot.cogs)
+        # Combine command and cog names, the index is only rebuilt when extensions added or removed some
+        choices = frozenset(self._bot.all_commands) | frozenset(self._bot.cogs)
+        if HelpSession._name_index is None or choices != HelpSession._indexed_names:
+            HelpSession._name_index = SearchIndex.from_names(choices)
+            HelpSession._indexed_names = choices
 
-        result = process.extract(query, choices, score_cutoff=90)
+        result = HelpSession._name_index.fuzzy(query, scorer=fuzz.WRatio, score_cutoff=90, limit=5)
 
-        raise HelpQueryNotFound(f'Query "{query}" not found.', dict(result))
+        raise HelpQueryNotFound(f'Query "{query}" not found.', {match.key: match.score for match in result})
 
     async def timeout(self, seconds: int = 30) -> None:
         """Waits for a set number of seconds, then stops the help session."""
@@ -178,22 +187,17 @@ class HelpSession:
         # recreate the timeout task
         self._timeout_task = self._bot.loop.create_task(self.timeout())
 
-    async def on_reaction_add(self, reaction: Reaction, user: User) -> None:
-        """Event handler for when reactions are added on the help message."""
-        # ensure it was the relevant session message
-        if reaction.message.id != self.message.id:
-            return
+    async def on_reaction_add(self, payload: RawReactionActionEvent) -> None:
+        """
+        Event handler for when reactions are added on the help message.
 
+        Only the reactions with one of the `REACTIONS` on the help message are routed here.
+        """
         # ensure it was the session author who reacted
-        if user.id != self.author.id:
-            return
-
-        emoji = str(reaction.emoji)
-
-        # check if valid action
-        if emoji not in REACTIONS:
+        if payload.user_id != self.author.id:
             return
 
+        emoji = str(payload.emoji)
         self.reset_timeout()
 
         # Run relevant action method
@@ -203,7 +207,7 @@ class HelpSession:
 
         # remove the added reaction to prep for re-use
         with suppress(HTTPException):
-            await self.message.remove_reaction(reaction, user)
+            await self.message.remove_reaction(emoji, Object(payload.user_id))
 
     async def on_message_delete(self, message: Message) -> None:
         """Closes the help session when the help message is deleted."""
@@ -214,10 +218,12 @@ class HelpSession:
         """Sets up the help session pages, events, message and reactions."""
         await self.build_pages()
 
-        self._bot.add_listener(self.on_reaction_add)
         self._bot.add_listener(self.on_message_delete)
 
         await self.update_page()
+        self._reaction_route = self._bot.reaction_router.add_route(
+            self.on_reaction_add, message_id=self.message.id, emojis=REACTIONS
+        )
         self.add_reactions()
 
     def add_reactions(self) -> None:
@@ -456,7 +462,8 @@ class HelpSession:
 
     async def stop(self) -> None:
         """Stops the help session, removes event listeners and attempts to delete the help message."""
-        self._bot.remove_listener(self.on_reaction_add)
+        if self._reaction_route:
+            self._bot.reaction_router.remove_route(self._reaction_route)
         self._bot.remove_listener(self.on_message_delete)
 
         # ignore if permission issue, or the message doesn't exist
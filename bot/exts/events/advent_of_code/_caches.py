@@ -3,3 +3,5 @@ import async_rediscache
 leaderboard_counts = async_rediscache.RedisCache(namespace="AOC_leaderboard_counts")
 leaderboard_cache = async_rediscache.RedisCache(namespace="AOC_leaderboard_cache")
 assigned_leaderboard = async_rediscache.RedisCache(namespace="AOC_assigned_leaderboard")
+board_cache = async_rediscache.RedisCache(namespace="AOC_board_cache")
+board_fetched_at = async_rediscache.RedisCache(namespace="AOC_board_fetched_at")
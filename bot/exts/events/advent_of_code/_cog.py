@@ -12,7 +12,7 @@ from bot.bot import Bot
 from bot.constants import (
     AdventOfCode as AocConfig, Channels, Colours, Emojis, Month, Roles, WHITELISTED_CHANNELS,
 )
-from bot.exts.events.advent_of_code import _helpers
+from bot.exts.events.advent_of_code import _helpers, _storage
 from bot.exts.events.advent_of_code.views.dayandstarview import AoCDropdownView
 from bot.utils.decorators import InChannelCheckFailure, in_month, whitelist_override, with_role
 from bot.utils.extensions import invoke_help_command
@@ -151,7 +151,7 @@ class AdventOfCode(commands.Cog):
             join_code = AocConfig.leaderboards[AocConfig.staff_leaderboard_id].join_code
         else:
             try:
-                join_code = await _helpers.get_public_join_code(author)
+                join_code = await _helpers.get_public_join_code(self.bot, author)
             except _helpers.FetchingLeaderboardFailedError:
                 await ctx.send(":x: Failed to get join code! Notified maintainers.")
                 return
@@ -205,7 +205,7 @@ class AdventOfCode(commands.Cog):
             )
         async with ctx.typing():
             try:
-                leaderboard = await _helpers.fetch_leaderboard()
+                leaderboard = await _helpers.fetch_leaderboard(self.bot)
             except _helpers.FetchingLeaderboardFailedError:
                 await ctx.send(":x: Unable to fetch leaderboard!")
                 return
@@ -222,11 +222,9 @@ class AdventOfCode(commands.Cog):
             await ctx.send(content=f"{header}\n\n{table}", embed=info_embed)
             return
 
-        # This is a dictionary that contains solvers in respect of day, and star.
-        # e.g. 1-1 means the solvers of the first star of the first day and their completion time
-        per_day_and_star = json.loads(leaderboard['leaderboard_per_day_and_star'])
+        # The solvers of the selected day and star are looked up in the
+        # structured leaderboard storage once a selection has been made.
         view = AoCDropdownView(
-            day_and_star_data=per_day_and_star,
             maximum_scorers=maximum_scorers,
             original_author=ctx.author
         )
@@ -263,13 +261,12 @@ class AdventOfCode(commands.Cog):
     async def private_leaderboard_daily_stats(self, ctx: commands.Context) -> None:
         """Send an embed with daily completion statistics for the Python Discord leaderboard."""
         try:
-            leaderboard = await _helpers.fetch_leaderboard()
+            leaderboard = await _helpers.fetch_leaderboard(self.bot)
         except _helpers.FetchingLeaderboardFailedError:
             await ctx.send(":x: Can't fetch leaderboard for stats right now!")
             return
 
-        # The daily stats are serialized as JSON as they have to be cached in Redis
-        daily_stats = json.loads(leaderboard["daily_stats"])
+        daily_stats = await _storage.get_daily_stats()
         async with ctx.typing():
             lines = ["Day   ⭐  ⭐⭐ |   %⭐    %⭐⭐\n================================"]
             for day, stars in daily_stats.items():
@@ -299,7 +296,7 @@ class AdventOfCode(commands.Cog):
         """
         async with ctx.typing():
             try:
-                await _helpers.fetch_leaderboard(invalidate_cache=True)
+                await _helpers.fetch_leaderboard(self.bot, invalidate_cache=True)
             except _helpers.FetchingLeaderboardFailedError:
                 await ctx.send(":x: Something went wrong while trying to refresh the cache!")
             else:
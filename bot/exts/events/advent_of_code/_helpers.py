@@ -1,10 +1,14 @@
 import asyncio
+import bisect
 import collections
+import contextlib
 import datetime
 import json
 import logging
 import math
 import operator
+import time
+from collections.abc import AsyncIterator, Iterable
 from typing import Any, Optional
 
 import aiohttp
@@ -12,8 +16,8 @@ import arrow
 import discord
 
 from bot.bot import Bot
-from bot.constants import AdventOfCode, Channels, Colours
-from bot.exts.events.advent_of_code import _caches
+from bot.constants import AdventOfCode, AdventOfCodeLeaderboard, Channels, Colours
+from bot.exts.events.advent_of_code import _caches, _storage
 
 log = logging.getLogger(__name__)
 
@@ -38,7 +42,6 @@ REQUIRED_CACHE_KEYS = (
     "full_leaderboard_url",
     "leaderboard_fetched_at",
     "number_of_participants",
-    "daily_stats",
 )
 
 AOC_EMBED_THUMBNAIL = (
@@ -55,7 +58,7 @@ COUNTDOWN_STEP = 60 * 5
 # Create namedtuple that combines a participant's name and their completion
 # time for a specific star. We're going to use this later to order the results
 # for each star to compute the rank score.
-StarResult = collections.namedtuple("StarResult", "member_id completion_time")
+StarResult = collections.namedtuple("StarResult", "completion_time member_id")
 
 
 class UnexpectedRedirect(aiohttp.ClientError):
@@ -66,6 +69,10 @@ class UnexpectedResponseStatus(aiohttp.ClientError):
     """Raised when an unexpected redirect was detected."""
 
 
+class UnexpectedResponseContent(aiohttp.ClientError):
+    """Raised when the response body isn't the expected JSON."""
+
+
 class FetchingLeaderboardFailedError(Exception):
     """Raised when one or more leaderboards could not be fetched at all."""
 
@@ -81,83 +88,176 @@ def leaderboard_sorting_function(entry: tuple[str, dict]) -> tuple[int, int]:
     return result["score"], result["star_2"] + result["star_1"]
 
 
-def _parse_raw_leaderboard_data(raw_leaderboard_data: dict) -> dict:
+class LeaderboardParser:
     """
-    Parse the leaderboard data received from the AoC website.
+    Parse the leaderboard data received from the AoC website incrementally.
 
     The data we receive from AoC is structured by member, not by day/star. This
     means that we need to "transpose" the data to a per star structure in order
     to calculate the rank scores each individual should get.
 
-    As we need our data both "per participant" as well as "per day", we return
-    the parsed and analyzed data in both formats.
+    Between two refreshes of the leaderboard, only a handful of new stars are
+    typically earned. Instead of transposing and sorting the complete dataset
+    every time, the parser keeps the state of the previous parse around and
+    only inserts the completion times that changed into the sorted per star
+    results, adjusting the rank scores of the affected participants only.
+
+    The rank score of a participant is the sum of `number_of_participants - rank`
+    for each star that counts towards the ranking. We store the number of ranked
+    stars and the sum of ranks per participant separately, which means that a
+    change in the number of participants doesn't require touching every star.
     """
-    # We need to get an aggregate of completion times for each star of each day,
-    # instead of per participant to compute the rank scores. This dictionary will
-    # provide such a transposed dataset.
-    star_results = collections.defaultdict(list)
-
-    # As we're already iterating over the participants, we can record the number of
-    # first stars and second stars they've achieved right here and now. This means
-    # we won't have to iterate over the participants again later.
-    leaderboard = {}
-
-    # The data we get from the AoC website is structured by member, not by day/star,
-    # which means we need to iterate over the members to transpose the data to a per
-    # star view. We need that per star view to compute rank scores per star.
-    per_day_star_stats = collections.defaultdict(list)
-    for member in raw_leaderboard_data.values():
-        name = member["name"] if member["name"] else f"Anonymous #{member['id']}"
-        member_id = member["id"]
-        leaderboard[member_id] = {"name": name, "score": 0, "star_1": 0, "star_2": 0}
-
-        # Iterate over all days for this participant
-        for day, stars in member["completion_day_level"].items():
-            # Iterate over the complete stars for this day for this participant
-            for star, data in stars.items():
-                # Record completion of this star for this individual
-                leaderboard[member_id][f"star_{star}"] += 1
-
-                # Record completion datetime for this participant for this day/star
-                completion_time = datetime.datetime.fromtimestamp(int(data["get_star_ts"]))
-                star_results[(day, star)].append(
-                    StarResult(member_id=member_id, completion_time=completion_time)
-                )
-                per_day_star_stats[f"{day}-{star}"].append(
-                    {'completion_time': int(data["get_star_ts"]), 'member_name': name}
-                )
-    for key in per_day_star_stats:
-        per_day_star_stats[key] = sorted(per_day_star_stats[key], key=operator.itemgetter('completion_time'))
-
-    # Now that we have a transposed dataset that holds the completion time of all
-    # participants per star, we can compute the rank-based scores each participant
-    # should get for that star.
-    max_score = len(leaderboard)
-    for (day, _star), results in star_results.items():
-        # If this day should not count in the ranking, skip it.
+
+    def __init__(self):
+        # Basic information about each participant: their name and star counts
+        self._members: dict[Any, dict] = {}
+
+        # The completion timestamp of each (day, star) per participant, used to
+        # diff the new payload against the previously parsed state
+        self._completions: dict[Any, dict[tuple[str, str], int]] = {}
+
+        # Completion times per (day, star), kept sorted by completion time
+        self._star_results: dict[tuple[str, str], list[StarResult]] = collections.defaultdict(list)
+
+        # The sum of the ranks and the number of ranked stars per participant
+        self._rank_totals: collections.Counter = collections.Counter()
+        self._ranked_stars: collections.Counter = collections.Counter()
+
+    def update(self, raw_leaderboard_data: dict) -> dict:
+        """
+        Apply the changes in `raw_leaderboard_data` to the state and return the parsed leaderboard.
+
+        As we need our data both "per participant" as well as "per day", we return
+        the parsed and analyzed data in both formats.
+        """
+        current_members = {member["id"] for member in raw_leaderboard_data.values()}
+        for member_id in self._members.keys() - current_members:
+            log.trace(f"Member `{member_id}` is no longer on the leaderboard, removing their results.")
+            self._remove_member(member_id)
+
+        for member in raw_leaderboard_data.values():
+            member_id = member["id"]
+            name = member["name"] if member["name"] else f"Anonymous #{member_id}"
+
+            if member_id not in self._members:
+                self._members[member_id] = {"name": name, "star_1": 0, "star_2": 0}
+                self._completions[member_id] = {}
+            else:
+                self._members[member_id]["name"] = name
+
+            completions = self._completions[member_id]
+            new_completions = {
+                (day, star): int(data["get_star_ts"])
+                for day, stars in member["completion_day_level"].items()
+                for star, data in stars.items()
+            }
+
+            for day_and_star in completions.keys() - new_completions.keys():
+                self._remove_star(member_id, *day_and_star)
+
+            for day_and_star, completion_time in new_completions.items():
+                previous_time = completions.get(day_and_star)
+                if previous_time == completion_time:
+                    continue
+
+                if previous_time is not None:
+                    self._remove_star(member_id, *day_and_star)
+                self._add_star(member_id, *day_and_star, completion_time)
+
+        return self._build_parsed_data()
+
+    def _add_star(self, member_id: Any, day: str, star: str, completion_time: int) -> None:
+        """Insert the completion of a (day, star) in the sorted results and adjust the ranks after it."""
+        self._completions[member_id][(day, star)] = completion_time
+        self._members[member_id][f"star_{star}"] += 1
+
+        results = self._star_results[(day, star)]
+        star_result = StarResult(member_id=member_id, completion_time=completion_time)
+        position = bisect.bisect_right(results, star_result)
+        results.insert(position, star_result)
+
+        # If this day should not count in the ranking, we don't have to adjust any ranks.
         if day in AdventOfCode.ignored_days:
-            continue
+            return
 
-        sorted_result = sorted(results, key=operator.attrgetter("completion_time"))
-        for rank, star_result in enumerate(sorted_result):
-            leaderboard[star_result.member_id]["score"] += max_score - rank
+        self._ranked_stars[member_id] += 1
+        self._rank_totals[member_id] += position
+        for later_result in results[position + 1:]:
+            self._rank_totals[later_result.member_id] += 1
 
-    # Since dictionaries now retain insertion order, let's use that
-    sorted_leaderboard = dict(
-        sorted(leaderboard.items(), key=leaderboard_sorting_function, reverse=True)
-    )
+    def _remove_star(self, member_id: Any, day: str, star: str) -> None:
+        """Remove the completion of a (day, star) from the sorted results and adjust the ranks after it."""
+        completion_time = self._completions[member_id].pop((day, star))
+        self._members[member_id][f"star_{star}"] -= 1
 
-    # Create summary stats for the stars completed for each day of the event.
-    daily_stats = {}
-    for day in range(1, 26):
-        day = str(day)
-        star_one = len(star_results.get((day, "1"), []))
-        star_two = len(star_results.get((day, "2"), []))
-        # By using a dictionary instead of namedtuple here, we can serialize
-        # this data to JSON in order to cache it in Redis.
-        daily_stats[day] = {"star_one": star_one, "star_two": star_two}
+        results = self._star_results[(day, star)]
+        star_result = StarResult(member_id=member_id, completion_time=completion_time)
+        position = bisect.bisect_left(results, star_result)
+        del results[position]
 
-    return {"daily_stats": daily_stats, "leaderboard": sorted_leaderboard, 'per_day_and_star': per_day_star_stats}
+        if day in AdventOfCode.ignored_days:
+            return
+
+        self._ranked_stars[member_id] -= 1
+        self._rank_totals[member_id] -= position
+        for later_result in results[position:]:
+            self._rank_totals[later_result.member_id] -= 1
+
+    def _remove_member(self, member_id: Any) -> None:
+        """Remove all results of a participant that left the leaderboard."""
+        for day, star in list(self._completions[member_id]):
+            self._remove_star(member_id, day, star)
+
+        del self._members[member_id]
+        del self._completions[member_id]
+        self._rank_totals.pop(member_id, None)
+        self._ranked_stars.pop(member_id, None)
+
+    def _build_parsed_data(self) -> dict:
+        """Build the "per participant" and "per day" views of the current state."""
+        max_score = len(self._members)
+        leaderboard = {
+            member_id: {
+                **member,
+                "score": max_score * self._ranked_stars[member_id] - self._rank_totals[member_id],
+            }
+            for member_id, member in self._members.items()
+        }
+
+        # Since dictionaries now retain insertion order, let's use that
+        sorted_leaderboard = dict(
+            sorted(leaderboard.items(), key=leaderboard_sorting_function, reverse=True)
+        )
+
+        per_day_star_stats = {
+            f"{day}-{star}": [
+                {
+                    "completion_time": result.completion_time,
+                    "member_id": result.member_id,
+                    "member_name": self._members[result.member_id]["name"],
+                }
+                for result in results
+            ]
+            for (day, star), results in self._star_results.items()
+            if results
+        }
+
+        # Create summary stats for the stars completed for each day of the event.
+        daily_stats = {}
+        for day in range(1, 26):
+            day = str(day)
+            star_one = len(self._star_results.get((day, "1"), []))
+            star_two = len(self._star_results.get((day, "2"), []))
+            # By using a dictionary instead of namedtuple here, we can serialize
+            # this data to JSON in order to cache it in Redis.
+            daily_stats[day] = {"star_one": star_one, "star_two": star_two}
+
+        return {"daily_stats": daily_stats, "leaderboard": sorted_leaderboard, "per_day_and_star": per_day_star_stats}
+
+
+# The parser holding the state of the last parsed leaderboard, so
+# that a refresh of the leaderboard only has to process the changes.
+_leaderboard_parser = LeaderboardParser()
 
 
 def _format_leaderboard(leaderboard: dict[str, dict]) -> str:
@@ -176,76 +276,146 @@ def _format_leaderboard(leaderboard: dict[str, dict]) -> str:
     return "\n".join(leaderboard_lines)
 
 
-async def _leaderboard_request(url: str, board: str, cookies: dict) -> dict[str, Any]:
+class RequestLimiter:
+    """
+    Limit the rate of requests made to a website.
+
+    At most `max_concurrency` requests are in flight at the same time and
+    consecutive requests are started at least `min_spacing` seconds apart.
+    """
+
+    def __init__(self, max_concurrency: int, min_spacing: float):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._spacing_lock = asyncio.Lock()
+        self._min_spacing = min_spacing
+        self._last_request_at = 0.0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """Wait until a request may be made within the limits and hold a slot while it's made."""
+        async with self._semaphore:
+            async with self._spacing_lock:
+                loop = asyncio.get_running_loop()
+                delay = self._last_request_at + self._min_spacing - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._last_request_at = loop.time()
+
+            yield
+
+
+# All requests to the AoC website go through this limiter to respect their request etiquette
+_aoc_request_limiter = RequestLimiter(
+    AdventOfCode.max_concurrent_board_requests,
+    AdventOfCode.board_request_spacing_seconds,
+)
+
+
+async def _leaderboard_request(bot: Bot, url: str, board: str, cookies: dict) -> dict[str, Any]:
     """Make a leaderboard request using the specified session cookie."""
-    async with aiohttp.request("GET", url, headers=AOC_REQUEST_HEADER, cookies=cookies) as resp:
-        # The Advent of Code website redirects silently with a 200 response if a
-        # session cookie has expired, is invalid, or was not provided.
-        if str(resp.url) != url:
-            log.error(f"Fetching leaderboard `{board}` failed! Check the session cookie.")
-            raise UnexpectedRedirect(f"redirected unexpectedly to {resp.url} for board `{board}`")
+    async with _aoc_request_limiter.acquire():
+        # Not retried, retries wouldn't be spaced out by the limiter. Failed refreshes are retried after a cooldown.
+        resp = await bot.api_client.get(url, headers=AOC_REQUEST_HEADER, cookies=cookies, retries=0)
 
-        # Every status other than `200` is unexpected, not only 400+
-        if not resp.status == 200:
-            log.error(f"Unexpected response `{resp.status}` while fetching leaderboard `{board}`")
-            raise UnexpectedResponseStatus(f"status `{resp.status}`")
+    # The Advent of Code website redirects silently with a 200 response if a
+    # session cookie has expired, is invalid, or was not provided.
+    if resp.url != url:
+        log.error(f"Fetching leaderboard `{board}` failed! Check the session cookie.")
+        raise UnexpectedRedirect(f"redirected unexpectedly to {resp.url} for board `{board}`")
 
-        return await resp.json()
+    # Every status other than `200` is unexpected, not only 400+
+    if not resp.status == 200:
+        log.error(f"Unexpected response `{resp.status}` while fetching leaderboard `{board}`")
+        raise UnexpectedResponseStatus(f"status `{resp.status}`")
 
+    try:
+        return resp.json()
+    except ValueError:
+        log.error(f"Response for leaderboard `{board}` isn't valid JSON")
+        raise UnexpectedResponseContent(f"invalid JSON for board `{board}`") from None
 
-async def _fetch_leaderboard_data() -> dict[str, Any]:
-    """Fetch data for all leaderboards and return a pooled result."""
-    year = AdventOfCode.year
 
-    # We'll make our requests one at a time to not flood the AoC website with
-    # up to six simultaneous requests. This may take a little longer, but it
-    # does avoid putting unnecessary stress on the Advent of Code website.
+async def _fetch_board(bot: Bot, leaderboard: AdventOfCodeLeaderboard, invalidate_cache: bool) -> dict[str, Any]:
+    """
+    Get the raw data of a single leaderboard.
 
-    # Container to store the raw data of each leaderboard
-    participants = {}
-    for leaderboard in AdventOfCode.leaderboards.values():
-        leaderboard_url = AOC_API_URL.format(year=year, leaderboard_id=leaderboard.id)
-
-        # Two attempts, one with the original session cookie and one with the fallback session
-        for attempt in range(1, 3):
-            log.info(f"Attempting to fetch leaderboard `{leaderboard.id}` ({attempt}/2)")
-            cookies = {"session": leaderboard.session}
-            try:
-                raw_data = await _leaderboard_request(leaderboard_url, leaderboard.id, cookies)
-            except UnexpectedRedirect:
-                if cookies["session"] == AdventOfCode.fallback_session:
-                    log.error("It seems like the fallback cookie has expired!")
-                    raise FetchingLeaderboardFailedError from None
-
-                # If we're here, it means that the original session did not
-                # work. Let's fall back to the fallback session.
-                leaderboard.use_fallback_session = True
-                continue
-            except aiohttp.ClientError:
-                # Don't retry, something unexpected is wrong and it may not be the session.
+    Each board is cached independently, so a board is only fetched from the AoC
+    website if its cached data is older than the board cache lifetime.
+    """
+    fetched_at = await _caches.board_fetched_at.get(leaderboard.id)
+    if not invalidate_cache and fetched_at is not None:
+        age = arrow.utcnow().timestamp() - fetched_at
+        cached_board = await _caches.board_cache.get(leaderboard.id)
+        if age < AdventOfCode.board_cache_expiry_seconds and cached_board is not None:
+            log.trace(f"Using cached data of leaderboard `{leaderboard.id}` ({age:.0f} seconds old)")
+            return json.loads(cached_board)
+
+    leaderboard_url = AOC_API_URL.format(year=AdventOfCode.year, leaderboard_id=leaderboard.id)
+
+    # Two attempts, one with the original session cookie and one with the fallback session
+    for attempt in range(1, 3):
+        log.info(f"Attempting to fetch leaderboard `{leaderboard.id}` ({attempt}/2)")
+        cookies = {"session": leaderboard.session}
+        try:
+            raw_data = await _leaderboard_request(bot, leaderboard_url, leaderboard.id, cookies)
+        except UnexpectedRedirect:
+            if cookies["session"] == AdventOfCode.fallback_session:
+                log.error("It seems like the fallback cookie has expired!")
                 raise FetchingLeaderboardFailedError from None
-            else:
-                # Get the participants and store their current count.
-                board_participants = raw_data["members"]
-                await _caches.leaderboard_counts.set(leaderboard.id, len(board_participants))
-                participants.update(board_participants)
-                break
+
+            # If we're here, it means that the original session did not
+            # work. Let's fall back to the fallback session.
+            leaderboard.use_fallback_session = True
+            continue
+        except aiohttp.ClientError:
+            # Don't retry, something unexpected is wrong and it may not be the session.
+            raise FetchingLeaderboardFailedError from None
         else:
-            log.error(f"reached 'unreachable' state while fetching board `{leaderboard.id}`.")
-            raise FetchingLeaderboardFailedError
+            # Cache the board and store its current participant count.
+            await _caches.board_cache.set(leaderboard.id, json.dumps(raw_data))
+            await _caches.board_fetched_at.set(leaderboard.id, arrow.utcnow().timestamp())
+            await _caches.leaderboard_counts.set(leaderboard.id, len(raw_data["members"]))
+            return raw_data
+
+    log.error(f"reached 'unreachable' state while fetching board `{leaderboard.id}`.")
+    raise FetchingLeaderboardFailedError
+
+
+async def _fetch_leaderboard_data(
+    bot: Bot,
+    board_ids: Optional[Iterable[str]] = None,
+    invalidate_cache: bool = False,
+) -> dict[str, Any]:
+    """
+    Fetch data for the leaderboards with `board_ids`, or all leaderboards, and return a pooled result.
+
+    The boards are fetched concurrently, but the requests go through a limiter
+    to not flood the AoC website with up to six simultaneous requests.
+    """
+    if board_ids is None:
+        board_ids = AdventOfCode.leaderboards.keys()
+
+    raw_boards = await asyncio.gather(*(
+        _fetch_board(bot, AdventOfCode.leaderboards[board_id], invalidate_cache) for board_id in board_ids
+    ))
+
+    # Container to store the raw data of each leaderboard
+    participants = {}
+    for raw_data in raw_boards:
+        participants.update(raw_data["members"])
 
     log.info(f"Fetched leaderboard information for {len(participants)} participants")
     return participants
 
 
-async def _upload_leaderboard(leaderboard: str) -> str:
+async def _upload_leaderboard(bot: Bot, leaderboard: str) -> str:
     """Upload the full leaderboard to our paste service and return the URL."""
-    async with aiohttp.request("POST", PASTE_URL, data=leaderboard) as resp:
-        try:
-            resp_json = await resp.json()
-        except Exception:
-            log.exception("Failed to upload full leaderboard to paste service")
-            return ""
+    try:
+        resp = await bot.api_client.post(PASTE_URL, data=leaderboard)
+        resp_json = resp.json()
+    except Exception:
+        log.exception("Failed to upload full leaderboard to paste service")
+        return ""
 
     if "key" in resp_json:
         return RAW_PASTE_URL_TEMPLATE.format(key=resp_json["key"])
@@ -259,54 +429,127 @@ def _get_top_leaderboard(full_leaderboard: str) -> str:
     return "\n".join(full_leaderboard.splitlines()[:TOP_LEADERBOARD_LINES])
 
 
-@_caches.leaderboard_cache.atomic_transaction
-async def fetch_leaderboard(invalidate_cache: bool = False) -> dict:
+async def _refresh_leaderboard(bot: Bot, invalidate_cache: bool) -> dict:
+    """Fetch and parse the leaderboards and store the new snapshot in the cache."""
+    # Fetch the raw data
+    raw_leaderboard_data = await _fetch_leaderboard_data(bot, invalidate_cache=invalidate_cache)
+
+    # Parse it to extract "per star, per day" data and participant scores
+    parsed_leaderboard_data = _leaderboard_parser.update(raw_leaderboard_data)
+
+    leaderboard = parsed_leaderboard_data["leaderboard"]
+    number_of_participants = len(leaderboard)
+    formatted_leaderboard = _format_leaderboard(leaderboard)
+    full_leaderboard_url = await _upload_leaderboard(bot, formatted_leaderboard)
+    leaderboard_fetched_at = datetime.datetime.utcnow().isoformat()
+
+    cached_leaderboard = {
+        "full_leaderboard": formatted_leaderboard,
+        "top_leaderboard": _get_top_leaderboard(formatted_leaderboard),
+        "full_leaderboard_url": full_leaderboard_url,
+        "leaderboard_fetched_at": leaderboard_fetched_at,
+        "number_of_participants": number_of_participants,
+    }
+
+    # Store the new values in Redis; the per day and star data is stored in
+    # structured form, so single days and stars can be looked up cheaply.
+    await _storage.store_leaderboard(parsed_leaderboard_data, AdventOfCode.leaderboard_snapshot_expiry_seconds)
+    await _caches.leaderboard_cache.update(cached_leaderboard)
+
+    # Set an expiry on the leaderboard RedisCache. The snapshot is kept well
+    # beyond the refresh interval, so it can be served while it's refreshed.
+    with await _caches.leaderboard_cache._get_pool_connection() as connection:
+        await connection.expire(
+            _caches.leaderboard_cache.namespace,
+            AdventOfCode.leaderboard_snapshot_expiry_seconds
+        )
+
+    return cached_leaderboard
+
+
+# The task refreshing the leaderboard snapshot, if a refresh has been started
+_refresh_task: Optional[asyncio.Task] = None
+# The monotonic time at which the last refresh failed, or None if it succeeded
+_refresh_failed_at: Optional[float] = None
+
+
+def _record_refresh_result(task: asyncio.Task) -> None:
+    """Record when the refresh in `task` failed, so that the next background refresh waits for a while."""
+    global _refresh_failed_at
+
+    if task.cancelled():
+        return
+
+    _refresh_failed_at = time.monotonic() if task.exception() is not None else None
+
+
+def _start_refresh(bot: Bot, invalidate_cache: bool = False) -> asyncio.Task:
+    """Start refreshing the leaderboard in the background, unless a refresh is already in progress."""
+    global _refresh_task
+
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = bot.loop.create_task(_refresh_leaderboard(bot, invalidate_cache))
+        _refresh_task.set_name("AoC Leaderboard Refresh")
+        _refresh_task.add_done_callback(background_task_callback)
+        _refresh_task.add_done_callback(_record_refresh_result)
+
+    return _refresh_task
+
+
+def _refresh_cooling_down() -> bool:
+    """Whether the last refresh failed too recently to start another one in the background."""
+    return (
+        _refresh_failed_at is not None
+        and time.monotonic() - _refresh_failed_at < AdventOfCode.leaderboard_refresh_cooldown_seconds
+    )
+
+
+def get_leaderboard_age(leaderboard: dict) -> datetime.timedelta:
+    """Get the time passed since the leaderboard snapshot was fetched."""
+    return datetime.datetime.utcnow() - datetime.datetime.fromisoformat(leaderboard["leaderboard_fetched_at"])
+
+
+async def fetch_leaderboard(bot: Bot, invalidate_cache: bool = False) -> dict:
     """
     Get the current Python Discord combined leaderboard.
 
-    The leaderboard is cached and only fetched from the API if the current data
-    is older than the lifetime set in the constants. To prevent multiple calls
-    to this function fetching new leaderboard information in case of a cache
-    miss, this function is locked to one call at a time using a decorator.
+    The leaderboard is cached as a snapshot. If the snapshot is older than the
+    lifetime set in the constants, the stale snapshot is returned immediately
+    and a refresh is started in the background. Callers only have to wait for
+    the leaderboard to be fetched if there's no snapshot at all or if the cache
+    is explicitly invalidated. Only one refresh is in progress at a time; all
+    callers waiting for a refresh share the same task. After a refresh failed,
+    no background refresh is started until the refresh cooldown has passed.
     """
     cached_leaderboard = await _caches.leaderboard_cache.to_dict()
 
+    # The per day and star data used to be cached as JSON blobs. As those can't be
+    # converted to the structured storage, force fetching the leaderboard again.
+    if await _storage.remove_legacy_keys(cached_leaderboard):
+        invalidate_cache = True
+
     # Check if the cached leaderboard contains everything we expect it to. If it
     # does not, this probably means the cache has not been created yet or has
     # expired in Redis. This check also accounts for a malformed cache.
     if invalidate_cache or any(key not in cached_leaderboard for key in REQUIRED_CACHE_KEYS):
-        log.info("No leaderboard cache available, fetching leaderboards...")
-        # Fetch the raw data
-        raw_leaderboard_data = await _fetch_leaderboard_data()
-
-        # Parse it to extract "per star, per day" data and participant scores
-        parsed_leaderboard_data = _parse_raw_leaderboard_data(raw_leaderboard_data)
-
-        leaderboard = parsed_leaderboard_data["leaderboard"]
-        number_of_participants = len(leaderboard)
-        formatted_leaderboard = _format_leaderboard(leaderboard)
-        full_leaderboard_url = await _upload_leaderboard(formatted_leaderboard)
-        leaderboard_fetched_at = datetime.datetime.utcnow().isoformat()
-
-        cached_leaderboard = {
-            "full_leaderboard": formatted_leaderboard,
-            "top_leaderboard": _get_top_leaderboard(formatted_leaderboard),
-            "full_leaderboard_url": full_leaderboard_url,
-            "leaderboard_fetched_at": leaderboard_fetched_at,
-            "number_of_participants": number_of_participants,
-            "daily_stats": json.dumps(parsed_leaderboard_data["daily_stats"]),
-            "leaderboard_per_day_and_star": json.dumps(parsed_leaderboard_data["per_day_and_star"])
-        }
+        log.info("No leaderboard snapshot available, fetching leaderboards...")
 
-        # Store the new values in Redis
-        await _caches.leaderboard_cache.update(cached_leaderboard)
+        # A refresh that's already in progress may not invalidate the board caches,
+        # so wait for it to finish before starting a refresh that does.
+        if invalidate_cache and _refresh_task is not None and not _refresh_task.done():
+            with contextlib.suppress(FetchingLeaderboardFailedError):
+                await asyncio.shield(_refresh_task)
 
-        # Set an expiry on the leaderboard RedisCache
-        with await _caches.leaderboard_cache._get_pool_connection() as connection:
-            await connection.expire(
-                _caches.leaderboard_cache.namespace,
-                AdventOfCode.leaderboard_cache_expiry_seconds
-            )
+        # Shield the refresh, so it isn't cancelled along with the command waiting for it.
+        return await asyncio.shield(_start_refresh(bot, invalidate_cache))
+
+    age = get_leaderboard_age(cached_leaderboard)
+    if age.total_seconds() > AdventOfCode.leaderboard_cache_expiry_seconds:
+        if _refresh_cooling_down():
+            log.trace(f"Serving leaderboard snapshot of {age} old, the last refresh failed recently.")
+        else:
+            log.info(f"Serving leaderboard snapshot of {age} old while refreshing it in the background.")
+            _start_refresh(bot)
 
     return cached_leaderboard
 
@@ -316,10 +559,15 @@ def get_summary_embed(leaderboard: dict) -> discord.Embed:
     leaderboard_url = leaderboard["full_leaderboard_url"]
     refresh_minutes = AdventOfCode.leaderboard_cache_expiry_seconds // 60
 
+    description = f"*The leaderboard is refreshed every {refresh_minutes} minutes.*"
+    age = get_leaderboard_age(leaderboard)
+    if age.total_seconds() > AdventOfCode.leaderboard_cache_expiry_seconds:
+        description += f"\n*This snapshot is {age.total_seconds() // 60:.0f} minutes old, it's being refreshed now.*"
+
     aoc_embed = discord.Embed(
         colour=Colours.soft_green,
         timestamp=datetime.datetime.fromisoformat(leaderboard["leaderboard_fetched_at"]),
-        description=f"*The leaderboard is refreshed every {refresh_minutes} minutes.*"
+        description=description,
     )
     aoc_embed.add_field(
         name="Number of Participants",
@@ -339,7 +587,7 @@ def get_summary_embed(leaderboard: dict) -> discord.Embed:
     return aoc_embed
 
 
-async def get_public_join_code(author: discord.Member) -> Optional[str]:
+async def get_public_join_code(bot: Bot, author: discord.Member) -> Optional[str]:
     """
     Get the join code for one of the non-staff leaderboards.
 
@@ -347,11 +595,15 @@ async def get_public_join_code(author: discord.Member) -> Optional[str]:
     hasn't filled up yet, we'll return the same join code to prevent them from
     getting join codes for multiple boards.
     """
-    # Make sure to fetch new leaderboard information if the cache is older than
-    # 30 minutes. While this still means that there could be a discrepancy
+    # Make sure to fetch new board information if the cache of a board is older
+    # than 30 minutes. While this still means that there could be a discrepancy
     # between the current leaderboard state and the numbers we have here, this
-    # should work fairly well given the buffer of slots that we have.
-    await fetch_leaderboard()
+    # should work fairly well given the buffer of slots that we have. Only the
+    # public boards are refreshed, as the staff board is ignored here anyway.
+    public_board_ids = [
+        board_id for board_id in AdventOfCode.leaderboards if board_id != AdventOfCode.staff_leaderboard_id
+    ]
+    await _fetch_leaderboard_data(bot, public_board_ids)
     previously_assigned_board = await _caches.assigned_leaderboard.get(author.id)
     current_board_counts = await _caches.leaderboard_counts.to_dict()
 
@@ -376,7 +628,7 @@ async def get_public_join_code(author: discord.Member) -> Optional[str]:
     # If we don't have the current board counts cached, let's force fetching a new cache
     if not current_board_counts:
         log.warning("Leaderboard counts were missing from the cache unexpectedly!")
-        await fetch_leaderboard(invalidate_cache=True)
+        await _fetch_leaderboard_data(bot, public_board_ids, invalidate_cache=True)
         current_board_counts = await _caches.leaderboard_counts.to_dict()
 
     # Find the board with the current lowest participant count. As we can't
@@ -559,10 +811,10 @@ async def new_puzzle_notification(bot: Bot) -> None:
         # the puzzle page before it's available by making a small HEAD request.
         for retry in range(1, 5):
             log.debug(f"Checking if the puzzle is already available (attempt {retry}/4)")
-            async with bot.http_session.head(puzzle_url, raise_for_status=False) as resp:
-                if resp.status == 200:
-                    log.debug("Puzzle is available; let's send an announcement message.")
-                    break
+            resp = await bot.api_client.head(puzzle_url, retries=0)
+            if resp.status == 200:
+                log.debug("Puzzle is available; let's send an announcement message.")
+                break
             log.debug(f"The puzzle is not yet available (status={resp.status})")
             await asyncio.sleep(10)
         else:
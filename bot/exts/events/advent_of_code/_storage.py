@@ -0,0 +1,126 @@
+"""
+Structured Redis storage for the per day and star leaderboard data.
+
+Instead of serializing the results of every day and star as one JSON blob, the
+results are stored as one sorted set per day and star, scored by completion
+timestamp, and one hash per participant. This means that looking up the top
+solvers of a single day and star is a range read on a sorted set instead of
+deserializing the data of the entire event.
+
+All keys are stored under the namespace of `_caches.leaderboard_cache`, so
+they're easy to tell apart from the rest of the cached data.
+"""
+import logging
+from typing import Any
+
+from bot.exts.events.advent_of_code import _caches
+
+log = logging.getLogger(__name__)
+
+# The keys that were used to store the per day and star data as JSON blobs
+# in the leaderboard cache before it was stored in structured form.
+LEGACY_CACHE_KEYS = ("daily_stats", "leaderboard_per_day_and_star")
+
+DAYS = range(1, 26)
+STARS = ("1", "2")
+
+
+def _day_and_star_key(namespace: str, day: str, star: str) -> str:
+    """Get the key of the sorted set holding the completion times of `day` and `star`."""
+    return f"{namespace}:day_and_star:{day}-{star}"
+
+
+def _member_key(namespace: str, member_id: Any) -> str:
+    """Get the key of the hash holding the information of a single participant."""
+    return f"{namespace}:member:{member_id}"
+
+
+async def store_leaderboard(parsed_leaderboard_data: dict, expiry: int) -> None:
+    """
+    Store the per day and star results and the participants of the parsed leaderboard.
+
+    All keys are replaced in a single transaction, so readers never see a partially
+    written leaderboard. The keys expire after `expiry` seconds.
+    """
+    with await _caches.leaderboard_cache._get_pool_connection() as connection:
+        namespace = _caches.leaderboard_cache.namespace
+        transaction = connection.multi_exec()
+
+        for day in DAYS:
+            for star in STARS:
+                key = _day_and_star_key(namespace, str(day), star)
+                transaction.delete(key)
+
+                results = parsed_leaderboard_data["per_day_and_star"].get(f"{day}-{star}")
+                if not results:
+                    continue
+
+                pairs = []
+                for result in results:
+                    pairs.extend((result["completion_time"], result["member_id"]))
+                transaction.zadd(key, *pairs)
+                transaction.expire(key, expiry)
+
+        for member_id, member in parsed_leaderboard_data["leaderboard"].items():
+            key = _member_key(namespace, member_id)
+            transaction.hmset_dict(key, member)
+            transaction.expire(key, expiry)
+
+        await transaction.execute()
+
+    log.info(f"Stored structured leaderboard data for {len(parsed_leaderboard_data['leaderboard'])} participants")
+
+
+async def get_day_and_star_results(day: str, star: str, count: int) -> list[dict]:
+    """Get the first `count` solvers of `day` and `star`, sorted by their completion time."""
+    with await _caches.leaderboard_cache._get_pool_connection() as connection:
+        namespace = _caches.leaderboard_cache.namespace
+        results = await connection.zrange(
+            _day_and_star_key(namespace, day, star), 0, count - 1, withscores=True, encoding="utf-8"
+        )
+        if not results:
+            return []
+
+        pipeline = connection.pipeline()
+        for member_id, _completion_time in results:
+            pipeline.hget(_member_key(namespace, member_id), "name", encoding="utf-8")
+        names = await pipeline.execute()
+
+    return [
+        {"completion_time": int(completion_time), "member_name": name or f"Anonymous #{member_id}"}
+        for (member_id, completion_time), name in zip(results, names)
+    ]
+
+
+async def get_daily_stats() -> dict[str, dict[str, int]]:
+    """Get the number of participants that completed each star of each day of the event."""
+    with await _caches.leaderboard_cache._get_pool_connection() as connection:
+        namespace = _caches.leaderboard_cache.namespace
+        pipeline = connection.pipeline()
+        for day in DAYS:
+            for star in STARS:
+                pipeline.zcard(_day_and_star_key(namespace, str(day), star))
+        counts = iter(await pipeline.execute())
+
+    return {str(day): {"star_one": next(counts), "star_two": next(counts)} for day in DAYS}
+
+
+async def remove_legacy_keys(cached_leaderboard: dict) -> bool:
+    """
+    Remove the JSON blobs used to store the per day and star data before structured storage.
+
+    Return True if any legacy keys were found. As the blobs don't contain the
+    participant IDs used as sorted set members, they can't be converted in place;
+    instead, the caller should fetch the leaderboard again to populate the
+    structured storage.
+    """
+    legacy_keys = [key for key in LEGACY_CACHE_KEYS if key in cached_leaderboard]
+    if not legacy_keys:
+        return False
+
+    log.info(f"Removing legacy leaderboard cache keys: {', '.join(legacy_keys)}")
+    for key in legacy_keys:
+        await _caches.leaderboard_cache.delete(key)
+        del cached_leaderboard[key]
+
+    return True
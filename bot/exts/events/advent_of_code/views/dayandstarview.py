@@ -2,21 +2,22 @@ from datetime import datetime
 
 import discord
 
+from bot.exts.events.advent_of_code import _storage
+
 AOC_DAY_AND_STAR_TEMPLATE = "{rank: >4} | {name:25.25} | {completion_time: >10}"
 
 
 class AoCDropdownView(discord.ui.View):
     """Interactive view to filter AoC stats by Day and Star."""
 
-    def __init__(self, original_author: discord.Member, day_and_star_data: dict[str: dict], maximum_scorers: int):
+    def __init__(self, original_author: discord.Member, maximum_scorers: int):
         super().__init__()
         self.day = 0
         self.star = 0
-        self.data = day_and_star_data
         self.maximum_scorers = maximum_scorers
         self.original_author = original_author
 
-    def generate_output(self) -> str:
+    async def generate_output(self) -> str:
         """Generates a formatted codeblock with AoC statistics based on the currently selected day and star."""
         header = AOC_DAY_AND_STAR_TEMPLATE.format(
             rank="Rank",
@@ -24,7 +25,8 @@ class AoCDropdownView(discord.ui.View):
         )
         lines = [f"{header}\n{'-' * (len(header) + 2)}"]
 
-        for rank, scorer in enumerate(self.data[f"{self.day}-{self.star}"][:self.maximum_scorers]):
+        scorers = await _storage.get_day_and_star_results(self.day, self.star, self.maximum_scorers)
+        for rank, scorer in enumerate(scorers):
             time_data = datetime.fromtimestamp(scorer['completion_time']).strftime("%I:%M:%S %p")
             lines.append(AOC_DAY_AND_STAR_TEMPLATE.format(
                 datastamp="",
@@ -66,6 +68,6 @@ class AoCDropdownView(discord.ui.View):
                 ephemeral=True
             )
         else:
-            await interaction.response.edit_message(content=self.generate_output())
+            await interaction.response.edit_message(content=await self.generate_output())
             self.day = 0
             self.star = 0
@@ -7,7 +7,7 @@ import discord
 from discord.ext import commands
 
 from bot.bot import Bot
-from bot.constants import Month, Tokens
+from bot.constants import Month
 from bot.utils.decorators import in_month
 
 log = logging.getLogger(__name__)
@@ -18,8 +18,6 @@ REQUEST_HEADERS = {
     "User-Agent": "Python Discord Hacktoberbot",
     "Accept": "application / vnd.github.v3 + json"
 }
-if GITHUB_TOKEN := Tokens.github:
-    REQUEST_HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
 
 
 class HacktoberIssues(commands.Cog):
@@ -71,29 +69,29 @@ class HacktoberIssues(commands.Cog):
                 url += f"&page={page}"
 
         log.debug(f"making api request to url: {url}")
-        async with self.bot.http_session.get(url, headers=REQUEST_HEADERS) as response:
-            if response.status != 200:
-                log.error(f"expected 200 status (got {response.status}) by the GitHub api.")
-                await ctx.send(
-                    f"ERROR: expected 200 status (got {response.status}) by the GitHub api.\n"
-                    f"{await response.text()}"
-                )
-                return None
-            data = await response.json()
-
-            if len(data["items"]) == 0:
-                log.error(f"no issues returned by GitHub API, with url: {response.url}")
-                await ctx.send(f"ERROR: no issues returned by GitHub API, with url: {response.url}")
-                return None
-
-            if option == "beginner":
-                self.cache_beginner = data
-                self.cache_timer_beginner = ctx.message.created_at.replace(tzinfo=None)
-            else:
-                self.cache_normal = data
-                self.cache_timer_normal = ctx.message.created_at.replace(tzinfo=None)
-
-            return data
+        response = await self.bot.github_client.get(url, headers=REQUEST_HEADERS)
+        if response.status != 200:
+            log.error(f"expected 200 status (got {response.status}) by the GitHub api.")
+            await ctx.send(
+                f"ERROR: expected 200 status (got {response.status}) by the GitHub api.\n"
+                f"{response.text()}"
+            )
+            return None
+        data = response.json()
+
+        if len(data["items"]) == 0:
+            log.error(f"no issues returned by GitHub API, with url: {response.url}")
+            await ctx.send(f"ERROR: no issues returned by GitHub API, with url: {response.url}")
+            return None
+
+        if option == "beginner":
+            self.cache_beginner = data
+            self.cache_timer_beginner = ctx.message.created_at.replace(tzinfo=None)
+        else:
+            self.cache_normal = data
+            self.cache_timer_normal = ctx.message.created_at.replace(tzinfo=None)
+
+        return data
 
     @staticmethod
     def format_embed(issue: dict) -> discord.Embed:
@@ -1,17 +1,20 @@
+import asyncio
+import json
 import logging
+import math
 import random
 import re
+import time
 from collections import Counter
 from datetime import datetime, timedelta
 from typing import Optional, Union
-from urllib.parse import quote_plus
 
 import discord
 from async_rediscache import RedisCache
 from discord.ext import commands
 
 from bot.bot import Bot
-from bot.constants import Colours, Month, NEGATIVE_REPLIES, Tokens
+from bot.constants import Colours, Month, NEGATIVE_REPLIES
 from bot.utils.decorators import in_month
 
 log = logging.getLogger(__name__)
@@ -20,12 +23,16 @@ CURRENT_YEAR = datetime.now().year  # Used to construct GH API query
 PRS_FOR_SHIRT = 4  # Minimum number of PRs before a shirt is awarded
 REVIEW_DAYS = 14  # number of days needed after PR can be mature
 
+SEARCH_PAGE_SIZE = 100  # The maximum GitHub allows
+MAX_SEARCH_PAGES = 10  # GitHub only returns the first 1000 search results
+MAX_CONCURRENT_REQUESTS = 5  # Per invocation, while evaluating PRs
+SNAPSHOT_REFRESH_AGE = 10 * 60  # Seconds after which a user's stats are refreshed in the background
+# Seconds after their last update at which the topic and snapshot caches expire, well after the event is over
+CACHE_EXPIRY = 60 * 24 * 60 * 60
+
 REQUEST_HEADERS = {"User-Agent": "Python Discord Hacktoberbot"}
 # using repo topics API during preview period requires an accept header
 GITHUB_TOPICS_ACCEPT_HEADER = {"Accept": "application/vnd.github.mercy-preview+json"}
-if GITHUB_TOKEN := Tokens.github:
-    REQUEST_HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
-    GITHUB_TOPICS_ACCEPT_HEADER["Authorization"] = f"token {GITHUB_TOKEN}"
 
 GITHUB_NONEXISTENT_USER_MESSAGE = (
     "The listed users cannot be searched either because the users do not exist "
@@ -38,10 +45,18 @@ class HacktoberStats(commands.Cog):
 
     # Stores mapping of user IDs and GitHub usernames
     linked_accounts = RedisCache()
+    # Stores mapping of "year:repo shortname" to whether the repo has the 'hacktoberfest' topic, for all users
+    repo_topics = RedisCache()
+    # Stores mapping of "year:GitHub username" to a JSON snapshot of their stats
+    stats_snapshots = RedisCache()
 
     def __init__(self, bot: Bot):
         self.bot = bot
 
+        # In-flight topic lookups and snapshot refreshes, so they're never done twice at once
+        self.topic_lookups: dict[str, asyncio.Task] = {}
+        self.snapshot_refreshes: dict[str, asyncio.Task] = {}
+
     @in_month(Month.SEPTEMBER, Month.OCTOBER, Month.NOVEMBER)
     @commands.group(name="hacktoberstats", aliases=("hackstats",), invoke_without_command=True)
     async def hacktoberstats_group(self, ctx: commands.Context, github_username: str = None) -> None:
@@ -67,6 +82,9 @@ class HacktoberStats(commands.Cog):
                 await ctx.send(msg)
                 return
 
+            await self.get_stats(ctx, github_username, use_snapshot=True)
+            return
+
         await self.get_stats(ctx, github_username)
 
     @in_month(Month.SEPTEMBER, Month.OCTOBER, Month.NOVEMBER)
@@ -106,7 +124,7 @@ class HacktoberStats(commands.Cog):
             await ctx.send(f"{author_mention}, you do not currently have a linked GitHub account")
             logging.info(f"{author_id} tried to unlink their GitHub account but no account was linked")
 
-    async def get_stats(self, ctx: commands.Context, github_username: str) -> None:
+    async def get_stats(self, ctx: commands.Context, github_username: str, use_snapshot: bool = False) -> None:
         """
         Query GitHub's API for PRs created by a GitHub user during the month of October.
 
@@ -116,33 +134,128 @@ class HacktoberStats(commands.Cog):
         'hacktoberfest' topic, unless the PR is labelled 'hacktoberfest-accepted' for it
         to count.
 
+        If `use_snapshot` is True, the last snapshot of the user's stats is used if there
+        is one, and it's refreshed in the background once it's older than SNAPSHOT_REFRESH_AGE.
+
         If a valid github_username is provided, an embed is generated and posted to the channel
 
         Otherwise, post a helpful error message
         """
         async with ctx.typing():
-            prs = await self.get_october_prs(github_username)
-
-            if prs is None:  # Will be None if the user was not found
-                await ctx.send(
-                    embed=discord.Embed(
-                        title=random.choice(NEGATIVE_REPLIES),
-                        description=f"GitHub user `{github_username}` was not found.",
-                        colour=discord.Colour.red()
+            snapshot = await self._get_snapshot(github_username) if use_snapshot else None
+
+            if snapshot is not None:
+                in_review, accepted, fetched_at = snapshot
+                if time.time() - fetched_at > SNAPSHOT_REFRESH_AGE:
+                    self._refresh_snapshot_in_background(github_username)
+            else:
+                stats = await self.get_categorized_prs(github_username)
+                if stats is None:  # Will be None if the user was not found
+                    await ctx.send(
+                        embed=discord.Embed(
+                            title=random.choice(NEGATIVE_REPLIES),
+                            description=f"GitHub user `{github_username}` was not found.",
+                            colour=discord.Colour.red()
+                        )
                     )
-                )
-                return
+                    return
+
+                in_review, accepted = stats
+                fetched_at = time.time()
+                if use_snapshot:
+                    await self._store_snapshot(github_username, in_review, accepted, fetched_at)
 
-            if prs:
-                stats_embed = await self.build_embed(github_username, prs)
+            if in_review or accepted:
+                stats_embed = self.build_embed(github_username, in_review, accepted, fetched_at)
                 await ctx.send("Here are some stats!", embed=stats_embed)
             else:
                 await ctx.send(f"No valid Hacktoberfest PRs found for '{github_username}'")
 
-    async def build_embed(self, github_username: str, prs: list[dict]) -> discord.Embed:
-        """Return a stats embed built from github_username's PRs."""
+    async def get_categorized_prs(self, github_username: str) -> Optional[tuple[list[dict], list[dict]]]:
+        """
+        Get the October PRs of github_username, categorized into 'in_review' and 'accepted'.
+
+        None will be returned when the GitHub user was not found.
+        """
+        prs = await self.get_october_prs(github_username)
+        if prs is None:
+            return None
+        return await self._categorize_prs(prs)
+
+    @staticmethod
+    def _serialize_prs(prs: list[dict]) -> list[dict]:
+        """Make the PR information dicts JSON serializable."""
+        return [pr | {"created_at": pr["created_at"].isoformat()} for pr in prs]
+
+    @staticmethod
+    def _deserialize_prs(prs: list[dict]) -> list[dict]:
+        """Restore PR information dicts that were made JSON serializable."""
+        return [pr | {"created_at": datetime.fromisoformat(pr["created_at"])} for pr in prs]
+
+    @staticmethod
+    def _snapshot_key(github_username: str) -> str:
+        """Get the key of the snapshot of the user's stats for this year's event."""
+        return f"{CURRENT_YEAR}:{github_username.casefold()}"
+
+    @staticmethod
+    async def _refresh_expiry(cache: RedisCache) -> None:
+        """
+        Make `cache` expire `CACHE_EXPIRY` seconds from now.
+
+        The whole cache expires at once, so the entries of past events don't pile up in Redis.
+        """
+        with await cache._get_pool_connection() as connection:
+            await connection.expire(cache.namespace, CACHE_EXPIRY)
+
+    async def _get_snapshot(self, github_username: str) -> Optional[tuple[list[dict], list[dict], float]]:
+        """Get the PRs that were in review and accepted in the last snapshot of the user's stats, and its time."""
+        snapshot = await self.stats_snapshots.get(self._snapshot_key(github_username))
+        if snapshot is None:
+            return None
+
+        snapshot = json.loads(snapshot)
+        return (
+            self._deserialize_prs(snapshot["in_review"]),
+            self._deserialize_prs(snapshot["accepted"]),
+            snapshot["fetched_at"],
+        )
+
+    async def _store_snapshot(
+        self, github_username: str, in_review: list[dict], accepted: list[dict], fetched_at: float
+    ) -> None:
+        """Store a snapshot of the user's stats."""
+        snapshot = {
+            "in_review": self._serialize_prs(in_review),
+            "accepted": self._serialize_prs(accepted),
+            "fetched_at": fetched_at,
+        }
+        await self.stats_snapshots.set(self._snapshot_key(github_username), json.dumps(snapshot))
+        await self._refresh_expiry(self.stats_snapshots)
+
+    def _refresh_snapshot_in_background(self, github_username: str) -> None:
+        """Start refreshing the snapshot of the user's stats, unless it's already being refreshed."""
+        key = github_username.casefold()
+        if key in self.snapshot_refreshes:
+            return
+
+        async def refresh() -> None:
+            try:
+                stats = await self.get_categorized_prs(github_username)
+                if stats is not None:
+                    await self._store_snapshot(github_username, *stats, time.time())
+            except Exception:
+                log.exception(f"Failed to refresh the Hacktoberfest stats of '{github_username}'")
+
+        log.info(f"Refreshing Hacktoberfest stats snapshot of GitHub user '{github_username}'")
+        task = self.bot.loop.create_task(refresh())
+        task.add_done_callback(lambda _: self.snapshot_refreshes.pop(key, None))
+        self.snapshot_refreshes[key] = task
+
+    def build_embed(
+        self, github_username: str, in_review: list[dict], accepted: list[dict], fetched_at: float
+    ) -> discord.Embed:
+        """Return a stats embed built from github_username's categorized PRs."""
         logging.info(f"Building Hacktoberfest embed for GitHub user: '{github_username}'")
-        in_review, accepted = await self._categorize_prs(prs)
 
         n = len(accepted) + len(in_review)  # Total number of PRs
         if n >= PRS_FOR_SHIRT:
@@ -160,8 +273,10 @@ class HacktoberStats(commands.Cog):
                 f"{self._contributionator(n)} in "
                 f"October\n\n"
                 f"{shirtstr}\n\n"
-            )
+            ),
+            timestamp=datetime.utcfromtimestamp(fetched_at)
         )
+        stats_embed.set_footer(text="Last updated")
 
         stats_embed.set_thumbnail(url=f"https://www.github.com/{github_username}.png")
         stats_embed.set_author(
@@ -214,19 +329,19 @@ class HacktoberStats(commands.Cog):
         is_query = "public"
         not_query = "draft"
         date_range = f"{CURRENT_YEAR}-09-30T10:00Z..{CURRENT_YEAR}-11-01T12:00Z"
-        per_page = "300"
-        query_params = (
-            f"+type:{action_type}"
-            f"+is:{is_query}"
-            f"+author:{quote_plus(github_username)}"
-            f"+-is:{not_query}"
-            f"+created:{date_range}"
-            f"&per_page={per_page}"
+        query = (
+            f"type:{action_type}"
+            f" is:{is_query}"
+            f" author:{github_username}"
+            f" -is:{not_query}"
+            f" created:{date_range}"
         )
 
-        log.debug(f"GitHub query parameters generated: {query_params}")
+        log.debug(f"GitHub search query generated: {query}")
 
-        jsonresp = await self._fetch_url(base_url, REQUEST_HEADERS, {"q": query_params})
+        limiter = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        params = {"q": query, "per_page": SEARCH_PAGE_SIZE}
+        jsonresp = await self._fetch_url(base_url, REQUEST_HEADERS, params | {"page": 1}, limiter)
         if "message" in jsonresp:
             # One of the parameters is invalid, short circuit for now
             api_message = jsonresp["errors"][0]["message"]
@@ -244,62 +359,100 @@ class HacktoberStats(commands.Cog):
             log.info(f"No October PRs found for GitHub user: '{github_username}'")
             return []
 
-        logging.info(f"Found {len(jsonresp['items'])} Hacktoberfest PRs for GitHub user: '{github_username}'")
-        outlist = []  # list of pr information dicts that will get returned
+        # Fetch the rest of the pages at once, now that the number of results is known
+        page_count = min(math.ceil(jsonresp["total_count"] / SEARCH_PAGE_SIZE), MAX_SEARCH_PAGES)
+        other_pages = await asyncio.gather(*(
+            self._fetch_url(base_url, REQUEST_HEADERS, params | {"page": page}, limiter)
+            for page in range(2, page_count + 1)
+        ))
+        items = jsonresp["items"] + [item for page in other_pages for item in page.get("items", [])]
+
+        logging.info(f"Found {len(items)} Hacktoberfest PRs for GitHub user: '{github_username}'")
         oct3 = datetime(int(CURRENT_YEAR), 10, 3, 23, 59, 59, tzinfo=None)
-        hackto_topics = {}  # cache whether each repo has the appropriate topic (bool values)
-        for item in jsonresp["items"]:
-            shortname = self._get_shortname(item["repository_url"])
-            itemdict = {
-                "repo_url": f"https://www.github.com/{shortname}",
-                "repo_shortname": shortname,
-                "created_at": datetime.strptime(
-                    item["created_at"], "%Y-%m-%dT%H:%M:%SZ"
-                ),
-                "number": item["number"]
-            }
-
-            # If the PR has 'invalid' or 'spam' labels, the PR must be
-            # either merged or approved for it to be included
-            if self._has_label(item, ["invalid", "spam"]):
-                if not await self._is_accepted(itemdict):
-                    continue
-
-            # PRs before oct 3 no need to check for topics
-            # continue the loop if 'hacktoberfest-accepted' is labelled then
-            # there is no need to check for its topics
-            if itemdict["created_at"] < oct3:
-                outlist.append(itemdict)
-                continue
-
-            # Checking PR's labels for "hacktoberfest-accepted"
-            if self._has_label(item, "hacktoberfest-accepted"):
-                outlist.append(itemdict)
-                continue
-
-            # No need to query GitHub if repo topics are fetched before already
-            if hackto_topics.get(shortname):
-                outlist.append(itemdict)
-                continue
-            # Fetch topics for the PR's repo
-            topics_query_url = f"https://api.github.com/repos/{shortname}/topics"
-            log.debug(f"Fetching repo topics for {shortname} with url: {topics_query_url}")
-            jsonresp2 = await self._fetch_url(topics_query_url, GITHUB_TOPICS_ACCEPT_HEADER)
-            if jsonresp2.get("names") is None:
-                log.error(f"Error fetching topics for {shortname}: {jsonresp2['message']}")
-                continue  # Assume the repo doesn't have the `hacktoberfest` topic if API  request errored
-
-            # PRs after oct 3 that doesn't have 'hacktoberfest-accepted' label
-            # must be in repo with 'hacktoberfest' topic
-            if "hacktoberfest" in jsonresp2["names"]:
-                hackto_topics[shortname] = True  # Cache result in the dict for later use if needed
-                outlist.append(itemdict)
-        return outlist
-
-    async def _fetch_url(self, url: str, headers: dict, params: dict) -> dict:
-        """Retrieve API response from URL."""
-        async with self.bot.http_session.get(url, headers=headers, params=params) as resp:
-            return await resp.json()
+        results = await asyncio.gather(*(self._evaluate_pr(item, oct3, limiter) for item in items))
+        return [itemdict for itemdict in results if itemdict is not None]
+
+    async def _evaluate_pr(self, item: dict, oct3: datetime, limiter: asyncio.Semaphore) -> Optional[dict]:
+        """Get the basic information of the PR in the search result `item`, or None if it doesn't count."""
+        shortname = self._get_shortname(item["repository_url"])
+        itemdict = {
+            "repo_url": f"https://www.github.com/{shortname}",
+            "repo_shortname": shortname,
+            "created_at": datetime.strptime(
+                item["created_at"], "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "number": item["number"]
+        }
+
+        # If the PR has 'invalid' or 'spam' labels, the PR must be
+        # either merged or approved for it to be included
+        if self._has_label(item, ["invalid", "spam"]):
+            if not await self._is_accepted(itemdict, limiter):
+                return None
+
+        # PRs before oct 3 no need to check for topics
+        # return the PR if 'hacktoberfest-accepted' is labelled then
+        # there is no need to check for its topics
+        if itemdict["created_at"] < oct3:
+            return itemdict
+
+        # Checking PR's labels for "hacktoberfest-accepted"
+        if self._has_label(item, "hacktoberfest-accepted"):
+            return itemdict
+
+        # PRs after oct 3 that doesn't have 'hacktoberfest-accepted' label
+        # must be in repo with 'hacktoberfest' topic
+        if await self._has_hacktoberfest_topic(shortname, limiter):
+            return itemdict
+        return None
+
+    async def _has_hacktoberfest_topic(self, shortname: str, limiter: asyncio.Semaphore) -> bool:
+        """
+        Check whether the repo has the 'hacktoberfest' topic.
+
+        Results are cached for all users for the rest of the event, and concurrent
+        lookups of the same repo share a single request.
+        """
+        cache_key = f"{CURRENT_YEAR}:{shortname}"
+        has_topic = await self.repo_topics.get(cache_key)
+        if has_topic is not None:
+            return has_topic
+
+        if cache_key not in self.topic_lookups:
+            task = asyncio.create_task(self._fetch_hacktoberfest_topic(shortname, limiter))
+            task.add_done_callback(lambda _: self.topic_lookups.pop(cache_key, None))
+            self.topic_lookups[cache_key] = task
+
+        return await asyncio.shield(self.topic_lookups[cache_key])
+
+    async def _fetch_hacktoberfest_topic(self, shortname: str, limiter: asyncio.Semaphore) -> bool:
+        """Fetch the topics of the repo, and cache whether it has the 'hacktoberfest' topic."""
+        topics_query_url = f"https://api.github.com/repos/{shortname}/topics"
+        log.debug(f"Fetching repo topics for {shortname} with url: {topics_query_url}")
+        jsonresp = await self._fetch_url(topics_query_url, GITHUB_TOPICS_ACCEPT_HEADER, limiter=limiter)
+        if jsonresp.get("names") is None:
+            log.error(f"Error fetching topics for {shortname}: {jsonresp['message']}")
+            return False  # Assume the repo doesn't have the `hacktoberfest` topic if API request errored
+
+        has_topic = "hacktoberfest" in jsonresp["names"]
+        await self.repo_topics.set(f"{CURRENT_YEAR}:{shortname}", has_topic)
+        await self._refresh_expiry(self.repo_topics)
+        return has_topic
+
+    async def _fetch_url(
+        self,
+        url: str,
+        headers: dict,
+        params: Optional[dict] = None,
+        limiter: Optional[asyncio.Semaphore] = None
+    ) -> Union[dict, list]:
+        """Retrieve API response from URL, waiting for a free slot of `limiter` first if given."""
+        if limiter is None:
+            response = await self.bot.github_client.get(url, headers=headers, params=params)
+        else:
+            async with limiter:
+                response = await self.bot.github_client.get(url, headers=headers, params=params)
+        return response.json()
 
     @staticmethod
     def _has_label(pr: dict, labels: Union[list[str], str]) -> bool:
@@ -318,11 +471,11 @@ class HacktoberStats(commands.Cog):
                 return True
         return False
 
-    async def _is_accepted(self, pr: dict) -> bool:
+    async def _is_accepted(self, pr: dict, limiter: Optional[asyncio.Semaphore] = None) -> bool:
         """Check if a PR is merged, approved, or labelled hacktoberfest-accepted."""
         # checking for merge status
         query_url = f"https://api.github.com/repos/{pr['repo_shortname']}/pulls/{pr['number']}"
-        jsonresp = await self._fetch_url(query_url, REQUEST_HEADERS)
+        jsonresp = await self._fetch_url(query_url, REQUEST_HEADERS, limiter=limiter)
 
         if message := jsonresp.get("message"):
             log.error(f"Error fetching PR stats for #{pr['number']} in repo {pr['repo_shortname']}:\n{message}")
@@ -337,7 +490,7 @@ class HacktoberStats(commands.Cog):
 
         # checking approval
         query_url += "/reviews"
-        jsonresp2 = await self._fetch_url(query_url, REQUEST_HEADERS)
+        jsonresp2 = await self._fetch_url(query_url, REQUEST_HEADERS, limiter=limiter)
         if isinstance(jsonresp2, dict):
             # if API request is unsuccessful it will be a dict with the error in 'message'
             log.error(
@@ -351,7 +504,7 @@ class HacktoberStats(commands.Cog):
 
         # loop through reviews and check for approval
         for item in jsonresp2:
-            if item.get("status") == "APPROVED":
+            if item.get("state") == "APPROVED":
                 return True
         return False
 
@@ -380,14 +533,16 @@ class HacktoberStats(commands.Cog):
         """
         now = datetime.now()
         oct3 = datetime(CURRENT_YEAR, 10, 3, 23, 59, 59, tzinfo=None)
-        in_review = []
-        accepted = []
-        for pr in prs:
-            if (pr["created_at"] + timedelta(REVIEW_DAYS)) > now:
-                in_review.append(pr)
-            elif (pr["created_at"] <= oct3) or await self._is_accepted(pr):
-                accepted.append(pr)
+        in_review = [pr for pr in prs if (pr["created_at"] + timedelta(REVIEW_DAYS)) > now]
+        mature = [pr for pr in prs if (pr["created_at"] + timedelta(REVIEW_DAYS)) <= now]
+
+        # Only check the PRs that need it, all at once
+        limiter = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        needs_check = [pr for pr in mature if pr["created_at"] > oct3]
+        checks = await asyncio.gather(*(self._is_accepted(pr, limiter) for pr in needs_check))
+        rejected = [pr for pr, is_accepted in zip(needs_check, checks) if not is_accepted]
 
+        accepted = [pr for pr in mature if pr not in rejected]
         return in_review, accepted
 
     @staticmethod
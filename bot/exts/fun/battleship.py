@@ -243,7 +243,12 @@ class Game:
         await self.next.user.send("Their turn", delete_after=3.0)
         while True:
             try:
-                await self.bot.wait_for("message", check=self.predicate, timeout=60.0)
+                await self.bot.waiters.wait_for(
+                    "message",
+                    channel_id=turn_message.channel.id,
+                    check=self.predicate,
+                    timeout=60.0
+                )
             except asyncio.TimeoutError:
                 await self.turn.user.send("You took too long. Game over!")
                 await self.next.user.send(f"{self.turn.user} took too long. Game over!")
@@ -396,8 +401,10 @@ class Battleship(commands.Cog):
         await announcement.add_reaction(CROSS_EMOJI)
 
         try:
-            reaction, user = await self.bot.wait_for(
+            reaction, user = await self.bot.waiters.wait_for(
                 "reaction_add",
+                channel_id=announcement.channel.id,
+                message_id=announcement.id,
                 check=partial(self.predicate, ctx, announcement),
                 timeout=60.0
             )
@@ -129,7 +129,13 @@ class Game:
         player_num = 1 if self.player_active == self.player1 else 2
         while True:
             try:
-                reaction, user = await self.bot.wait_for("reaction_add", check=self.predicate, timeout=30.0)
+                reaction, user = await self.bot.waiters.wait_for(
+                    "reaction_add",
+                    channel_id=self.message.channel.id,
+                    message_id=self.message.id,
+                    check=self.predicate,
+                    timeout=30.0
+                )
             except asyncio.TimeoutError:
                 await self.channel.send(f"{self.player_active.mention}, you took too long. Game over!")
                 return
@@ -399,8 +405,10 @@ class ConnectFour(commands.Cog):
         await announcement.add_reaction(CROSS_EMOJI)
 
         try:
-            reaction, user = await self.bot.wait_for(
+            reaction, user = await self.bot.waiters.wait_for(
                 "reaction_add",
+                channel_id=announcement.channel.id,
+                message_id=announcement.id,
                 check=partial(self.get_player, ctx, announcement),
                 timeout=60.0
             )
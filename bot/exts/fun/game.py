@@ -1,4 +1,5 @@
-import difflib
+import hashlib
+import json
 import logging
 import random
 import re
@@ -8,6 +9,7 @@ from enum import IntEnum
 from typing import Any, Optional
 
 from aiohttp import ClientSession
+from async_rediscache import RedisCache
 from discord import Embed
 from discord.ext import tasks
 from discord.ext.commands import Cog, Context, group
@@ -17,6 +19,7 @@ from bot.constants import STAFF_ROLES, Tokens
 from bot.utils.decorators import with_role
 from bot.utils.extensions import invoke_help_command
 from bot.utils.pagination import ImagePaginator, LinePaginator
+from bot.utils.search_index import SearchIndex
 
 # Base URL of IGDB API
 BASE_URL = "https://api.igdb.com/v4"
@@ -41,8 +44,17 @@ BASE_HEADERS = {
     "Accept": "application/json"
 }
 
+# Responses to the same request body are cached for this long
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # Seconds
+
+# Suggested genres must score at least this, out of 100, against the invalid genre
+MIN_SUGGESTION_SCORE = 60
+
 logger = logging.getLogger(__name__)
 
+# Responses are stored in keys under the namespace of this cache, so they can expire individually
+response_cache = RedisCache(namespace="igdb_responses")
+
 REGEX_NON_ALPHABET = re.compile(r"[^a-z0-9]", re.IGNORECASE)
 
 # ---------
@@ -154,6 +166,12 @@ class Games(Cog):
         self.genres: dict[str, int] = {}
         self.headers = BASE_HEADERS
 
+        # The names of the genres and their words, indexed with the genres they belong to
+        self.genre_index = SearchIndex(())
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         self.bot.loop.create_task(self.renew_access_token())
 
     async def renew_access_token(self) -> None:
@@ -209,11 +227,46 @@ class Games(Cog):
         self.refresh_genres_task.cancel()
         logger.info("Successfully stopped Genres Refreshing task.")
 
+    @property
+    def cache_hit_rate(self) -> float:
+        """The fraction of IGDB requests that were served from the cache."""
+        requests = self.cache_hits + self.cache_misses
+        return self.cache_hits / requests if requests else 0.0
+
+    async def igdb_post(self, endpoint: str, body: str, cache_ttl: int = RESPONSE_CACHE_TTL) -> Any:
+        """
+        Make a query to `endpoint` of the IGDB API and return the JSON response.
+
+        Successful responses are cached in Redis for `cache_ttl` seconds, by the hash of the endpoint and the body.
+        """
+        request_hash = hashlib.sha256(f"{endpoint}\n{body}".encode()).hexdigest()
+        key = f"{response_cache.namespace}:{request_hash}"
+
+        with await response_cache._get_pool_connection() as connection:
+            cached = await connection.get(key, encoding="utf-8")
+        if cached is not None:
+            self.cache_hits += 1
+            return json.loads(cached)
+
+        self.cache_misses += 1
+        response = await self.bot.api_client.post(
+            f"{BASE_URL}/{endpoint}",
+            data=body,
+            headers=self.headers,
+            # Queries don't have side effects, so they're safe to retry
+            retries=self.bot.api_client.max_retries,
+        )
+        if response.ok and cache_ttl:
+            with await response_cache._get_pool_connection() as connection:
+                await connection.set(key, response.text(), expire=cache_ttl)
+
+        logger.trace(f"IGDB response cache hit rate: {self.cache_hit_rate:.0%}")
+        return response.json()
+
     async def _get_genres(self) -> None:
         """Create genres variable for games command."""
         body = "fields name; limit 100;"
-        async with self.http_session.post(f"{BASE_URL}/genres", data=body, headers=self.headers) as resp:
-            result = await resp.json()
+        result = await self.igdb_post("genres", body, cache_ttl=0)
         genres = {genre["name"].capitalize(): genre["id"] for genre in result}
 
         # Replace complex names with names from ALIASES
@@ -224,6 +277,12 @@ class Games(Cog):
             else:
                 self.genres[genre_name] = genre
 
+        self.genre_index = SearchIndex(
+            (name, genre)
+            for genre in self.genres
+            for name in {genre, *(word for word in REGEX_NON_ALPHABET.split(genre) if word)}
+        )
+
     @group(name="games", aliases=("game",), invoke_without_command=True)
     async def games(self, ctx: Context, amount: Optional[int] = 5, *, genre: Optional[str]) -> None:
         """
@@ -362,8 +421,7 @@ class Games(Cog):
         body = GAMES_LIST_BODY.format(**params)
 
         # Do request to IGDB API, create headers, URL, define body, return result
-        async with self.http_session.post(url=f"{BASE_URL}/games", data=body, headers=self.headers) as resp:
-            return await resp.json()
+        return await self.igdb_post("games", body)
 
     async def create_page(self, data: dict[str, Any]) -> tuple[str, str]:
         """Create content of Game Page."""
@@ -406,8 +464,7 @@ class Games(Cog):
         # Define request body of IGDB API request and do request
         body = SEARCH_BODY.format(**{"term": search_term})
 
-        async with self.http_session.post(url=f"{BASE_URL}/games", data=body, headers=self.headers) as resp:
-            data = await resp.json()
+        data = await self.igdb_post("games", body)
 
         # Loop over games, format them to good format, make line and append this to total lines
         for game in data:
@@ -435,8 +492,7 @@ class Games(Cog):
             "offset": offset
         })
 
-        async with self.http_session.post(url=f"{BASE_URL}/companies", data=body, headers=self.headers) as resp:
-            return await resp.json()
+        return await self.igdb_post("companies", body)
 
     async def create_company_page(self, data: dict[str, Any]) -> tuple[str, str]:
         """Create good formatted Game Company page."""
@@ -464,13 +520,12 @@ class Games(Cog):
 
     async def get_best_results(self, query: str) -> list[tuple[float, str]]:
         """Get best match result of genre when original genre is invalid."""
-        results = []
-        for genre in self.genres:
-            ratios = [difflib.SequenceMatcher(None, query, genre).ratio()]
-            for word in REGEX_NON_ALPHABET.split(genre):
-                ratios.append(difflib.SequenceMatcher(None, query, word).ratio())
-            results.append((round(max(ratios), 2), genre))
-        return sorted((item for item in results if item[0] >= 0.60), reverse=True)[:4]
+        ratios = {}
+        # Matches come best first, so the first match of a genre is its best
+        for match in self.genre_index.fuzzy(query, score_cutoff=MIN_SUGGESTION_SCORE):
+            ratios.setdefault(match.value, round(match.score / 100, 2))
+
+        return sorted(((ratio, genre) for genre, ratio in ratios.items()), reverse=True)[:4]
 
 
 def setup(bot: Bot) -> None:
@@ -109,8 +109,9 @@ class Hangman(commands.Cog):
             await original_message.edit(embed=self.create_embed(tries, user_guess))
 
             try:
-                message = await self.bot.wait_for(
-                    event="message",
+                message = await self.bot.waiters.wait_for(
+                    "message",
+                    channel_id=ctx.channel.id,
                     timeout=60.0,
                     check=check
                 )
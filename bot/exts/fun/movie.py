@@ -1,9 +1,13 @@
+import asyncio
+import hashlib
+import json
 import logging
 import random
 from enum import Enum
 from typing import Any
 
-from aiohttp import ClientSession
+import aiohttp
+from async_rediscache import RedisCache
 from discord import Embed
 from discord.ext.commands import Cog, Context, group
 
@@ -13,10 +17,23 @@ from bot.utils.extensions import invoke_help_command
 from bot.utils.pagination import ImagePaginator
 
 # Define base URL of TMDB
-BASE_URL = "https://api.themoviedb.org/3/"
+TMDB_HOST = "api.themoviedb.org"
+BASE_URL = f"https://{TMDB_HOST}/3/"
+
+# TMDB doesn't serve discover pages past this one
+MAX_DISCOVER_PAGE = 500
+# The number of requests that are made to TMDB at once, when fetching the movies of a page
+MAX_CONCURRENT_REQUESTS = 5
+
+# Discover pages are sorted by popularity, which changes over the day, while movie details rarely change
+DISCOVER_CACHE_TTL = 6 * 60 * 60  # Seconds
+MOVIE_CACHE_TTL = 24 * 60 * 60  # Seconds
 
 logger = logging.getLogger(__name__)
 
+# Responses are stored in keys under the namespace of this cache, so they can expire individually
+response_cache = RedisCache(namespace="tmdb_responses")
+
 # Define movie params, that will be used for every movie request
 MOVIE_PARAMS = {
     "api_key": Tokens.tmdb,
@@ -50,7 +67,8 @@ class Movie(Cog):
     """Movie Cog contains movies command that grab random movies from TMDB."""
 
     def __init__(self, bot: Bot):
-        self.http_session: ClientSession = bot.http_session
+        self.bot = bot
+        self.bot.api_client.set_host_limit(TMDB_HOST, MAX_CONCURRENT_REQUESTS)
 
     @group(name="movies", aliases=("movie",), invoke_without_command=True)
     async def movies(self, ctx: Context, genre: str = "", amount: int = 5) -> None:
@@ -71,7 +89,7 @@ class Movie(Cog):
         # Capitalize genre for getting data from Enum, get random page, send help when genre don't exist.
         genre = genre.capitalize()
         try:
-            result = await self.get_movies_data(self.http_session, MovieGenres[genre].value, 1)
+            result = await self.get_movies_data(MovieGenres[genre].value, 1)
         except KeyError:
             await invoke_help_command(ctx)
             return
@@ -84,20 +102,22 @@ class Movie(Cog):
             )
             await ctx.send(err_msg)
             logger.warning(err_msg)
+            return
 
         # Get random page. Max page is last page where is movies with this genre.
-        page = random.randint(1, result["total_pages"])
+        page = random.randint(1, min(result["total_pages"], MAX_DISCOVER_PAGE))
 
         # Get movies list from TMDB, check if results key in result. When not, raise error.
-        movies = await self.get_movies_data(self.http_session, MovieGenres[genre].value, page)
+        movies = await self.get_movies_data(MovieGenres[genre].value, page)
         if "results" not in movies:
-            err_msg = f"There is problem while making TMDB API request. Response Code: {result['status_code']}, " \
-                      f"{result['status_message']}."
+            err_msg = f"There is problem while making TMDB API request. Response Code: {movies['status_code']}, " \
+                      f"{movies['status_message']}."
             await ctx.send(err_msg)
             logger.warning(err_msg)
+            return
 
-        # Get all pages and embed
-        pages = await self.get_pages(self.http_session, movies, amount)
+        # Start loading all pages, the paginator shows each of them once it's loaded
+        pages = self.get_pages(movies, amount)
         embed = await self.get_embed(genre)
 
         await ImagePaginator.paginate(pages, ctx, embed)
@@ -107,7 +127,28 @@ class Movie(Cog):
         """Show all currently available genres for .movies command."""
         await ctx.send(f"Current available genres: {', '.join('`' + genre.name + '`' for genre in MovieGenres)}")
 
-    async def get_movies_data(self, client: ClientSession, genre_id: str, page: int) -> list[dict[str, Any]]:
+    async def tmdb_get(self, endpoint: str, params: dict[str, Any], cache_ttl: int) -> dict[str, Any]:
+        """
+        Make a GET request to `endpoint` of the TMDB API and return the JSON response.
+
+        Successful responses are cached in Redis for `cache_ttl` seconds.
+        """
+        request = json.dumps([endpoint, sorted((key, str(value)) for key, value in params.items() if key != "api_key")])
+        key = f"{response_cache.namespace}:{hashlib.sha256(request.encode()).hexdigest()}"
+
+        with await response_cache._get_pool_connection() as connection:
+            cached = await connection.get(key, encoding="utf-8")
+        if cached is not None:
+            return json.loads(cached)
+
+        response = await self.bot.api_client.get(BASE_URL + endpoint, params=params)
+        if response.ok:
+            with await response_cache._get_pool_connection() as connection:
+                await connection.set(key, response.text(), expire=cache_ttl)
+
+        return response.json()
+
+    async def get_movies_data(self, genre_id: str, page: int) -> dict[str, Any]:
         """Return JSON of TMDB discover request."""
         # Define params of request
         params = {
@@ -120,33 +161,40 @@ class Movie(Cog):
             "with_genres": genre_id
         }
 
-        url = BASE_URL + "discover/movie"
-
         # Make discover request to TMDB, return result
-        async with client.get(url, params=params) as resp:
-            return await resp.json()
+        return await self.tmdb_get("discover/movie", params, DISCOVER_CACHE_TTL)
 
-    async def get_pages(self, client: ClientSession, movies: dict[str, Any], amount: int) -> list[tuple[str, str]]:
-        """Fetch all movie pages from movies dictionary. Return list of pages."""
-        pages = []
+    def get_pages(self, movies: dict[str, Any], amount: int) -> list[asyncio.Task]:
+        """
+        Start fetching the movie pages from movies dictionary. Return list of tasks of the pages.
 
-        for i in range(amount):
-            movie_id = movies["results"][i]["id"]
-            movie = await self.get_movie(client, movie_id)
+        The movies are fetched concurrently, up to the request limit of TMDB.
+        """
+        return [
+            asyncio.create_task(self.get_movie_page(movie["id"]))
+            for movie in movies["results"][:amount]
+        ]
 
-            page, img = await self.create_page(movie)
-            pages.append((page, img))
+    async def get_movie_page(self, movie_id: int) -> tuple[str, str]:
+        """
+        Fetch the movie with `movie_id` and create its page.
 
-        return pages
+        The page is only loaded once the paginator is already shown, so if the movie
+        can't be fetched, a page saying so is returned instead of raising an error.
+        """
+        try:
+            movie = await self.get_movie(movie_id)
+            return await self.create_page(movie)
+        except (KeyError, TypeError, ValueError, aiohttp.ClientError, asyncio.TimeoutError):
+            logger.warning(f"Failed to load the page of TMDB movie {movie_id}.", exc_info=True)
+            return "Sorry, this movie couldn't be loaded. Please try again later.", ""
 
-    async def get_movie(self, client: ClientSession, movie: int) -> dict[str, Any]:
+    async def get_movie(self, movie: int) -> dict[str, Any]:
         """Get Movie by movie ID from TMDB. Return result dictionary."""
         if not isinstance(movie, int):
             raise ValueError("Error while fetching movie from TMDB, movie argument must be integer. ")
-        url = BASE_URL + f"movie/{movie}"
 
-        async with client.get(url, params=MOVIE_PARAMS) as resp:
-            return await resp.json()
+        return await self.tmdb_get(f"movie/{movie}", MOVIE_PARAMS, MOVIE_CACHE_TTL)
 
     async def create_page(self, movie: dict[str, Any]) -> tuple[str, str]:
         """Create page from TMDB movie request result. Return formatted page + image."""
@@ -1,7 +1,6 @@
 import json
 import logging
 import random
-from collections.abc import Iterable
 
 import discord
 from discord.ext.commands import Context, Converter
@@ -9,15 +8,23 @@ from rapidfuzz import fuzz
 
 from bot.exts.fun.snakes._utils import SNAKE_RESOURCES
 from bot.utils import disambiguate
+from bot.utils.search_index import SearchIndex
 
 log = logging.getLogger(__name__)
 
 
+def _snake_name_score(name: str, snake: str, **kwargs) -> float:
+    """Score `name` against the name of `snake` by how similar they are, or how well `name` matches part of it."""
+    return max(fuzz.ratio(name, snake, **kwargs), fuzz.partial_ratio(name, snake, **kwargs))
+
+
 class Snake(Converter):
     """Snake converter for the Snakes Cog."""
 
     snakes = None
     special_cases = None
+    # The common and scientific names of the snakes, indexed with their scientific names
+    name_index = None
 
     async def convert(self, ctx: Context, name: str) -> str:
         """Convert the input snake name to the closest matching Snake object."""
@@ -27,36 +34,26 @@ class Snake(Converter):
         if name == "python":
             return "Python (programming language)"
 
-        def get_potential(iterable: Iterable, *, threshold: int = 80) -> list[str]:
-            nonlocal name
-            potential = []
-
-            for item in iterable:
-                original, item = item, item.lower()
-
-                if name == item:
-                    return [original]
-
-                a, b = fuzz.ratio(name, item), fuzz.partial_ratio(name, item)
-                if a >= threshold or b >= threshold:
-                    potential.append(original)
+        def get_potential(*, threshold: int = 80) -> list[str]:
+            if exact_matches := self.name_index.exact(name):
+                return [exact_matches[0].key]
 
-            return potential
+            matches = self.name_index.fuzzy(name, scorer=_snake_name_score, score_cutoff=threshold)
+            # The same name can be indexed for more than one snake
+            return list(dict.fromkeys(match.key for match in matches))
 
         # Handle special cases
         if name.lower() in self.special_cases:
             return self.special_cases.get(name.lower(), name.lower())
 
-        names = {snake["name"]: snake["scientific"] for snake in self.snakes}
-        all_names = names.keys() | names.values()
-        timeout = len(all_names) * (3 / 4)
+        timeout = len(self.name_index) * (3 / 4)
 
         embed = discord.Embed(
             title="Found multiple choices. Please choose the correct one.", colour=0x59982F)
         embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.display_avatar.url)
 
-        name = await disambiguate(ctx, get_potential(all_names), timeout=timeout, embed=embed)
-        return names.get(name, name)
+        name = await disambiguate(ctx, get_potential(), timeout=timeout, embed=embed)
+        return next((match.value for match in self.name_index.exact(name)), name)
 
     @classmethod
     async def build_list(cls) -> None:
@@ -64,6 +61,9 @@ class Snake(Converter):
         # Get all the snakes
         if cls.snakes is None:
             cls.snakes = json.loads((SNAKE_RESOURCES / "snake_names.json").read_text("utf8"))
+            cls.name_index = SearchIndex(
+                (name, snake["scientific"]) for snake in cls.snakes for name in {snake["name"], snake["scientific"]}
+            )
         # Get the special cases
         if cls.special_cases is None:
             special_cases = json.loads((SNAKE_RESOURCES / "special_snakes.json").read_text("utf8"))
@@ -1,18 +1,21 @@
 import asyncio
 import colorsys
+import json
 import logging
 import os
 import random
 import re
 import string
 import textwrap
+import time
 import urllib
-from functools import partial
 from io import BytesIO
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
+import aiohttp
 import async_timeout
 from PIL import Image, ImageDraw, ImageFont
+from async_rediscache import RedisCache
 from discord import Colour, Embed, File, Member, Message, Reaction
 from discord.errors import HTTPException
 from discord.ext.commands import Cog, CommandError, Context, bot_has_permissions, group
@@ -23,6 +26,7 @@ from bot.exts.fun.snakes import _utils as utils
 from bot.exts.fun.snakes._converter import Snake
 from bot.utils.decorators import locked
 from bot.utils.extensions import invoke_help_command
+from bot.utils.image_worker import image_workers, queue_notifier
 
 log = logging.getLogger(__name__)
 
@@ -92,6 +96,10 @@ MSG_MAX = 100
 
 # get_snek constants
 URL = "https://en.wikipedia.org/w/api.php?"
+SNAKE_INFO_CACHE_TTL = 7 * 24 * 60 * 60  # Seconds
+# The number of most looked up snakes to prefetch when the cog is loaded, 0 to disable
+SNAKE_INFO_WARM_UP_COUNT = 25
+SNAKE_INFO_WARM_UP_DELAY = 1  # Seconds between prefetches, to go easy on Wikipedia
 
 # snake guess responses
 INCORRECT_GUESS = (
@@ -146,6 +154,12 @@ class Snakes(Cog):
     wiki_brief = re.compile(r"(.*?)(=+ (.*?) =+)", flags=re.DOTALL)
     valid_image_extensions = ("gif", "png", "jpeg", "jpg", "webp")
 
+    # Maps lowercase snake names to the JSON serialized Wikipedia data of the snake
+    # and the timestamp it was fetched at
+    snake_info_cache = RedisCache()
+    # Maps lowercase snake names to the number of times they were looked up
+    snake_lookup_counts = RedisCache()
+
     def __init__(self, bot: Bot):
         self.active_sal = {}
         self.bot = bot
@@ -155,6 +169,14 @@ class Snakes(Cog):
         self.snake_facts = utils.get_resource("snake_facts")
         self.num_movie_pages = None
 
+        # In-flight Wikipedia lookups, so concurrent lookups of the same snake share a single fetch
+        self.snake_info_lookups: dict[str, asyncio.Task] = {}
+        self.warm_up_task = self.bot.loop.create_task(self._warm_up_snake_info_cache())
+
+    def cog_unload(self) -> None:
+        """Cancel the snake info cache warm-up when the cog is unloaded."""
+        self.warm_up_task.cancel()
+
     # region: Helper methods
     @staticmethod
     def _beautiful_pastel(hue: float) -> int:
@@ -281,8 +303,8 @@ class Snakes(Cog):
             params = {}
 
         async with async_timeout.timeout(10):
-            async with self.bot.http_session.get(url, params=params) as response:
-                return await response.json()
+            response = await self.bot.api_client.get(url, params=params)
+            return response.json()
 
     def _get_random_long_message(self, messages: list[str], retries: int = 10) -> str:
         """
@@ -299,11 +321,88 @@ class Snakes(Cog):
 
         return long_message
 
-    async def _get_snek(self, name: str) -> dict[str, Any]:
+    async def _get_snek(self, name: str) -> Optional[dict[str, Any]]:
+        """
+        Gets all the data from a wikipedia article about a snake.
+
+        Builds a dict that the .get() method can use. The data is cached for `SNAKE_INFO_CACHE_TTL`.
+        """
+        if await self.snake_lookup_counts.contains(name.lower()):
+            await self.snake_lookup_counts.increment(name.lower())
+        else:
+            await self.snake_lookup_counts.set(name.lower(), 1)
+        snake_info = await self._lookup_snek(name)
+
+        if snake_info is None:
+            return None
+        return {**snake_info, "name": name}
+
+    async def _get_cached_snek(self, name: str) -> tuple[Optional[dict[str, Any]], bool]:
+        """Get the cached data of the snake, if any, and whether it's still fresh."""
+        cached = await self.snake_info_cache.get(name.lower())
+        if cached is None:
+            return None, False
+
+        cached = json.loads(cached)
+        return cached["snake_info"], time.time() - cached["fetched_at"] < SNAKE_INFO_CACHE_TTL
+
+    async def _lookup_snek(self, name: str) -> Optional[dict[str, Any]]:
         """
-        Fetches all the data from a wikipedia article about a snake.
+        Get the data of the snake from the cache, or from Wikipedia if it isn't cached or has expired.
+
+        If Wikipedia can't be reached, expired data is used instead if there is any.
+        """
+        snake_info, fresh = await self._get_cached_snek(name)
+        if fresh:
+            log.trace(f"Using cached Wikipedia data for snake {name!r}.")
+            return snake_info
+
+        key = name.lower()
+        if key not in self.snake_info_lookups:
+            task = asyncio.create_task(self._fetch_snek(name))
+            task.add_done_callback(lambda _: self.snake_info_lookups.pop(key, None))
+            self.snake_info_lookups[key] = task
 
-        Builds a dict that the .get() method can use.
+        try:
+            # Shielded so that cancelling one of the lookups doesn't cancel the fetch for the others
+            fetched_info = await asyncio.shield(self.snake_info_lookups[key])
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if snake_info is None:
+                raise
+            log.warning(f"Failed to fetch Wikipedia data for snake {name!r}, using expired data instead.")
+            return snake_info
+
+        return fetched_info
+
+    async def _warm_up_snake_info_cache(self) -> None:
+        """Prefetch the data of the most looked up snakes that don't have fresh data in the cache."""
+        if not SNAKE_INFO_WARM_UP_COUNT:
+            return
+
+        await self.bot.wait_until_guild_available()
+
+        lookup_counts = await self.snake_lookup_counts.to_dict()
+        most_looked_up = sorted(lookup_counts, key=lookup_counts.get, reverse=True)[:SNAKE_INFO_WARM_UP_COUNT]
+
+        prefetched = 0
+        for name in most_looked_up:
+            _snake_info, fresh = await self._get_cached_snek(name)
+            if fresh:
+                continue
+
+            try:
+                await self._lookup_snek(name)
+            except Exception:
+                log.exception(f"Failed to prefetch Wikipedia data for snake {name!r}.")
+            else:
+                prefetched += 1
+            await asyncio.sleep(SNAKE_INFO_WARM_UP_DELAY)
+
+        log.info(f"Prefetched Wikipedia data for {prefetched} snakes.")
+
+    async def _fetch_snek(self, name: str) -> Optional[dict[str, Any]]:
+        """
+        Fetches all the data from a wikipedia article about a snake and caches it.
 
         Created by Ava and eivl.
         """
@@ -318,11 +417,11 @@ class Snakes(Cog):
             "srlimit": "1",
         }
 
-        json = await self._fetch(URL, params=params)
+        response = await self._fetch(URL, params=params)
 
         # Wikipedia does have a error page
         try:
-            pageid = json["query"]["search"][0]["pageid"]
+            pageid = response["query"]["search"][0]["pageid"]
         except KeyError:
             # Wikipedia error page ID(?)
             pageid = 41118
@@ -339,15 +438,15 @@ class Snakes(Cog):
             "pageids": pageid
         }
 
-        json = await self._fetch(URL, params=params)
+        response = await self._fetch(URL, params=params)
 
         # Constructing dict - handle exceptions later
         try:
-            snake_info["title"] = json["query"]["pages"][f"{pageid}"]["title"]
-            snake_info["extract"] = json["query"]["pages"][f"{pageid}"]["extract"]
-            snake_info["images"] = json["query"]["pages"][f"{pageid}"]["images"]
-            snake_info["fullurl"] = json["query"]["pages"][f"{pageid}"]["fullurl"]
-            snake_info["pageid"] = json["query"]["pages"][f"{pageid}"]["pageid"]
+            snake_info["title"] = response["query"]["pages"][f"{pageid}"]["title"]
+            snake_info["extract"] = response["query"]["pages"][f"{pageid}"]["extract"]
+            snake_info["images"] = response["query"]["pages"][f"{pageid}"]["images"]
+            snake_info["fullurl"] = response["query"]["pages"][f"{pageid}"]["fullurl"]
+            snake_info["pageid"] = response["query"]["pages"][f"{pageid}"]["pageid"]
         except KeyError:
             snake_info["error"] = True
 
@@ -399,6 +498,11 @@ class Snakes(Cog):
 
         snake_info["info"] = info
 
+        if not snake_info.get("error"):
+            await self.snake_info_cache.set(
+                name.lower(), json.dumps({"snake_info": snake_info, "fetched_at": time.time()})
+            )
+
         return snake_info
 
     async def _get_snake_name(self) -> dict[str, str]:
@@ -420,7 +524,13 @@ class Snakes(Cog):
 
         # Validate the answer
         try:
-            reaction, user = await ctx.bot.wait_for("reaction_add", timeout=45.0, check=predicate)
+            reaction, user = await ctx.bot.waiters.wait_for(
+                "reaction_add",
+                channel_id=message.channel.id,
+                message_id=message.id,
+                timeout=45.0,
+                check=predicate
+            )
         except asyncio.TimeoutError:
             await ctx.send(f"You took too long. The correct answer was **{options[answer]}**.")
             await message.clear_reactions()
@@ -513,8 +623,13 @@ class Snakes(Cog):
         # Begin main game loop
         while not win and antidote_tries < 10:
             try:
-                reaction, user = await ctx.bot.wait_for(
-                    "reaction_add", timeout=300, check=predicate)
+                reaction, user = await ctx.bot.waiters.wait_for(
+                    "reaction_add",
+                    channel_id=board_id.channel.id,
+                    message_id=board_id.id,
+                    timeout=300,
+                    check=predicate
+                )
             except asyncio.TimeoutError:
                 log.debug("Antidote timed out waiting for a reaction")
                 break  # We're done, no reactions for the last 5 minutes
@@ -592,10 +707,12 @@ class Snakes(Cog):
         await board_id.clear_reactions()
 
     @snakes_group.command(name="draw")
-    async def draw_command(self, ctx: Context) -> None:
+    async def draw_command(self, ctx: Context, style: Optional[Literal["animated"]] = None) -> None:
         """
         Draws a random snek using Perlin noise.
 
+        Use `.snakes draw animated` to make the snek wiggle!
+
         Written by Momo and kel.
         Modified by juan and lemon.
         """
@@ -615,6 +732,22 @@ class Snakes(Cog):
 
             # Build and send the snek
             text = random.choice(self.snake_idioms)["idiom"]
+
+            if style == "animated":
+                gif_bytes = await image_workers.run(
+                    utils.render_snek_animation,
+                    width,
+                    length,
+                    snek_color,
+                    bg_color,
+                    text,
+                    text_color,
+                    user_id=ctx.author.id,
+                    on_queued=queue_notifier(ctx),
+                )
+                await ctx.send(file=File(gif_bytes, filename="snek.gif"))
+                return
+
             factory = utils.PerlinNoiseFactory(dimension=1, octaves=2)
             image_frame = utils.create_snek_frame(
                 factory,
@@ -768,7 +901,7 @@ class Snakes(Cog):
         page = random.randint(1, self.num_movie_pages or 8)
 
         async with ctx.typing():
-            response = await self.bot.http_session.get(
+            response = await self.bot.api_client.get(
                 "https://api.themoviedb.org/3/search/movie",
                 params={
                     "query": "snake",
@@ -777,19 +910,19 @@ class Snakes(Cog):
                     "api_key": Tokens.tmdb,
                 }
             )
-            data = await response.json()
+            data = response.json()
             if self.num_movie_pages is None:
                 self.num_movie_pages = data["total_pages"]
             movie = random.choice(data["results"])["id"]
 
-            response = await self.bot.http_session.get(
+            response = await self.bot.api_client.get(
                 f"https://api.themoviedb.org/3/movie/{movie}",
                 params={
                     "language": "en-US",
                     "api_key": Tokens.tmdb,
                 }
             )
-            data = await response.json()
+            data = response.json()
 
         embed = Embed(title=data["title"], color=SNAKE_COLOR)
 
@@ -1005,15 +1138,17 @@ class Snakes(Cog):
         # Make the card
         async with ctx.typing():
 
-            stream = BytesIO()
             async with async_timeout.timeout(10):
-                async with self.bot.http_session.get(content["image_list"][0]) as response:
-                    stream.write(await response.read())
-
-            stream.seek(0)
-
-            func = partial(self._generate_card, stream, content)
-            final_buffer = await self.bot.loop.run_in_executor(None, func)
+                response = await self.bot.api_client.get(content["image_list"][0])
+            stream = BytesIO(response.body)
+
+            final_buffer = await image_workers.run(
+                self._generate_card,
+                stream,
+                content,
+                user_id=ctx.author.id,
+                on_queued=queue_notifier(ctx),
+            )
 
         # Send it!
         await ctx.send(
@@ -1090,7 +1225,7 @@ class Snakes(Cog):
 
         # Build the URL and make the request
         url = "https://www.googleapis.com/youtube/v3/search"
-        response = await self.bot.http_session.get(
+        response = await self.bot.api_client.get(
             url,
             params={
                 "part": "snippet",
@@ -1099,7 +1234,7 @@ class Snakes(Cog):
                 "key": Tokens.youtube
             }
         )
-        response = await response.json()
+        response = response.json()
         data = response.get("items", [])
 
         # Send the user a video
@@ -6,13 +6,19 @@ import math
 import random
 from itertools import product
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
 from PIL import Image
 from PIL.ImageDraw import ImageDraw
 from discord import File, Member, Reaction
 from discord.ext.commands import Cog, Context
+from numpy.typing import ArrayLike
 
 from bot.constants import Roles
+from bot.utils.exceptions import ImageQueueFullError
+from bot.utils.image_assets import image_assets
+from bot.utils.image_worker import image_workers
 
 SNAKE_RESOURCES = Path("bot/resources/fun/snakes").absolute()
 
@@ -104,7 +110,9 @@ DEFAULT_IMAGE_DIMENSIONS = (200, 200)
 DEFAULT_SNAKE_LENGTH = 22
 DEFAULT_SNAKE_WIDTH = 8
 DEFAULT_SEGMENT_LENGTH_RANGE = (7, 10)
-DEFAULT_IMAGE_MARGINS = (50, 50)
+DEFAULT_FRAME_COUNT = 30
+DEFAULT_FRAME_SHIFT = 0.02
+DEFAULT_FRAME_DURATION = 60
 DEFAULT_TEXT = "snek\nit\nup"
 DEFAULT_TEXT_POSITION = (
     10,
@@ -114,6 +122,7 @@ DEFAULT_TEXT_COLOR = 0xf2ea15
 X = 0
 Y = 1
 ANGLE_RANGE = math.pi * 2
+GRADIENT_TABLE_SIZE = 256
 
 
 def get_resource(file: str) -> list[dict]:
@@ -137,9 +146,13 @@ class PerlinNoiseFactory(object):
 
     The underlying grid is aligned with the integers.
 
-    There is no limit to the coordinates used; new gradients are generated on the fly as necessary.
+    Gradients are picked from a table of `GRADIENT_TABLE_SIZE` random gradients through a random
+    permutation of the grid coordinates, so the noise repeats every `GRADIENT_TABLE_SIZE` units.
 
-    Taken from: https://gist.github.com/eevee/26f547457522755cb1fb8739d0ea89a1
+    Noise is computed with NumPy for whole arrays of points at once with `plain_noise` and `noise`;
+    `get_plain_noise` and calling the factory are shortcuts for a single point.
+
+    Adapted from: https://gist.github.com/eevee/26f547457522755cb1fb8739d0ea89a1
     Licensed under ISC
     """
 
@@ -169,93 +182,118 @@ class PerlinNoiseFactory(object):
         # by this to scale to ±1
         self.scale_factor = 2 * dimension ** -0.5
 
-        self.gradient = {}
+        # Seed from `random`, so that seeding it still makes the noise reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+        self.permutation = rng.permutation(GRADIENT_TABLE_SIZE)
+        self.gradients = self._generate_gradients(rng)
+
+        # The offsets of the corners of a grid cell, ordered like product() so
+        # that the last dimension alternates: (..., 0), (..., 1), etc.
+        self._corners = np.array(list(product((0, 1), repeat=dimension)))
 
-    def _generate_gradient(self) -> tuple[float, ...]:
+    def _generate_gradients(self, rng: np.random.Generator) -> np.ndarray:
         """
-        Generate a random unit vector at each grid point.
+        Generate a table of random unit vectors to be used as the gradients at the grid points.
 
         This is the "gradient" vector, in that the grid tile slopes towards it
         """
         # 1 dimension is special, since the only unit vector is trivial;
         # instead, use a slope between -1 and 1
         if self.dimension == 1:
-            return (random.uniform(-1, 1),)
+            return rng.uniform(-1, 1, (GRADIENT_TABLE_SIZE, 1))
 
-        # Generate a random point on the surface of the unit n-hypersphere;
-        # this is the same as a random unit vector in n dimensions.  Thanks
+        # Generate random points on the surface of the unit n-hypersphere;
+        # this is the same as random unit vectors in n dimensions.  Thanks
         # to: http://mathworld.wolfram.com/SpherePointPicking.html
         # Pick n normal random variables with stddev 1
-        random_point = [random.gauss(0, 1) for _ in range(self.dimension)]
-        # Then scale the result to a unit vector
-        scale = sum(n * n for n in random_point) ** -0.5
-        return tuple(coord * scale for coord in random_point)
+        random_points = rng.normal(0, 1, (GRADIENT_TABLE_SIZE, self.dimension))
+        # Then scale the results to unit vectors
+        return random_points / np.linalg.norm(random_points, axis=1, keepdims=True)
 
-    def get_plain_noise(self, *point) -> float:
-        """Get plain noise for a single point, without taking into account either octaves or tiling."""
-        if len(point) != self.dimension:
+    def _as_points(self, points: ArrayLike) -> np.ndarray:
+        """
+        Convert `points` into an array of shape (..., dimension).
+
+        In one dimension, a flat array of coordinates is also accepted.
+        """
+        points = np.asarray(points, dtype=float)
+        if self.dimension == 1 and (points.ndim == 0 or points.shape[-1] != 1):
+            points = points[..., np.newaxis]
+
+        if points.shape[-1] != self.dimension:
             raise ValueError(
-                f"Expected {self.dimension} values, got {len(point)}"
+                f"Expected {self.dimension} values, got {points.shape[-1]}"
             )
+        return points
+
+    def _gradient_indices(self, grid_points: np.ndarray) -> np.ndarray:
+        """Hash the integer coordinates of the grid points into indices of the gradient table."""
+        indices = np.zeros(grid_points.shape[:-1], dtype=np.int64)
+        for dim in range(self.dimension):
+            indices = self.permutation[(indices + grid_points[..., dim]) % GRADIENT_TABLE_SIZE]
+        return indices
 
-        # Build a list of the (min, max) bounds in each dimension
-        grid_coords = []
-        for coord in point:
-            min_coord = math.floor(coord)
-            max_coord = min_coord + 1
-            grid_coords.append((min_coord, max_coord))
+    def _plain_noise(self, points: np.ndarray, periods: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Get plain noise for an array of points of shape (n, dimension).
+
+        If `periods` is given, grid points are wrapped around in every dimension with a nonzero period.
+        """
+        min_coords = np.floor(points)
+        offsets = points - min_coords
+
+        # The grid points at the corners of each point's cell, shaped (n, corners, dimension)
+        grid_points = min_coords.astype(np.int64)[:, np.newaxis, :] + self._corners
+        if periods is not None and periods.any():
+            wrapped = grid_points % np.where(periods, periods, 1)
+            grid_points = np.where(periods.astype(bool), wrapped, grid_points)
 
         # Compute the dot product of each gradient vector and the point's
         # distance from the corresponding grid point.  This gives you each
         # gradient's "influence" on the chosen point.
-        dots = []
-        for grid_point in product(*grid_coords):
-            if grid_point not in self.gradient:
-                self.gradient[grid_point] = self._generate_gradient()
-            gradient = self.gradient[grid_point]
-
-            dot = 0
-            for i in range(self.dimension):
-                dot += gradient[i] * (point[i] - grid_point[i])
-            dots.append(dot)
+        gradients = self.gradients[self._gradient_indices(grid_points)]
+        dots = np.einsum("ncd,ncd->nc", gradients, offsets[:, np.newaxis, :] - self._corners)
 
         # Interpolate all those dot products together.  The interpolation is
         # done with smoothstep to smooth out the slope as you pass from one
         # grid cell into the next.
-        # Due to the way product() works, dot products are ordered such that
-        # the last dimension alternates: (..., min), (..., max), etc.  So we
-        # can interpolate adjacent pairs to "collapse" that last dimension.  Then
-        # the results will alternate in their second-to-last dimension, and so
-        # forth, until we only have a single value left.
-        dim = self.dimension
-        while len(dots) > 1:
-            dim -= 1
-            s = smoothstep(point[dim] - grid_coords[dim][0])
+        # The corners are ordered such that the last dimension alternates, so
+        # we can interpolate adjacent pairs to "collapse" that last dimension.
+        # Then the results will alternate in their second-to-last dimension,
+        # and so forth, until we only have a single value left.
+        for dim in reversed(range(self.dimension)):
+            s = smoothstep(offsets[:, dim])[:, np.newaxis]
+            dots = lerp(s, dots[:, 0::2], dots[:, 1::2])
 
-            next_dots = []
-            while dots:
-                next_dots.append(lerp(s, dots.pop(0), dots.pop(0)))
+        return dots[:, 0] * self.scale_factor
 
-            dots = next_dots
+    def plain_noise(self, points: ArrayLike) -> np.ndarray:
+        """
+        Get plain noise for an array of points, without taking into account either octaves or tiling.
 
-        return dots[0] * self.scale_factor
+        `points` should have a shape of (..., dimension); the result has a shape of (...).
+        """
+        points = self._as_points(points)
+        flat_points = points.reshape(-1, self.dimension)
+        return self._plain_noise(flat_points).reshape(points.shape[:-1])
 
-    def __call__(self, *point) -> float:
+    def noise(self, points: ArrayLike) -> np.ndarray:
         """
-        Get the value of this Perlin noise function at the given point.
+        Get the value of this Perlin noise function for an array of points.
 
-        The number of values given should match the number of dimensions.
+        `points` should have a shape of (..., dimension); the result has a shape of (...).
         """
-        ret = 0
+        points = self._as_points(points)
+        flat_points = points.reshape(-1, self.dimension)
+        tile = np.array(self.tile[:self.dimension])
+
+        ret = np.zeros(len(flat_points))
         for o in range(self.octaves):
             o2 = 1 << o
-            new_point = []
-            for i, coord in enumerate(point):
-                coord *= o2
-                if self.tile[i]:
-                    coord %= self.tile[i] * o2
-                new_point.append(coord)
-            ret += self.get_plain_noise(*new_point) / o2
+            periods = tile * o2
+            octave_points = flat_points * o2
+            octave_points = np.where(periods.astype(bool), octave_points % np.where(periods, periods, 1), octave_points)
+            ret += self._plain_noise(octave_points, periods) / o2
 
         # Need to scale n back down since adding all those extra octaves has
         # probably expanded it beyond ±1
@@ -276,13 +314,67 @@ class PerlinNoiseFactory(object):
                 r = smoothstep(r)
             ret = r * 2 - 1
 
-        return ret
+        return ret.reshape(points.shape[:-1])
+
+    def get_plain_noise(self, *point) -> float:
+        """Get plain noise for a single point, without taking into account either octaves or tiling."""
+        if len(point) != self.dimension:
+            raise ValueError(
+                f"Expected {self.dimension} values, got {len(point)}"
+            )
+        return float(self.plain_noise(point))
+
+    def __call__(self, *point) -> float:
+        """
+        Get the value of this Perlin noise function at the given point.
+
+        The number of values given should match the number of dimensions.
+        """
+        if len(point) != self.dimension:
+            raise ValueError(
+                f"Expected {self.dimension} values, got {len(point)}"
+            )
+        return float(self.noise(point))
+
+
+def _snek_points(
+        angles: np.ndarray, segment_lengths: np.ndarray, image_dimensions: tuple[int, int]
+) -> list[tuple[float, float]]:
+    """Get the points of a snek with the given segment angles and lengths, centered in the image."""
+    steps = np.column_stack((segment_lengths * np.cos(angles), segment_lengths * np.sin(angles)))
+    points = np.vstack((np.zeros((1, 2)), np.cumsum(steps, axis=0)))
+
+    # shift towards middle
+    min_dimensions = points.min(axis=0)
+    max_dimensions = points.max(axis=0)
+    points += np.array(image_dimensions) / 2 - (min_dimensions + max_dimensions) / 2
+
+    return [tuple(point) for point in points.tolist()]
+
+
+def _draw_snek(
+        points: list[tuple[float, float]], image_dimensions: tuple[int, int],
+        snake_color: int, bg_color: int, snake_width: int,
+        text: Optional[str], text_position: tuple[float, float], text_color: int
+) -> Image.Image:
+    """Draw a snek going through `points`."""
+    image = Image.new(mode="RGB", size=image_dimensions, color=bg_color)
+    draw = ImageDraw(image)
+    draw.line(points, width=snake_width, fill=snake_color)
+    if text is not None:
+        draw.multiline_text(text_position, text, fill=text_color)
+    del draw
+    return image
+
+
+def _segment_lookups(snake_length: int) -> np.ndarray:
+    """Get the Perlin noise lookup coordinates of each segment of a snek, before any vertical shift."""
+    return np.arange(1, snake_length + 1) / (snake_length + 1)
 
 
 def create_snek_frame(
         perlin_factory: PerlinNoiseFactory, perlin_lookup_vertical_shift: float = 0,
         image_dimensions: tuple[int, int] = DEFAULT_IMAGE_DIMENSIONS,
-        image_margins: tuple[int, int] = DEFAULT_IMAGE_MARGINS,
         snake_length: int = DEFAULT_SNAKE_LENGTH,
         snake_color: int = DEFAULT_SNAKE_COLOR, bg_color: int = DEFAULT_BACKGROUND_COLOR,
         segment_length_range: tuple[int, int] = DEFAULT_SEGMENT_LENGTH_RANGE, snake_width: int = DEFAULT_SNAKE_WIDTH,
@@ -295,56 +387,41 @@ def create_snek_frame(
     `perlin_lookup_vertical_shift` represents the Perlin noise shift in the Y-dimension for this frame.
     If `text` is given, display the given text with the snek.
     """
-    start_x = random.randint(image_margins[X], image_dimensions[X] - image_margins[X])
-    start_y = random.randint(image_margins[Y], image_dimensions[Y] - image_margins[Y])
-    points: list[tuple[float, float]] = [(start_x, start_y)]
-
-    for index in range(0, snake_length):
-        angle = perlin_factory.get_plain_noise(
-            ((1 / (snake_length + 1)) * (index + 1)) + perlin_lookup_vertical_shift
-        ) * ANGLE_RANGE
-        current_point = points[index]
-        segment_length = random.randint(segment_length_range[0], segment_length_range[1])
-        points.append((
-            current_point[X] + segment_length * math.cos(angle),
-            current_point[Y] + segment_length * math.sin(angle)
-        ))
-
-    # normalize bounds
-    min_dimensions: list[float] = [start_x, start_y]
-    max_dimensions: list[float] = [start_x, start_y]
-    for point in points:
-        min_dimensions[X] = min(point[X], min_dimensions[X])
-        min_dimensions[Y] = min(point[Y], min_dimensions[Y])
-        max_dimensions[X] = max(point[X], max_dimensions[X])
-        max_dimensions[Y] = max(point[Y], max_dimensions[Y])
+    angles = perlin_factory.plain_noise(_segment_lookups(snake_length) + perlin_lookup_vertical_shift) * ANGLE_RANGE
+    segment_lengths = np.array([random.randint(*segment_length_range) for _ in range(snake_length)])
 
-    # shift towards middle
-    dimension_range = (max_dimensions[X] - min_dimensions[X], max_dimensions[Y] - min_dimensions[Y])
-    shift = (
-        image_dimensions[X] / 2 - (dimension_range[X] / 2 + min_dimensions[X]),
-        image_dimensions[Y] / 2 - (dimension_range[Y] / 2 + min_dimensions[Y])
-    )
+    points = _snek_points(angles, segment_lengths, image_dimensions)
+    return _draw_snek(points, image_dimensions, snake_color, bg_color, snake_width, text, text_position, text_color)
 
-    image = Image.new(mode="RGB", size=image_dimensions, color=bg_color)
-    draw = ImageDraw(image)
-    for index in range(1, len(points)):
-        point = points[index]
-        previous = points[index - 1]
-        draw.line(
-            (
-                shift[X] + previous[X],
-                shift[Y] + previous[Y],
-                shift[X] + point[X],
-                shift[Y] + point[Y]
-            ),
-            width=snake_width,
-            fill=snake_color
+
+def create_snek_animation(
+        perlin_factory: PerlinNoiseFactory, frame_count: int = DEFAULT_FRAME_COUNT,
+        frame_shift: float = DEFAULT_FRAME_SHIFT,
+        image_dimensions: tuple[int, int] = DEFAULT_IMAGE_DIMENSIONS,
+        snake_length: int = DEFAULT_SNAKE_LENGTH,
+        snake_color: int = DEFAULT_SNAKE_COLOR, bg_color: int = DEFAULT_BACKGROUND_COLOR,
+        segment_length_range: tuple[int, int] = DEFAULT_SEGMENT_LENGTH_RANGE, snake_width: int = DEFAULT_SNAKE_WIDTH,
+        text: str = DEFAULT_TEXT, text_position: tuple[float, float] = DEFAULT_TEXT_POSITION,
+        text_color: int = DEFAULT_TEXT_COLOR
+) -> list[Image.Image]:
+    """
+    Creates the frames of a random wiggling snek using Perlin noise.
+
+    Every frame shifts the Perlin noise lookup by `frame_shift` in the Y-dimension,
+    and the noise for the segments of all frames is computed at once.
+    """
+    frame_shifts = np.arange(frame_count)[:, np.newaxis] * frame_shift
+    angles = perlin_factory.plain_noise(_segment_lookups(snake_length) + frame_shifts) * ANGLE_RANGE
+    # The segments keep their length throughout the animation, so that the snek only wiggles
+    segment_lengths = np.array([random.randint(*segment_length_range) for _ in range(snake_length)])
+
+    return [
+        _draw_snek(
+            _snek_points(frame_angles, segment_lengths, image_dimensions), image_dimensions,
+            snake_color, bg_color, snake_width, text, text_position, text_color
         )
-    if text is not None:
-        draw.multiline_text(text_position, text, fill=text_color)
-    del draw
-    return image
+        for frame_angles in angles
+    ]
 
 
 def frame_to_png_bytes(image: Image) -> io.BytesIO:
@@ -355,6 +432,42 @@ def frame_to_png_bytes(image: Image) -> io.BytesIO:
     return stream
 
 
+def frames_to_gif_bytes(frames: list[Image.Image], frame_duration: int = DEFAULT_FRAME_DURATION) -> io.BytesIO:
+    """Convert frames to a looping GIF byte stream, showing every frame for `frame_duration` milliseconds."""
+    stream = io.BytesIO()
+    frames[0].save(
+        stream, format="GIF", save_all=True, append_images=frames[1:], duration=frame_duration, loop=0
+    )
+    stream.seek(0)
+    return stream
+
+
+def render_snek_animation(
+        snake_width: int, snake_length: int, snake_color: int, bg_color: int, text: str, text_color: int
+) -> io.BytesIO:
+    """Render a random wiggling snek with the given attributes as a GIF."""
+    factory = PerlinNoiseFactory(dimension=1, octaves=2)
+    frames = create_snek_animation(
+        factory,
+        snake_width=snake_width,
+        snake_length=snake_length,
+        snake_color=snake_color,
+        text=text,
+        text_color=text_color,
+        bg_color=bg_color
+    )
+    return frames_to_gif_bytes(frames)
+
+
+def render_board(avatar_positions: list[tuple[Image.Image, tuple[int, int]]]) -> io.BytesIO:
+    """Render the Snakes and Ladders board with the player avatars pasted at the given positions."""
+    board_img = image_assets.get(SNAKE_RESOURCES / "snakes_and_ladders" / "board.jpg")
+    for avatar, position in avatar_positions:
+        board_img.paste(avatar, box=position)
+
+    return frame_to_png_bytes(board_img)
+
+
 log = logging.getLogger(__name__)
 START_EMOJI = "\u2611"     # :ballot_box_with_check: - Start the game
 CANCEL_EMOJI = "\u274C"    # :x: - Cancel or leave the game
@@ -432,8 +545,10 @@ class SnakeAndLaddersGame:
 
         while not self.started:
             try:
-                reaction, user = await self.ctx.bot.wait_for(
+                reaction, user = await self.ctx.bot.waiters.wait_for(
                     "reaction_add",
+                    channel_id=startup.channel.id,
+                    message_id=startup.id,
                     timeout=300,
                     check=startup_event_check
                 )
@@ -564,8 +679,8 @@ class SnakeAndLaddersGame:
         self.state = "roll"
         for user in self.players:
             self.round_has_rolled[user.id] = False
-        board_img = Image.open(SNAKE_RESOURCES / "snakes_and_ladders" / "board.jpg")
         player_row_size = math.ceil(MAX_PLAYERS / 2)
+        avatar_positions = []
 
         for i, player in enumerate(self.players):
             tile = self.player_tiles[player.id]
@@ -576,10 +691,16 @@ class SnakeAndLaddersGame:
                     (10 * BOARD_TILE_SIZE) - (9 - tile_coordinates[1]) * BOARD_TILE_SIZE - BOARD_PLAYER_SIZE)
             x_offset += BOARD_PLAYER_SIZE * (i % player_row_size)
             y_offset -= BOARD_PLAYER_SIZE * math.floor(i / player_row_size)
-            board_img.paste(self.avatar_images[player.id],
-                            box=(x_offset, y_offset))
+            avatar_positions.append((self.avatar_images[player.id], (x_offset, y_offset)))
+
+        try:
+            board_bytes = await image_workers.run(render_board, avatar_positions)
+        except ImageQueueFullError:
+            # Rendering the board is cheap enough to not hold up the game when the image workers are busy
+            log.debug("Image workers are busy, rendering the Snakes and Ladders board in the bot process.")
+            board_bytes = render_board(avatar_positions)
 
-        board_file = File(frame_to_png_bytes(board_img), filename="Board.jpg")
+        board_file = File(board_bytes, filename="Board.jpg")
         player_list = "\n".join((user.mention + ": Tile " + str(self.player_tiles[user.id])) for user in self.players)
 
         # Store and send new messages
@@ -612,8 +733,10 @@ class SnakeAndLaddersGame:
         is_surrendered = False
         while True:
             try:
-                reaction, user = await self.ctx.bot.wait_for(
+                reaction, user = await self.ctx.bot.waiters.wait_for(
                     "reaction_add",
+                    channel_id=self.positions.channel.id,
+                    message_id=self.positions.id,
                     timeout=300,
                     check=game_event_check
                 )
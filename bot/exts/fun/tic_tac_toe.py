@@ -58,7 +58,13 @@ class Player:
             )
 
         try:
-            react, _ = await self.ctx.bot.wait_for("reaction_add", timeout=30.0, check=check_for_move)
+            react, _ = await self.ctx.bot.waiters.wait_for(
+                "reaction_add",
+                channel_id=msg.channel.id,
+                message_id=msg.id,
+                timeout=30.0,
+                check=check_for_move
+            )
         except asyncio.TimeoutError:
             return True, None
         else:
@@ -157,8 +163,10 @@ class Game:
             )
 
         try:
-            reaction, user = await self.ctx.bot.wait_for(
+            reaction, user = await self.ctx.bot.waiters.wait_for(
                 "reaction_add",
+                channel_id=confirm_message.channel.id,
+                message_id=confirm_message.id,
                 timeout=60.0,
                 check=confirm_check
             )
@@ -383,6 +383,8 @@ class TriviaQuiz(commands.Cog):
             await asyncio.sleep(5)
 
         done_questions = []
+        # The questions of the category, in a random order
+        round_questions = iter(random.sample(topic, topic_length))
         hint_no = 0
         quiz_entry = None
 
@@ -401,11 +403,8 @@ class TriviaQuiz(commands.Cog):
             # If no hint has been sent or any time alert. Basically if hint_no = 0  means it is a new question.
             if hint_no == 0:
                 # Select a random question which has not been used yet.
-                while True:
-                    question_dict = random.choice(topic)
-                    if question_dict["id"] not in done_questions:
-                        done_questions.append(question_dict["id"])
-                        break
+                question_dict = next(round_questions)
+                done_questions.append(question_dict["id"])
 
                 if "dynamic_id" not in question_dict:
                     quiz_entry = QuizEntry(
@@ -441,7 +440,12 @@ class TriviaQuiz(commands.Cog):
                 return contains_correct_answer
 
             try:
-                msg = await self.bot.wait_for("message", check=check_func(quiz_entry.var_tol), timeout=10)
+                msg = await self.bot.waiters.wait_for(
+                    "message",
+                    channel_id=ctx.channel.id,
+                    check=check_func(quiz_entry.var_tol),
+                    timeout=10
+                )
             except asyncio.TimeoutError:
                 # In case of TimeoutError and the game has been stopped, then do nothing.
                 if not self.game_status[ctx.channel.id]:
@@ -12,6 +12,7 @@ from discord.ext import commands
 
 from bot.bot import Bot
 from bot.utils import helpers
+from bot.utils.image_assets import image_assets
 
 log = logging.getLogger(__name__)
 
@@ -80,7 +81,7 @@ class EggDecorating(commands.Cog):
                 q, r = divmod(8, colours_n)
                 colours = colours * q + colours[:r]
             num = random.randint(1, 6)
-            im = Image.open(Path(f"bot/resources/holidays/easter/easter_eggs/design{num}.png"))
+            im = image_assets.get_shared(Path(f"bot/resources/holidays/easter/easter_eggs/design{num}.png"))
             data = list(im.getdata())
 
             replaceable = {x for x in data if x not in IRREPLACEABLE}
@@ -1,9 +1,9 @@
 import asyncio
+import functools
 import logging
 import random
 from json import loads
 from pathlib import Path
-from typing import Union
 
 import discord
 from discord.ext import commands
@@ -31,9 +31,6 @@ TIMELIMIT = 30
 class EggheadQuiz(commands.Cog):
     """This cog contains the command for the Easter quiz!"""
 
-    def __init__(self):
-        self.quiz_messages = {}
-
     @commands.command(aliases=("eggheadquiz", "easterquiz"))
     async def eggquiz(self, ctx: commands.Context) -> None:
         """
@@ -54,35 +51,37 @@ class EggheadQuiz(commands.Cog):
         q_embed = discord.Embed(title=question, description=description, colour=Colours.pink)
 
         msg = await ctx.send(embed=q_embed)
-        for emoji in valid_emojis:
-            await msg.add_reaction(emoji)
-
-        self.quiz_messages[msg.id] = valid_emojis
 
-        await asyncio.sleep(TIMELIMIT)
+        # Mapping of user IDs to the emoji they voted with
+        votes = {}
+        route = ctx.bot.reaction_router.add_route(
+            functools.partial(self.on_vote, msg, valid_emojis, votes),
+            message_id=msg.id,
+            events=("raw_reaction_add", "raw_reaction_remove")
+        )
 
-        del self.quiz_messages[msg.id]
+        try:
+            for emoji in valid_emojis:
+                await msg.add_reaction(emoji)
 
-        msg = await ctx.fetch_message(msg.id)  # Refreshes message
+            await asyncio.sleep(TIMELIMIT)
+        finally:
+            ctx.bot.reaction_router.remove_route(route)
 
-        total_no = sum([len(await r.users().flatten()) for r in msg.reactions]) - len(valid_emojis)  # - bot's reactions
+        total_no = len(votes)
 
         if total_no == 0:
             return await msg.delete()  # To avoid ZeroDivisionError if nobody reacts
 
         results = ["**VOTES:**"]
         for emoji, _ in answers:
-            num = [len(await r.users().flatten()) for r in msg.reactions if str(r.emoji) == emoji][0] - 1
+            num = sum(vote == emoji for vote in votes.values())
             percent = round(100 * num / total_no)
             s = "" if num == 1 else "s"
             string = f"{emoji} - {num} vote{s} ({percent}%)"
             results.append(string)
 
-        mentions = " ".join([
-            u.mention for u in [
-                await r.users().flatten() for r in msg.reactions if str(r.emoji) == correct
-            ][0] if not u.bot
-        ])
+        mentions = " ".join(f"<@{user_id}>" for user_id, vote in votes.items() if vote == correct)
 
         content = f"Well done {mentions} for getting it correct!" if mentions else "Nobody got it right..."
 
@@ -95,22 +94,31 @@ class EggheadQuiz(commands.Cog):
         await ctx.send(content, embed=a_embed)
 
     @staticmethod
-    async def already_reacted(message: discord.Message, user: Union[discord.Member, discord.User]) -> bool:
-        """Returns whether a given user has reacted more than once to a given message."""
-        users = [u.id for reaction in [await r.users().flatten() for r in message.reactions] for u in reaction]
-        return users.count(user.id) > 1  # Old reaction plus new reaction
-
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: discord.Reaction, user: Union[discord.Member, discord.User]) -> None:
-        """Listener to listen specifically for reactions of quiz messages."""
-        if user.bot:
+    async def on_vote(
+        message: discord.Message,
+        valid_emojis: list[str],
+        votes: dict[int, str],
+        payload: discord.RawReactionActionEvent
+    ) -> None:
+        """Record the votes on the quiz message, removing invalid reactions and any reactions after a user's first."""
+        if payload.user_id == message.author.id:
+            return  # The bot's own reactions
+
+        emoji = str(payload.emoji)
+        if payload.event_type == "REACTION_REMOVE":
+            # Removing a reaction that wasn't counted doesn't affect the vote
+            if votes.get(payload.user_id) == emoji:
+                del votes[payload.user_id]
             return
-        if reaction.message.id not in self.quiz_messages:
+
+        if payload.member and payload.member.bot:
             return
-        if str(reaction.emoji) not in self.quiz_messages[reaction.message.id]:
-            return await reaction.message.remove_reaction(reaction, user)
-        if await self.already_reacted(reaction.message, user):
-            return await reaction.message.remove_reaction(reaction, user)
+
+        if emoji not in valid_emojis or payload.user_id in votes:
+            await message.remove_reaction(emoji, discord.Object(payload.user_id))
+            return
+
+        votes[payload.user_id] = emoji
 
 
 def setup(bot: Bot) -> None:
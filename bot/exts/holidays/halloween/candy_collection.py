@@ -1,6 +1,7 @@
 import logging
 import random
-from typing import Union
+from collections import deque
+from typing import Optional, Union
 
 import discord
 from async_rediscache import RedisCache
@@ -8,7 +9,7 @@ from discord.ext import commands
 
 from bot.bot import Bot
 from bot.constants import Channels, Month
-from bot.utils.decorators import in_month
+from bot.utils.decorators import in_month, in_month_listener
 
 log = logging.getLogger(__name__)
 
@@ -30,20 +31,133 @@ EMOJIS = dict(
     ),
 )
 
+LEADERBOARD_SIZE = 5
+# The number of most recent messages on which reactions can summon a candy or skull
+RECENT_MESSAGES_SIZE = 10
+
+# KEYS: the drops hash, the leaderboard sorted set. ARGV: the message id, the user id.
+# Claims the candy on the message if it's still there, and returns the user's new number of candies.
+CLAIM_CANDY_SCRIPT = """
+if redis.call("HGET", KEYS[1], ARGV[1]) ~= "candy" then
+    return false
+end
+redis.call("HDEL", KEYS[1], ARGV[1])
+return redis.call("ZINCRBY", KEYS[2], 1, ARGV[2])
+"""
+
+# KEYS: the drops hash, the leaderboard sorted set. ARGV: the message id, the user id, the number of candies to steal.
+# Claims the skull on the message if it's still there, and returns the user's number of candies and how many were lost.
+CLAIM_SKULL_SCRIPT = """
+if redis.call("HGET", KEYS[1], ARGV[1]) ~= "skull" then
+    return false
+end
+redis.call("HDEL", KEYS[1], ARGV[1])
+local candies = tonumber(redis.call("ZSCORE", KEYS[2], ARGV[2]) or 0)
+local lost = math.min(candies, tonumber(ARGV[3]))
+if lost > 0 then
+    redis.call("ZINCRBY", KEYS[2], -lost, ARGV[2])
+end
+return {candies, lost}
+"""
+
 
 class CandyCollection(commands.Cog):
     """Candy collection game Cog."""
 
-    # User candy amount records
+    # User candy amount records, from before they were moved to the leaderboard.
+    # The namespace of this cache is also used for the keys of the leaderboard and drops below.
     candy_records = RedisCache()
 
-    # Candy and skull messages mapping
-    candy_messages = RedisCache()
-    skull_messages = RedisCache()
-
     def __init__(self, bot: Bot):
         self.bot = bot
 
+        # The IDs of the most recent messages in the event channel
+        self.recent_message_ids = deque(maxlen=RECENT_MESSAGES_SIZE)
+
+        self.bot.loop.create_task(self.migrate_candy_records())
+        self.reaction_route = bot.reaction_router.add_route(
+            self.on_reaction_add, channel_id=Channels.community_bot_commands
+        )
+
+    def cog_unload(self) -> None:
+        """Stop routing the reactions in the event channel to the cog."""
+        self.bot.reaction_router.remove_route(self.reaction_route)
+
+    @property
+    def leaderboard_key(self) -> str:
+        """The key of the sorted set of user IDs by their number of candies."""
+        return f"{self.candy_records.namespace}:leaderboard"
+
+    @property
+    def drops_key(self) -> str:
+        """The key of the hash of message IDs to the candy or skull on them."""
+        return f"{self.candy_records.namespace}:drops"
+
+    async def migrate_candy_records(self) -> None:
+        """Move the candy records that were stored before the leaderboard existed to the leaderboard."""
+        records = await self.candy_records.to_dict()
+        if not records:
+            return
+
+        log.info(f"Moving {len(records)} candy records to the leaderboard")
+        pairs = [item for user_id, candies in records.items() for item in (candies, str(user_id))]
+        with await self.candy_records._get_pool_connection() as connection:
+            await connection.zadd(self.leaderboard_key, *pairs)
+        await self.candy_records.clear()
+
+    async def add_drop(self, message: Union[discord.Message, discord.PartialMessage], drop: str) -> None:
+        """Add a candy or skull to the message, for the first user to react with it."""
+        with await self.candy_records._get_pool_connection() as connection:
+            await connection.hset(self.drops_key, message.id, drop)
+        await message.add_reaction(EMOJIS[drop.upper()])
+
+    async def claim_candy(self, message_id: int, user_id: int) -> Optional[int]:
+        """Claim the candy on the message, and return the user's new number of candies, or None if it's gone."""
+        with await self.candy_records._get_pool_connection() as connection:
+            candies = await connection.eval(
+                CLAIM_CANDY_SCRIPT, keys=[self.drops_key, self.leaderboard_key], args=[message_id, user_id]
+            )
+        return None if candies is None else int(float(candies))
+
+    async def claim_skull(self, message_id: int, user_id: int) -> Optional[tuple[int, int]]:
+        """
+        Claim the skull on the message, which steals up to 3 candies from the user.
+
+        Returns the number of candies the user had and how many they lost, or None if the skull is gone.
+        """
+        with await self.candy_records._get_pool_connection() as connection:
+            result = await connection.eval(
+                CLAIM_SKULL_SCRIPT,
+                keys=[self.drops_key, self.leaderboard_key],
+                args=[message_id, user_id, random.randint(1, 3)]
+            )
+        return None if result is None else tuple(result)
+
+    async def get_top_records(self, count: int = LEADERBOARD_SIZE) -> list[tuple[int, int]]:
+        """Get the user IDs and numbers of candies of the `count` users with the most candies."""
+        with await self.candy_records._get_pool_connection() as connection:
+            records = await connection.zrevrangebyscore(
+                self.leaderboard_key,
+                exclude=connection.ZSET_EXCLUDE_MIN,
+                min=0,
+                offset=0,
+                count=count,
+                withscores=True
+            )
+        return [(int(user_id), int(candies)) for user_id, candies in records]
+
+    async def get_rank(self, user_id: int) -> Optional[tuple[int, int]]:
+        """Get the user's position on the leaderboard and their number of candies, if they have any."""
+        with await self.candy_records._get_pool_connection() as connection:
+            transaction = connection.multi_exec()
+            transaction.zrevrank(self.leaderboard_key, user_id)
+            transaction.zscore(self.leaderboard_key, user_id)
+            rank, candies = await transaction.execute()
+
+        if rank is None or not candies:
+            return None
+        return rank + 1, int(candies)
+
     @in_month(Month.OCTOBER)
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
@@ -51,72 +165,65 @@ class CandyCollection(commands.Cog):
         # Ignore messages in DMs
         if not message.guild:
             return
-        # make sure its a human message
-        if message.author.bot:
-            return
         # ensure it's hacktober channel
         if message.channel.id != Channels.community_bot_commands:
             return
 
+        # Every message counts towards the recent messages, including those of bots
+        self.recent_message_ids.append(message.id)
+
+        # make sure its a human message
+        if message.author.bot:
+            return
+
         # do random check for skull first as it has the lower chance
         if random.randint(1, ADD_SKULL_REACTION_CHANCE) == 1:
-            await self.skull_messages.set(message.id, "skull")
-            await message.add_reaction(EMOJIS["SKULL"])
+            await self.add_drop(message, "skull")
         # check for the candy chance next
         elif random.randint(1, ADD_CANDY_REACTION_CHANCE) == 1:
-            await self.candy_messages.set(message.id, "candy")
-            await message.add_reaction(EMOJIS["CANDY"])
+            await self.add_drop(message, "candy")
 
-    @in_month(Month.OCTOBER)
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: discord.Reaction, user: Union[discord.User, discord.Member]) -> None:
-        """Add/remove candies from a person if the reaction satisfies criteria."""
-        message = reaction.message
+    @in_month_listener(Month.OCTOBER)
+    async def on_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        """
+        Add/remove candies from a person if the reaction satisfies criteria.
+
+        Only the reactions in the event channel are routed here.
+        """
+        user = payload.member
         # check to ensure the reactor is human
-        if user.bot:
+        if user is None or user.bot:
             return
 
-        # check to ensure it is in correct channel
-        if message.channel.id != Channels.community_bot_commands:
-            return
+        emoji = str(payload.emoji)
+        message = self.bot.get_channel(payload.channel_id).get_partial_message(payload.message_id)
 
         # if its not a candy or skull, and it is one of 10 most recent messages,
         # proceed to add a skull/candy with higher chance
-        if str(reaction.emoji) not in (EMOJIS["SKULL"], EMOJIS["CANDY"]):
-            recent_message_ids = map(
-                lambda m: m.id,
-                await self.hacktober_channel.history(limit=10).flatten()
-            )
-            if message.id in recent_message_ids:
+        if emoji not in (EMOJIS["SKULL"], EMOJIS["CANDY"]):
+            if message.id in self.recent_message_ids:
                 await self.reacted_msg_chance(message)
             return
 
-        if await self.candy_messages.get(message.id) == "candy" and str(reaction.emoji) == EMOJIS["CANDY"]:
-            await self.candy_messages.delete(message.id)
-            if await self.candy_records.contains(user.id):
-                await self.candy_records.increment(user.id)
-            else:
-                await self.candy_records.set(user.id, 1)
-
-        elif await self.skull_messages.get(message.id) == "skull" and str(reaction.emoji) == EMOJIS["SKULL"]:
-            await self.skull_messages.delete(message.id)
+        # Claiming a candy or skull is atomic, so only the first user to react gets it
+        if emoji == EMOJIS["CANDY"]:
+            if await self.claim_candy(message.id, user.id) is None:
+                return  # Skip saving
 
-            if prev_record := await self.candy_records.get(user.id):
-                lost = min(random.randint(1, 3), prev_record)
-                await self.candy_records.decrement(user.id, lost)
-
-                if lost == prev_record:
-                    await CandyCollection.send_spook_msg(user, message.channel, "all of your")
-                else:
-                    await CandyCollection.send_spook_msg(user, message.channel, lost)
-            else:
+        elif (skull := await self.claim_skull(message.id, user.id)) is not None:
+            prev_record, lost = skull
+            if not prev_record:
                 await CandyCollection.send_no_candy_spook_message(user, message.channel)
+            elif lost == prev_record:
+                await CandyCollection.send_spook_msg(user, message.channel, "all of your")
+            else:
+                await CandyCollection.send_spook_msg(user, message.channel, lost)
         else:
             return  # Skip saving
 
-        await reaction.clear()
+        await message.clear_reaction(emoji)
 
-    async def reacted_msg_chance(self, message: discord.Message) -> None:
+    async def reacted_msg_chance(self, message: discord.PartialMessage) -> None:
         """
         Randomly add a skull or candy reaction to a message if there is a reaction there already.
 
@@ -124,17 +231,10 @@ class CandyCollection(commands.Cog):
         existing reaction.
         """
         if random.randint(1, ADD_SKULL_EXISTING_REACTION_CHANCE) == 1:
-            await self.skull_messages.set(message.id, "skull")
-            await message.add_reaction(EMOJIS["SKULL"])
+            await self.add_drop(message, "skull")
 
         elif random.randint(1, ADD_CANDY_EXISTING_REACTION_CHANCE) == 1:
-            await self.candy_messages.set(message.id, "candy")
-            await message.add_reaction(EMOJIS["CANDY"])
-
-    @property
-    def hacktober_channel(self) -> discord.TextChannel:
-        """Get #hacktoberbot channel from its ID."""
-        return self.bot.get_channel(Channels.community_bot_commands)
+            await self.add_drop(message, "candy")
 
     @staticmethod
     async def send_spook_msg(
@@ -166,17 +266,11 @@ class CandyCollection(commands.Cog):
     @in_month(Month.OCTOBER)
     @commands.command()
     async def candy(self, ctx: commands.Context) -> None:
-        """Get the candy leaderboard and save to JSON."""
-        records = await self.candy_records.items()
+        """Get the candy leaderboard and the invoking user's rank."""
+        top_five = await self.get_top_records()
+        rank = await self.get_rank(ctx.author.id)
 
         def generate_leaderboard() -> str:
-            top_sorted = sorted(
-                ((user_id, score) for user_id, score in records if score > 0),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            top_five = top_sorted[:5]
-
             return "\n".join(
                 f"{EMOJIS['MEDALS'][index]} <@{record[0]}>: {record[1]}"
                 for index, record in enumerate(top_five)
@@ -188,6 +282,12 @@ class CandyCollection(commands.Cog):
             value=generate_leaderboard(),
             inline=False
         )
+        if rank is not None:
+            e.add_field(
+                name="Your Rank",
+                value=f"#{rank[0]} with {rank[1]} {'candy' if rank[1] == 1 else 'candies'}",
+                inline=False
+            )
         e.add_field(
             name="\u200b",
             value="Candies will randomly appear on messages sent. "
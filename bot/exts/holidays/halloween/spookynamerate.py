@@ -1,7 +1,7 @@
 import asyncio
 import json
 import random
-from collections import defaultdict
+import re
 from datetime import datetime, timedelta
 from logging import getLogger
 from os import getenv
@@ -9,7 +9,7 @@ from pathlib import Path
 from typing import Optional
 
 from async_rediscache import RedisCache
-from discord import Embed, Reaction, TextChannel, User
+from discord import Embed, Object, RawReactionActionEvent, TextChannel
 from discord.colour import Colour
 from discord.ext import tasks
 from discord.ext.commands import Cog, Context, group
@@ -83,6 +83,16 @@ class SpookyNameRate(Cog):
     # added, the author's id, and the author's score (which is 0 by default)
     messages = RedisCache()
 
+    # These caches index the entries in `messages`, mapping the author's id and the normalised name to the message id
+    authors = RedisCache()
+    names = RedisCache()
+
+    # This cache stores the running score of each message id, which is updated as reactions are added and removed
+    scores = RedisCache()
+
+    # This cache stores the vote of each user on each message, as "message id:user id" => emoji
+    votes = RedisCache()
+
     # The data cache stores small information such as the current name that is going on and whether it is the first time
     # the bot is running
     data = RedisCache()
@@ -104,11 +114,50 @@ class SpookyNameRate(Cog):
         # Define an asyncio.Lock() to make sure the dictionary isn't changed
         # when checking the messages for duplicate emojis'
 
+        # An in-memory copy of the votes cache, mapping (message id, user id) to the emoji the user voted with
+        self.vote_ledger: dict[tuple[int, int], str] = {}
+        # Votes on the same message are processed one at a time, votes on different messages at the same time
+        self.vote_locks: dict[int, asyncio.Lock] = {}
+        # Set while the scores are counted, votes that arrive then aren't counted
+        self.votes_closed = False
+        self.votes_loaded = asyncio.Event()
+        self.vote_routes = [
+            bot.reaction_router.add_route(
+                handler, channel_id=Channels.community_bot_commands, emojis=EMOJIS_VAL, events=(event,)
+            )
+            for handler, event in (
+                (self.on_vote_add, "raw_reaction_add"),
+                (self.on_vote_remove, "raw_reaction_remove"),
+            )
+        ]
+
     async def load_vars(self) -> None:
         """Loads the variables that couldn't be loaded in __init__."""
         self.first_time = await self.data.get("first_time", True)
         self.name = await self.data.get("name")
 
+        if await self.messages.length() and not await self.authors.length():
+            await self.rebuild_indexes()
+
+        for key, emoji in await self.votes.items():
+            message_id, user_id = key.split(":")
+            self.vote_ledger[int(message_id), int(user_id)] = emoji
+        self.votes_loaded.set()
+
+    async def rebuild_indexes(self) -> None:
+        """Rebuild the indexes and scores of the entries, for entries that were added before they existed."""
+        logger.info("Rebuilding the Spooky Name Rate indexes")
+        entries = {message_id: json.loads(data) for message_id, data in await self.messages.items()}
+
+        await self.authors.update({data["author"]: message_id for message_id, data in entries.items()})
+        await self.names.update({self.normalise_name(data["name"]): message_id for message_id, data in entries.items()})
+        await self.scores.update({message_id: data["score"] for message_id, data in entries.items()})
+
+    @staticmethod
+    def normalise_name(name: str) -> str:
+        """Normalise the name, so that names that only differ in case or whitespace are considered the same."""
+        return re.sub(r"\s+", " ", name).strip().casefold()
+
     @group(name="spookynamerate", invoke_without_command=True)
     async def spooky_name_rate(self, ctx: Context) -> None:
         """Get help on the Spooky Name Rate game."""
@@ -139,8 +188,10 @@ class SpookyNameRate(Cog):
             await ctx.send("Sorry, the poll has started! You can try and participate in the next round though!")
             return
 
-        for data in (json.loads(user_data) for _, user_data in await self.messages.items()):
-            if data["author"] == ctx.author.id:
+        normalised_name = self.normalise_name(name)
+
+        async with self.checking_messages:  # Acquire the lock so that the same entry can't be added twice at once.
+            if await self.authors.contains(ctx.author.id):
                 await ctx.send(
                     "But you have already added an entry! Type "
                     f"`{Client.prefix}spookynamerate "
@@ -148,22 +199,25 @@ class SpookyNameRate(Cog):
                 )
                 return
 
-            elif data["name"] == name:
+            elif await self.names.contains(normalised_name):
                 await ctx.send("TOO LATE. Someone has already added this name.")
                 return
 
-        msg = await (await self.get_channel()).send(f"{ctx.author.mention} added the name {name!r}!")
-
-        await self.messages.set(
-            msg.id,
-            json.dumps(
-                {
-                    "name": name,
-                    "author": ctx.author.id,
-                    "score": 0,
-                }
-            ),
-        )
+            msg = await (await self.get_channel()).send(f"{ctx.author.mention} added the name {name!r}!")
+
+            await self.messages.set(
+                msg.id,
+                json.dumps(
+                    {
+                        "name": name,
+                        "author": ctx.author.id,
+                        "score": 0,
+                    }
+                ),
+            )
+            await self.scores.set(msg.id, 0)
+            await self.authors.set(ctx.author.id, msg.id)
+            await self.names.set(normalised_name, msg.id)
 
         for emoji in EMOJIS_VAL:
             await msg.add_reaction(emoji)
@@ -176,41 +230,85 @@ class SpookyNameRate(Cog):
         if self.poll:
             await ctx.send("You can't delete your name since the poll has already started!")
             return
-        for message_id, data in await self.messages.items():
-            data = json.loads(data)
 
-            if ctx.author.id == data["author"]:
+        async with self.checking_messages:
+            message_id = await self.authors.get(ctx.author.id)
+            if message_id is None:
+                await ctx.send(
+                    f"But you don't have an entry... :eyes: Type `{Client.prefix}spookynamerate add your entry`"
+                )
+                return
+
+            # Acquire the lock of the message as well, so that no votes are being counted while it's deleted
+            async with self.vote_locks.setdefault(message_id, asyncio.Lock()):
+                data = json.loads(await self.messages.get(message_id))
                 await self.messages.delete(message_id)
-                await ctx.send(f"Name deleted successfully ({data['name']!r})!")
+                await self.scores.delete(message_id)
+                await self.authors.delete(ctx.author.id)
+                await self.names.delete(self.normalise_name(data["name"]))
+
+                for key in [key for key in self.vote_ledger if key[0] == message_id]:
+                    del self.vote_ledger[key]
+                    await self.votes.delete(f"{message_id}:{key[1]}")
+
+            # Votes still waiting for the lock hold on to it, and will find that the entry is gone
+            self.vote_locks.pop(message_id, None)
+
+        await ctx.send(f"Name deleted successfully ({data['name']!r})!")
+
+    async def on_vote_add(self, payload: RawReactionActionEvent) -> None:
+        """Records the user's vote, and ensures that each user adds maximum one reaction."""
+        emoji = str(payload.emoji)
+        if payload.user_id == self.bot.user.id:
+            return
+
+        await self.votes_loaded.wait()
+        # Checked before getting a lock, so that no locks are made for reactions on messages that aren't entries
+        if not await self.messages.contains(payload.message_id):
+            return
+
+        async with self.vote_locks.setdefault(payload.message_id, asyncio.Lock()):
+            # The entry may have been deleted while waiting for the lock
+            if not await self.messages.contains(payload.message_id):
+                self.vote_locks.pop(payload.message_id, None)
+                return
+            if self.votes_closed:
                 return
 
-        await ctx.send(
-            f"But you don't have an entry... :eyes: Type `{Client.prefix}spookynamerate add your entry`"
-        )
+            key = (payload.message_id, payload.user_id)
+            if key not in self.vote_ledger:
+                self.vote_ledger[key] = emoji
+                await self.votes.set(f"{payload.message_id}:{payload.user_id}", emoji)
+                await self.scores.increment(payload.message_id, EMOJIS_VAL[emoji])
+                return
 
-    @Cog.listener()
-    async def on_reaction_add(self, reaction: Reaction, user: User) -> None:
-        """Ensures that each user adds maximum one reaction."""
-        if user.bot or not await self.messages.contains(reaction.message.id):
+        user = payload.member or await self.bot.fetch_user(payload.user_id)
+        await user.send("Sorry, you have already added a reaction, please remove your reaction and try again.")
+
+        channel = await self.get_channel()
+        await channel.get_partial_message(payload.message_id).remove_reaction(emoji, Object(payload.user_id))
+
+    async def on_vote_remove(self, payload: RawReactionActionEvent) -> None:
+        """Removes the user's vote when they remove the reaction they voted with."""
+        emoji = str(payload.emoji)
+        if payload.user_id == self.bot.user.id:
             return
 
-        async with self.checking_messages:  # Acquire the lock so that the dictionary isn't reset while iterating.
-            if reaction.emoji in EMOJIS_VAL:
-                # create a custom counter
-                reaction_counter = defaultdict(int)
-                for msg_reaction in reaction.message.reactions:
-                    async for reaction_user in msg_reaction.users():
-                        if reaction_user == self.bot.user:
-                            continue
-                        reaction_counter[reaction_user] += 1
-
-                if reaction_counter[user] > 1:
-                    await user.send(
-                        "Sorry, you have already added a reaction, "
-                        "please remove your reaction and try again."
-                    )
-                    await reaction.remove(user)
-                    return
+        await self.votes_loaded.wait()
+        key = (payload.message_id, payload.user_id)
+        # Removing a duplicate reaction, or a reaction on a message that isn't an entry, doesn't affect any vote
+        if self.vote_ledger.get(key) != emoji:
+            return
+
+        async with self.vote_locks.setdefault(payload.message_id, asyncio.Lock()):
+            if self.votes_closed or self.vote_ledger.get(key) != emoji:
+                return
+            if not await self.messages.contains(payload.message_id):
+                return
+
+            del self.vote_ledger[key]
+            await self.votes.delete(f"{payload.message_id}:{payload.user_id}")
+            await self.scores.decrement(payload.message_id, EMOJIS_VAL[emoji])
 
     @tasks.loop(hours=24.0)
     async def announce_name(self) -> None:
@@ -232,33 +330,32 @@ class SpookyNameRate(Cog):
             self.first_time = False
 
         else:
-            if await self.messages.items():
+            if await self.messages.length():
                 await channel.send(embed=await self.get_responses_list(final=True))
                 self.poll = True
                 if not SpookyNameRate.debug:
                     await asyncio.sleep(2 * 60 * 60)  # sleep for two hours
 
             logger.info("Calculating score")
-            for message_id, data in await self.messages.items():
-                data = json.loads(data)
+            # Close the votes, and wait for the votes that are being counted right now, so the scores stop changing
+            self.votes_closed = True
+            for lock in list(self.vote_locks.values()):
+                async with lock:
+                    pass
 
-                msg = await channel.fetch_message(message_id)
-                score = 0
-                for reaction in msg.reactions:
-                    reaction_value = EMOJIS_VAL.get(reaction.emoji, 0)  # get the value of the emoji else 0
-                    score += reaction_value * (reaction.count - 1)  # multiply by the num of reactions
-                    # subtract one, since one reaction was done by the bot
+            async with self.checking_messages:  # Acquire the lock so that no entries are added or deleted meanwhile
+                entries = {message_id: json.loads(data) for message_id, data in await self.messages.items()}
+                scores = await self.scores.to_dict()
 
-                logger.debug(f"{self.bot.get_user(data['author'])} got a score of {score}")
-                data["score"] = score
-                await self.messages.set(message_id, json.dumps(data))
+            for message_id, data in entries.items():
+                data["score"] = scores.get(message_id, 0)
+                logger.debug(f"{self.bot.get_user(data['author'])} got a score of {data['score']}")
+
+            # Store all the scores at once
+            await self.messages.update({message_id: json.dumps(data) for message_id, data in entries.items()})
 
             # Sort the winner messages
-            winner_messages = sorted(
-                ((msg_id, json.loads(usr_data)) for msg_id, usr_data in await self.messages.items()),
-                key=lambda x: x[1]["score"],
-                reverse=True,
-            )
+            winner_messages = sorted(entries.items(), key=lambda x: x[1]["score"], reverse=True)
 
             winners = []
             for i, winner in enumerate(winner_messages):
@@ -278,6 +375,7 @@ class SpookyNameRate(Cog):
 
                 if not winners:  # There are no winners (no participants)
                     await channel.send("Hmm... Looks like no one participated! :cry:")
+                    self.votes_closed = False
                     return
 
                 score = winners[0][1]["score"]
@@ -297,6 +395,12 @@ class SpookyNameRate(Cog):
 
             async with self.checking_messages:  # Acquire the lock to delete the messages
                 await self.messages.clear()  # reset the messages
+                await self.scores.clear()
+                await self.authors.clear()
+                await self.names.clear()
+                await self.votes.clear()
+                self.vote_ledger.clear()
+                self.vote_locks.clear()
 
         # send the next name
         self.name = f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}"
@@ -308,6 +412,7 @@ class SpookyNameRate(Cog):
         )
 
         self.poll = False  # accepting responses
+        self.votes_closed = False
 
     @announce_name.before_loop
     async def wait_till_scheduled_time(self) -> None:
@@ -331,8 +436,9 @@ class SpookyNameRate(Cog):
         channel = await self.get_channel()
 
         embed = Embed(color=Colour.red())
+        entries = await self.messages.items()
 
-        if await self.messages.items():
+        if entries:
             if final:
                 embed.title = "Spooky Name Rate is about to end!"
                 embed.description = (
@@ -345,7 +451,7 @@ class SpookyNameRate(Cog):
         else:
             embed.title = "No one has added an entry yet..."
 
-        for message_id, data in await self.messages.items():
+        for message_id, data in entries:
             data = json.loads(data)
 
             embed.add_field(
@@ -382,8 +488,10 @@ class SpookyNameRate(Cog):
         return True
 
     def cog_unload(self) -> None:
-        """Stops the announce_name task."""
+        """Stops the announce_name task and the routing of the votes."""
         self.announce_name.cancel()
+        for route in self.vote_routes:
+            self.bot.reaction_router.remove_route(route)
 
 
 def setup(bot: Bot) -> None:
@@ -7,10 +7,13 @@ from typing import Optional
 from discord.ext import commands
 
 from bot.bot import Bot
+from bot.utils.search_index import SearchIndex
 
 log = logging.getLogger(__name__)
 
 VIDEOS = json.loads(Path("bot/resources/holidays/pride/anthems.json").read_text("utf8"))
+# The videos, indexed by their genres
+GENRE_INDEX = SearchIndex((genre, video) for video in VIDEOS for genre in video["genre"])
 
 
 class PrideAnthem(commands.Cog):
@@ -26,7 +29,7 @@ class PrideAnthem(commands.Cog):
         if not genre:
             return random.choice(VIDEOS)
         else:
-            songs = [song for song in VIDEOS if genre.casefold() in song["genre"]]
+            songs = [match.value for match in GENRE_INDEX.exact(genre)]
             try:
                 return random.choice(songs)
             except IndexError:
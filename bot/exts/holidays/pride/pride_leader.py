@@ -6,14 +6,15 @@ from typing import Optional
 
 import discord
 from discord.ext import commands
-from rapidfuzz import fuzz
 
 from bot import constants
 from bot.bot import Bot
+from bot.utils.search_index import SearchIndex
 
 log = logging.getLogger(__name__)
 
 PRIDE_RESOURCE = json.loads(Path("bot/resources/holidays/pride/prideleader.json").read_text("utf8"))
+PRIDE_LEADER_INDEX = SearchIndex.from_names(PRIDE_RESOURCE)
 MINIMUM_FUZZ_RATIO = 40
 
 
@@ -38,11 +39,7 @@ class PrideLeader(commands.Cog):
         embed = discord.Embed(
             color=constants.Colours.soft_red
         )
-        valid_names = []
-        pride_leader = pride_leader.title()
-        for name in PRIDE_RESOURCE:
-            if fuzz.ratio(pride_leader, name) >= MINIMUM_FUZZ_RATIO:
-                valid_names.append(name)
+        valid_names = [match.key for match in PRIDE_LEADER_INDEX.fuzzy(pride_leader, score_cutoff=MINIMUM_FUZZ_RATIO)]
 
         if not valid_names:
             valid_names = ", ".join(PRIDE_RESOURCE)
@@ -56,9 +53,9 @@ class PrideLeader(commands.Cog):
 
         return embed
 
-    def embed_builder(self, pride_leader: dict) -> discord.Embed:
+    def embed_builder(self, name: str) -> discord.Embed:
         """Generate an Embed with information about a pride leader."""
-        name = [name for name, info in PRIDE_RESOURCE.items() if info == pride_leader][0]
+        pride_leader = PRIDE_RESOURCE[name]
 
         embed = discord.Embed(
             title=name,
@@ -98,17 +95,18 @@ class PrideLeader(commands.Cog):
         and if there is no pride leader given, return a random pride leader.
         """
         if not pride_leader_name:
-            leader = random.choice(list(PRIDE_RESOURCE.values()))
+            name = random.choice(list(PRIDE_RESOURCE))
         else:
-            leader = PRIDE_RESOURCE.get(pride_leader_name.title())
-            if not leader:
+            matches = PRIDE_LEADER_INDEX.exact(pride_leader_name)
+            if not matches:
                 log.trace(f"Got a Invalid pride leader: {pride_leader_name}")
 
                 embed = self.invalid_embed_generate(pride_leader_name)
                 await ctx.send(embed=embed)
                 return
+            name = matches[0].key
 
-        embed = self.embed_builder(leader)
+        embed = self.embed_builder(name)
         await ctx.send(embed=embed)
 
 
@@ -51,7 +51,8 @@ class MyValenstate(commands.Cog):
             lower_state = state.lower().replace(" ", "")
             eq_chars[state] = self.levenshtein(author, lower_state)
 
-        matches = [x for x, y in eq_chars.items() if y == min(eq_chars.values())]
+        min_distance = min(eq_chars.values())
+        matches = [x for x, y in eq_chars.items() if y == min_distance]
         valenstate = choice(matches)
         matches.remove(valenstate)
 
@@ -11,11 +11,14 @@ from discord.ext import commands
 
 from bot.bot import Bot
 from bot.constants import Colours
+from bot.utils.search_index import SearchIndex
 
 log = logging.getLogger(__name__)
 
 LETTER_EMOJI = ":love_letter:"
 HEART_EMOJIS = [":heart:", ":gift_heart:", ":revolving_hearts:", ":sparkling_heart:", ":two_hearts:"]
+# Invalid zodiac signs that score at least this against a valid one are suggested to be that one
+MINIMUM_FUZZ_RATIO = 70
 
 
 class ValentineZodiac(commands.Cog):
@@ -23,6 +26,7 @@ class ValentineZodiac(commands.Cog):
 
     def __init__(self):
         self.zodiacs, self.zodiac_fact = self.load_comp_json()
+        self.zodiac_index = SearchIndex.from_names(self.zodiac_fact)
 
     @staticmethod
     def load_comp_json() -> tuple[dict, dict]:
@@ -45,6 +49,8 @@ class ValentineZodiac(commands.Cog):
         embed = discord.Embed()
         embed.color = Colours.soft_red
         error_msg = f"**{zodiac}** is not a valid zodiac sign, here is the list of valid zodiac signs.\n"
+        if suggestions := self.zodiac_index.fuzzy(zodiac, score_cutoff=MINIMUM_FUZZ_RATIO, limit=1):
+            error_msg = f"Did you mean **{suggestions[0].key}**? {error_msg}"
         names = list(self.zodiac_fact)
         middle_index = len(names) // 2
         first_half_names = ", ".join(names[:middle_index])
@@ -142,7 +142,13 @@ class Bookmark(commands.Cog):
 
         while True:
             try:
-                _, user = await self.bot.wait_for("reaction_add", timeout=TIMEOUT, check=event_check)
+                _, user = await self.bot.waiters.wait_for(
+                    "reaction_add",
+                    channel_id=reaction_message.channel.id,
+                    message_id=reaction_message.id,
+                    check=event_check,
+                    timeout=TIMEOUT
+                )
             except asyncio.TimeoutError:
                 log.debug("Timed out waiting for a reaction")
                 break
@@ -90,8 +90,10 @@ class ConvoStarters(commands.Cog):
         await message.add_reaction("🔄")
         while True:
             try:
-                reaction, user = await self.bot.wait_for(
+                reaction, user = await self.bot.waiters.wait_for(
                     "reaction_add",
+                    channel_id=message.channel.id,
+                    message_id=message.id,
                     check=partial(self._predicate, command_invoker, message),
                     timeout=60.0
                 )
@@ -23,8 +23,8 @@ class GithubInfo(commands.Cog):
 
     async def fetch_data(self, url: str) -> dict:
         """Retrieve data as a dictionary."""
-        async with self.bot.http_session.get(url) as r:
-            return await r.json()
+        response = await self.bot.github_client.get(url)
+        return response.json()
 
     @commands.group(name="github", aliases=("gh", "git"))
     @commands.cooldown(1, 10, commands.BucketType.user)
@@ -1,9 +1,13 @@
+import asyncio
 import logging
 import random
 import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Optional, Union
 
+import aiohttp
 import discord
 from discord.ext import commands
 
@@ -15,10 +19,10 @@ from bot.constants import (
     ERROR_REPLIES,
     Emojis,
     NEGATIVE_REPLIES,
-    Tokens,
     WHITELISTED_CHANNELS
 )
 from bot.utils.decorators import whitelist_override
+from bot.utils.exceptions import APIError
 from bot.utils.extensions import invoke_help_command
 
 log = logging.getLogger(__name__)
@@ -27,17 +31,11 @@ BAD_RESPONSE = {
     404: "Issue/pull request not located! Please enter a valid number!",
     403: "Rate limit has been hit! Please try again later!"
 }
-REQUEST_HEADERS = {
-    "Accept": "application/vnd.github.v3+json"
-}
 
 REPOSITORY_ENDPOINT = "https://api.github.com/orgs/{org}/repos?per_page=100&type=public"
 ISSUE_ENDPOINT = "https://api.github.com/repos/{user}/{repository}/issues/{number}"
 PR_ENDPOINT = "https://api.github.com/repos/{user}/{repository}/pulls/{number}"
 
-if GITHUB_TOKEN := Tokens.github:
-    REQUEST_HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
-
 WHITELISTED_CATEGORIES = (
     Categories.development, Categories.devprojects, Categories.media, Categories.staff
 )
@@ -51,6 +49,28 @@ CODE_BLOCK_RE = re.compile(
 # Maximum number of issues in one message
 MAXIMUM_ISSUES = 5
 
+# Maximum number of issues and PRs that are fetched from the REST API at once
+MAX_CONCURRENT_FETCHES = 5
+
+# How long resolved issues and PRs are cached, closed ones are unlikely to change
+OPEN_ISSUE_CACHE_TTL = 60  # Seconds
+CLOSED_ISSUE_CACHE_TTL = 60 * 60  # Seconds
+MAX_CACHED_ISSUES = 512
+
+# Resolves the issue or PR of every (owner, name, number) in the `item<index>` fields,
+# see `Issues.fetch_issues_graphql`
+GRAPHQL_ISSUE_FIELD = (
+    "item{index}: repository(owner: $owner{index}, name: $name{index}) "
+    "{{ issueOrPullRequest(number: $number{index}) {{ ...IssueFields }} }}"
+)
+GRAPHQL_ISSUE_FRAGMENT = """
+fragment IssueFields on IssueOrPullRequest {
+    __typename
+    ... on Issue { title url state }
+    ... on PullRequest { title url state isDraft merged }
+}
+"""
+
 # Regex used when looking for automatic linking in messages
 # regex101 of current regex https://regex101.com/r/V2ji8M/6
 AUTOMATIC_REGEX = re.compile(
@@ -70,6 +90,10 @@ class FoundIssue:
         return hash((self.organisation, self.repository, self.number))
 
 
+# The organisation or user, repository and number of an issue or PR
+IssueKey = tuple[str, str, int]
+
+
 @dataclass
 class FetchError:
     """Dataclass representing an error while fetching an issue."""
@@ -88,6 +112,11 @@ class IssueState:
     title: str
     emoji: str
 
+    @property
+    def closed(self) -> bool:
+        """Whether the issue or PR was closed or merged."""
+        return self.emoji in (Emojis.issue_closed, Emojis.pull_request_closed, Emojis.pull_request_merged)
+
 
 class Issues(commands.Cog):
     """Cog that allows users to retrieve issues from GitHub."""
@@ -96,6 +125,14 @@ class Issues(commands.Cog):
         self.bot = bot
         self.repos = []
 
+        # Resolved issues and PRs, with the time they expire at, in least recently used order
+        self.resolved_issues: OrderedDict[IssueKey, tuple[IssueState, float]] = OrderedDict()
+        # Issues and PRs that are being resolved, so that concurrent messages share a single fetch
+        self.pending_issues: dict[IssueKey, asyncio.Future] = {}
+        # The tasks resolving batches of issues, kept referenced so they aren't garbage collected mid-flight
+        self.batch_tasks: set[asyncio.Task] = set()
+        self.fetch_slots = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
     @staticmethod
     def remove_codeblocks(message: str) -> str:
         """Remove any codeblock in a message."""
@@ -116,8 +153,7 @@ class Issues(commands.Cog):
         pulls_url = PR_ENDPOINT.format(user=user, repository=repository, number=number)
         log.trace(f"Querying GH issues API: {url}")
 
-        async with self.bot.http_session.get(url, headers=REQUEST_HEADERS) as r:
-            json_data = await r.json()
+        r = await self.bot.github_client.get(url)
 
         if r.status == 403:
             if r.headers.get("X-RateLimit-Remaining") == "0":
@@ -129,6 +165,8 @@ class Issues(commands.Cog):
         elif r.status != 200:
             return FetchError(r.status, "Error while fetching issue.")
 
+        json_data = r.json()
+
         # The initial API request is made to the issues API endpoint, which will return information
         # if the issue or PR is present. However, the scope of information returned for PRs differs
         # from issues: if the 'issues' key is present in the response then we can pull the data we
@@ -144,22 +182,156 @@ class Issues(commands.Cog):
         # to get the desired information for the PR.
         else:
             log.trace(f"PR provided, querying GH pulls API for additional information: {pulls_url}")
-            async with self.bot.http_session.get(pulls_url) as p:
-                pull_data = await p.json()
-                if pull_data["draft"]:
-                    emoji = Emojis.pull_request_draft
-                elif pull_data["state"] == "open":
-                    emoji = Emojis.pull_request_open
-                # When 'merged_at' is not None, this means that the state of the PR is merged
-                elif pull_data["merged_at"] is not None:
-                    emoji = Emojis.pull_request_merged
-                else:
-                    emoji = Emojis.pull_request_closed
+            pull_data = (await self.bot.github_client.get(pulls_url)).json()
+            if pull_data["draft"]:
+                emoji = Emojis.pull_request_draft
+            elif pull_data["state"] == "open":
+                emoji = Emojis.pull_request_open
+            # When 'merged_at' is not None, this means that the state of the PR is merged
+            elif pull_data["merged_at"] is not None:
+                emoji = Emojis.pull_request_merged
+            else:
+                emoji = Emojis.pull_request_closed
 
         issue_url = json_data.get("html_url")
 
         return IssueState(repository, number, issue_url, json_data.get("title", ""), emoji)
 
+    async def fetch_issues_graphql(self, keys: list[IssueKey]) -> list[Union[IssueState, FetchError]]:
+        """
+        Retrieve many issues and PRs with a single GraphQL query.
+
+        Returns an IssueState or FetchError for every key, in the same order.
+        """
+        parameters = []
+        fields = []
+        variables = {}
+        for index, (user, repository, number) in enumerate(keys):
+            parameters.append(f"$owner{index}: String!, $name{index}: String!, $number{index}: Int!")
+            fields.append(GRAPHQL_ISSUE_FIELD.format(index=index))
+            variables |= {f"owner{index}": user, f"name{index}": repository, f"number{index}": number}
+
+        query = f"query({', '.join(parameters)}) {{ {' '.join(fields)} }}{GRAPHQL_ISSUE_FRAGMENT}"
+        log.trace(f"Querying GH GraphQL API for {len(keys)} issues")
+
+        response = await self.bot.github_client.graphql(query, variables)
+        response.raise_for_status("GitHub GraphQL API")
+
+        # The data is missing entirely if the whole query failed, e.g. because of the rate limit
+        data = response.json()["data"]
+
+        results = []
+        for index, (_user, repository, number) in enumerate(keys):
+            item = (data[f"item{index}"] or {}).get("issueOrPullRequest")
+            if item is None:
+                results.append(FetchError(404, "Issue not found."))
+                continue
+
+            if item["__typename"] == "Issue":
+                emoji = Emojis.issue_open if item["state"] == "OPEN" else Emojis.issue_closed
+            elif item["isDraft"]:
+                emoji = Emojis.pull_request_draft
+            elif item["state"] == "OPEN":
+                emoji = Emojis.pull_request_open
+            elif item["merged"]:
+                emoji = Emojis.pull_request_merged
+            else:
+                emoji = Emojis.pull_request_closed
+
+            results.append(IssueState(repository, number, item["url"], item["title"], emoji))
+
+        return results
+
+    async def _fetch_issues_limited(self, key: IssueKey) -> Union[IssueState, FetchError]:
+        """Retrieve an issue from the REST API, waiting for a free slot first."""
+        user, repository, number = key
+        async with self.fetch_slots:
+            return await self.fetch_issues(number, repository, user)
+
+    def _get_resolved(self, key: IssueKey) -> Optional[IssueState]:
+        """Get the cached state of the issue, if it hasn't expired yet."""
+        if key not in self.resolved_issues:
+            return None
+
+        issue, expires_at = self.resolved_issues[key]
+        if expires_at < time.monotonic():
+            del self.resolved_issues[key]
+            return None
+
+        self.resolved_issues.move_to_end(key)
+        return issue
+
+    def _remember(self, key: IssueKey, issue: IssueState) -> None:
+        """Cache the state of the issue, evicting the least recently used issues if there are too many."""
+        ttl = CLOSED_ISSUE_CACHE_TTL if issue.closed else OPEN_ISSUE_CACHE_TTL
+        self.resolved_issues[key] = (issue, time.monotonic() + ttl)
+        self.resolved_issues.move_to_end(key)
+
+        while len(self.resolved_issues) > MAX_CACHED_ISSUES:
+            self.resolved_issues.popitem(last=False)
+
+    async def _resolve_batch(self, keys: list[IssueKey]) -> None:
+        """Resolve the issues, setting the result of their pending futures."""
+        try:
+            results = None
+            if len(keys) > 1 and self.bot.github_client.can_use_graphql:
+                try:
+                    results = await self.fetch_issues_graphql(keys)
+                except (APIError, KeyError, TypeError, aiohttp.ClientError, asyncio.TimeoutError):
+                    log.warning("Failed to resolve issues with the GraphQL API, falling back to the REST API.")
+
+            if results is None:
+                results = await asyncio.gather(*(self._fetch_issues_limited(key) for key in keys))
+
+            for key, result in zip(keys, results):
+                if isinstance(result, IssueState):
+                    self._remember(key, result)
+                self.pending_issues[key].set_result(result)
+
+        except Exception as e:
+            for key in keys:
+                if not self.pending_issues[key].done():
+                    self.pending_issues[key].set_exception(e)
+
+        finally:
+            for key in keys:
+                del self.pending_issues[key]
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        """Forget the finished `task`, logging the error it failed with if any."""
+        self.batch_tasks.discard(task)
+        if not task.cancelled() and (exception := task.exception()) is not None:
+            log.error("Resolving a batch of issues failed:", exc_info=exception)
+
+    async def resolve_issues(self, keys: list[IssueKey]) -> list[Union[IssueState, FetchError]]:
+        """
+        Retrieve many issues and PRs concurrently.
+
+        Returns an IssueState or FetchError for every key, in the same order. Issues
+        are taken from the cache where possible, and issues that are already being
+        retrieved for another message aren't retrieved again. The others are retrieved
+        with a single GraphQL query if possible, or with concurrent REST API requests.
+        """
+        keys = list(dict.fromkeys(keys))
+        results = {key: issue for key in keys if (issue := self._get_resolved(key)) is not None}
+
+        missing = [key for key in keys if key not in results and key not in self.pending_issues]
+        if missing:
+            loop = asyncio.get_running_loop()
+            for key in missing:
+                self.pending_issues[key] = loop.create_future()
+            task = asyncio.create_task(self._resolve_batch(missing))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+        pending = {key: self.pending_issues[key] for key in keys if key not in results}
+        if pending:
+            # Shielded so that one message giving up doesn't cancel the fetch for the others
+            fetched = await asyncio.gather(*(asyncio.shield(future) for future in pending.values()))
+            results |= zip(pending, fetched)
+
+        return [results[key] for key in keys]
+
     @staticmethod
     def format_embed(
         results: list[Union[IssueState, FetchError]],
@@ -215,7 +387,7 @@ class Issues(commands.Cog):
             await invoke_help_command(ctx)
             return
 
-        results = [await self.fetch_issues(number, repository, user) for number in numbers]
+        results = await self.resolve_issues([(user, repository, number) for number in numbers])
         await ctx.send(embed=self.format_embed(results, user, repository))
 
     @commands.Cog.listener()
@@ -263,14 +435,11 @@ class Issues(commands.Cog):
                 await message.channel.send(embed=embed, delete_after=5)
                 return
 
-            for repo_issue in issues:
-                result = await self.fetch_issues(
-                    int(repo_issue.number),
-                    repo_issue.repository,
-                    repo_issue.organisation or "python-discord"
-                )
-                if isinstance(result, IssueState):
-                    links.append(result)
+            results = await self.resolve_issues([
+                (repo_issue.organisation or "python-discord", repo_issue.repository, int(repo_issue.number))
+                for repo_issue in issues
+            ])
+            links = [result for result in results if isinstance(result, IssueState)]
 
         if not links:
             return
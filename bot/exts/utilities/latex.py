@@ -1,26 +1,30 @@
-import asyncio
-import hashlib
-import pathlib
+import logging
 import re
-from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from pathlib import Path
 
 import discord
-import matplotlib.pyplot as plt
+import matplotlib
 from discord.ext import commands
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 from bot.bot import Bot
+from bot.constants import Latex as LatexConfig
+from bot.utils.image_worker import image_workers, queue_notifier
+from bot.utils.render_cache import RenderCache
+
+log = logging.getLogger(__name__)
 
 # configure fonts and colors for matplotlib
-plt.rcParams.update(
-    {
-        "font.size": 16,
-        "mathtext.fontset": "cm",  # Computer Modern font set
-        "mathtext.rm": "serif",
-        "figure.facecolor": "36393F",  # matches Discord's dark mode background color
-        "text.color": "white",
-    }
-)
+RC_PARAMS = {
+    "font.size": 16,
+    "mathtext.fontset": "cm",  # Computer Modern font set
+    "mathtext.rm": "serif",
+    "figure.facecolor": "36393F",  # matches Discord's dark mode background color
+    "text.color": "white",
+}
+RENDER_DPI = 200
 
 FORMATTED_CODE_REGEX = re.compile(
     r"(?P<delim>(?P<block>```)|``?)"        # code delimiter: 1-3 backticks; (?P=block) only matches if it's a block
@@ -32,35 +36,41 @@ FORMATTED_CODE_REGEX = re.compile(
     re.DOTALL | re.IGNORECASE,              # "." also matches newlines, case insensitive
 )
 
-CACHE_DIRECTORY = pathlib.Path("_latex_cache")
-CACHE_DIRECTORY.mkdir(exist_ok=True)
+RENDER_CACHE = RenderCache(
+    LatexConfig.render_cache_memory_bytes,
+    Path(LatexConfig.render_cache_dir),
+    LatexConfig.render_cache_disk_bytes,
+)
 
 
-class Latex(commands.Cog):
-    """Renders latex."""
-
-    @staticmethod
-    def _render(text: str, filepath: pathlib.Path) -> BytesIO:
-        """
-        Return the rendered image if latex compiles without errors, otherwise raise a BadArgument Exception.
+def _render(text: str) -> bytes:
+    """
+    Render `text` and return the PNG encoded image, raising a ValueError if it doesn't compile.
 
-        Saves rendered image to cache.
-        """
-        fig = plt.figure()
-        rendered_image = BytesIO()
+    This runs in an image worker process. The figure isn't registered with pyplot, so that
+    no global state is shared between renders, and it's freed as soon as it's been saved.
+    """
+    with matplotlib.rc_context(RC_PARAMS):
+        fig = Figure()
+        FigureCanvasAgg(fig)
         fig.text(0, 1, text, horizontalalignment="left", verticalalignment="top")
 
+        rendered_image = BytesIO()
         try:
-            plt.savefig(rendered_image, bbox_inches="tight", dpi=600)
-        except ValueError as e:
-            raise commands.BadArgument(str(e))
+            fig.savefig(rendered_image, format="png", bbox_inches="tight", dpi=RENDER_DPI)
+        finally:
+            fig.clear()
+
+    return rendered_image.getvalue()
 
-        rendered_image.seek(0)
 
-        with open(filepath, "wb") as f:
-            f.write(rendered_image.getbuffer())
+def _preload_mathtext() -> None:
+    """Load the fonts used for rendering, so that the first render in a worker isn't slowed down by it."""
+    _render("$x$")
 
-        return rendered_image
+
+class Latex(commands.Cog):
+    """Renders latex."""
 
     @staticmethod
     def _prepare_input(text: str) -> str:
@@ -71,31 +81,39 @@ class Latex(commands.Cog):
         else:
             return text
 
+    async def render(self, ctx: commands.Context, text: str) -> bytes:
+        """
+        Get the PNG encoded image of `text`, rendering it if it isn't cached.
+
+        Renders of the same text that are requested while one is in progress share that render,
+        but every request counts towards the image processing limits of its own user.
+        """
+        key = RenderCache.make_key(text, RENDER_DPI)
+        if (image := await RENDER_CACHE.get(key)) is not None:
+            return image
+
+        try:
+            image = await image_workers.run_shared(
+                key, _render, text, user_id=ctx.author.id, on_queued=queue_notifier(ctx)
+            )
+        except ValueError as e:
+            raise commands.BadArgument(str(e))
+
+        # All requests that shared the render get it, but it only has to be cached once
+        if key not in RENDER_CACHE:
+            await RENDER_CACHE.set(key, image)
+        return image
+
     @commands.command()
-    @commands.max_concurrency(1, commands.BucketType.guild, wait=True)
     async def latex(self, ctx: commands.Context, *, text: str) -> None:
         """Renders the text in latex and sends the image."""
         text = self._prepare_input(text)
-        query_hash = hashlib.md5(text.encode()).hexdigest()
-        image_path = CACHE_DIRECTORY.joinpath(f"{query_hash}.png")
         async with ctx.typing():
-            if image_path.exists():
-                await ctx.send(file=discord.File(image_path))
-                return
-
-            with ThreadPoolExecutor() as pool:
-                image = await asyncio.get_running_loop().run_in_executor(
-                    pool, self._render, text, image_path
-                )
-
-            await ctx.send(file=discord.File(image, "latex.png"))
+            image = await self.render(ctx, text)
+            await ctx.send(file=discord.File(BytesIO(image), "latex.png"))
 
 
 def setup(bot: Bot) -> None:
     """Load the Latex Cog."""
-    # As we have resource issues on this cog,
-    # we have it currently disabled while we fix it.
-    import logging
-    logging.info("Latex cog is currently disabled. It won't be loaded.")
-    return
+    image_workers.register_preloader(_preload_mathtext)
     bot.add_cog(Latex())
@@ -2,9 +2,9 @@ import asyncio
 import logging
 import random
 import textwrap
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Optional, Union
 
 from aiohttp import BasicAuth, ClientError
 from discord import Colour, Embed, TextChannel
@@ -18,10 +18,12 @@ from bot.utils.converters import Subreddit
 from bot.utils.extensions import invoke_help_command
 from bot.utils.messages import sub_clyde
 from bot.utils.pagination import ImagePaginator, LinePaginator
+from bot.utils.time import time_since
 
 log = logging.getLogger(__name__)
 
 AccessToken = namedtuple("AccessToken", ["token", "expires_at"])
+Listing = namedtuple("Listing", ["posts", "fetched_at"])
 
 
 class Reddit(Cog):
@@ -32,6 +34,19 @@ class Reddit(Cog):
     OAUTH_URL = "https://oauth.reddit.com"
     MAX_RETRIES = 3
 
+    # How long the top posts of each timeframe are cached for, in seconds
+    LISTING_TTLS = {
+        "hour": 5 * 60,
+        "day": 30 * 60,
+        "week": 3 * 60 * 60,
+        "month": 6 * 60 * 60,
+        "year": 6 * 60 * 60,
+        "all": 6 * 60 * 60,
+    }
+    MAX_CACHED_LISTINGS = 100
+    # How long before midnight the posts of the relayed subreddits are refreshed
+    PREWARM_LEAD = timedelta(minutes=10)
+
     def __init__(self, bot: Bot):
         self.bot = bot
 
@@ -39,12 +54,21 @@ class Reddit(Cog):
         self.access_token = None
         self.client_auth = BasicAuth(RedditConfig.client_id, RedditConfig.secret)
 
+        # The token renewal in progress, shared by everyone that needs a new token at the same time
+        self.token_renewal: Optional[asyncio.Task] = None
+
+        # Mapping of (subreddit, timeframe) to its cached top posts, in least recently used order
+        self.listings: OrderedDict[tuple[str, str], Listing] = OrderedDict()
+        self.listing_fetches: dict[tuple[str, str], asyncio.Task] = {}
+
         bot.loop.create_task(self.init_reddit_ready())
         self.auto_poster_loop.start()
+        self.prewarm_loop.start()
 
     def cog_unload(self) -> None:
-        """Stop the loop task and revoke the access token when the cog is unloaded."""
+        """Stop the loop tasks and revoke the access token when the cog is unloaded."""
         self.auto_poster_loop.cancel()
+        self.prewarm_loop.cancel()
         if self.access_token and self.access_token.expires_at > datetime.utcnow():
             asyncio.create_task(self.revoke_access_token())
 
@@ -126,35 +150,32 @@ class Reddit(Cog):
         A token is valid for 1 hour. There will be MAX_RETRIES to get a token, after which the cog
         will be unloaded and a ClientError raised if retrieval was still unsuccessful.
         """
-        for i in range(1, self.MAX_RETRIES + 1):
-            response = await self.bot.http_session.post(
-                url=f"{self.URL}/api/v1/access_token",
-                headers=self.HEADERS,
-                auth=self.client_auth,
-                data={
-                    "grant_type": "client_credentials",
-                    "duration": "temporary"
-                }
-            )
+        response = await self.bot.api_client.post(
+            url=f"{self.URL}/api/v1/access_token",
+            headers=self.HEADERS,
+            auth=self.client_auth,
+            data={
+                "grant_type": "client_credentials",
+                "duration": "temporary"
+            },
+            retries=self.MAX_RETRIES - 1
+        )
 
-            if response.status == 200 and response.content_type == "application/json":
-                content = await response.json()
-                expiration = int(content["expires_in"]) - 60  # Subtract 1 minute for leeway.
-                self.access_token = AccessToken(
-                    token=content["access_token"],
-                    expires_at=datetime.utcnow() + timedelta(seconds=expiration)
-                )
+        if response.status == 200 and response.content_type == "application/json":
+            content = response.json()
+            expiration = int(content["expires_in"]) - 60  # Subtract 1 minute for leeway.
+            self.access_token = AccessToken(
+                token=content["access_token"],
+                expires_at=datetime.utcnow() + timedelta(seconds=expiration)
+            )
 
-                log.debug(f"New token acquired; expires on UTC {self.access_token.expires_at}")
-                return
-            else:
-                log.debug(
-                    f"Failed to get an access token: "
-                    f"status {response.status} & content type {response.content_type}; "
-                    f"retrying ({i}/{self.MAX_RETRIES})"
-                )
+            log.debug(f"New token acquired; expires on UTC {self.access_token.expires_at}")
+            return
 
-            await asyncio.sleep(3)
+        log.debug(
+            f"Failed to get an access token: "
+            f"status {response.status} & content type {response.content_type}"
+        )
 
         self.bot.remove_cog(self.qualified_name)
         raise ClientError("Authentication with the Reddit API failed. Unloading the cog.")
@@ -165,7 +186,7 @@ class Reddit(Cog):
 
         For security reasons, it's good practice to revoke the token when it's no longer being used.
         """
-        response = await self.bot.http_session.post(
+        response = await self.bot.api_client.post(
             url=f"{self.URL}/api/v1/revoke_token",
             headers=self.HEADERS,
             auth=self.client_auth,
@@ -180,37 +201,90 @@ class Reddit(Cog):
         else:
             log.warning(f"Unable to revoke access token: status {response.status}.")
 
+    async def renew_access_token(self) -> None:
+        """Renew the access token if necessary, making only one request when several callers need it at once."""
+        if self.access_token and self.access_token.expires_at >= datetime.utcnow():
+            return
+
+        if self.token_renewal is None or self.token_renewal.done():
+            self.token_renewal = asyncio.create_task(self.get_access_token())
+
+        # Shielded so that cancelling one of the callers doesn't cancel the renewal for the others
+        await asyncio.shield(self.token_renewal)
+
     async def fetch_posts(self, route: str, *, amount: int = 25, params: dict = None) -> list[dict]:
         """A helper method to fetch a certain amount of Reddit posts at a given route."""
         # Reddit's JSON responses only provide 25 posts at most.
         if not 25 >= amount > 0:
             raise ValueError("Invalid amount of subreddit posts requested.")
 
-        # Renew the token if necessary.
-        if not self.access_token or self.access_token.expires_at < datetime.utcnow():
-            await self.get_access_token()
+        await self.renew_access_token()
 
         url = f"{self.OAUTH_URL}/{route}"
-        for _ in range(self.MAX_RETRIES):
-            response = await self.bot.http_session.get(
-                url=url,
-                headers={**self.HEADERS, "Authorization": f"bearer {self.access_token.token}"},
-                params=params
-            )
-            if response.status == 200 and response.content_type == 'application/json':
-                # Got appropriate response - process and return.
-                content = await response.json()
-                posts = content["data"]["children"]
-
-                filtered_posts = [post for post in posts if not post["data"]["over_18"]]
+        response = await self.bot.api_client.get(
+            url=url,
+            headers={**self.HEADERS, "Authorization": f"bearer {self.access_token.token}"},
+            params=params,
+            retries=self.MAX_RETRIES - 1
+        )
+        if response.status == 200 and response.content_type == 'application/json':
+            # Got appropriate response - process and return.
+            content = response.json()
+            posts = content["data"]["children"]
 
-                return filtered_posts[:amount]
+            filtered_posts = [post for post in posts if not post["data"]["over_18"]]
 
-            await asyncio.sleep(3)
+            return filtered_posts[:amount]
 
         log.debug(f"Invalid response from: {url} - status code {response.status}, mimetype {response.content_type}")
         return list()  # Failed to get appropriate response within allowed number of retries.
 
+    async def get_listing(self, subreddit: str, time: str, *, refresh: bool = False) -> Listing:
+        """
+        Get the top posts of `subreddit` within the timeframe `time`.
+
+        The posts are cached for the duration in LISTING_TTLS for their timeframe, unless
+        `refresh` is True, and concurrent requests for the same posts share one fetch.
+        """
+        key = (subreddit.lower(), time)
+        listing = self.listings.get(key)
+
+        if listing is not None and not refresh:
+            age = datetime.utcnow() - listing.fetched_at
+            if age.total_seconds() < self.LISTING_TTLS.get(time, 0):
+                self.listings.move_to_end(key)
+                return listing
+
+        if key not in self.listing_fetches:
+            task = asyncio.create_task(self._fetch_listing(key, subreddit, time))
+            task.add_done_callback(lambda _: self.listing_fetches.pop(key, None))
+            self.listing_fetches[key] = task
+
+        return await asyncio.shield(self.listing_fetches[key])
+
+    async def _fetch_listing(self, key: tuple[str, str], subreddit: str, time: str) -> Listing:
+        """Fetch the top posts of `subreddit` within the timeframe `time` and cache them."""
+        posts = await self.fetch_posts(route=f"{subreddit}/top", params={"t": time})
+        listing = Listing(posts, datetime.utcnow())
+
+        if not posts:
+            # Don't cache failures, but rather use the posts that were cached before if there are any
+            return self.listings.get(key, listing)
+
+        self.listings[key] = listing
+        self.listings.move_to_end(key)
+        while len(self.listings) > self.MAX_CACHED_LISTINGS:
+            self.listings.popitem(last=False)
+
+        return listing
+
+    def listing_footer(self, subreddit: str, time: str) -> Optional[str]:
+        """Get a footer saying how long ago the cached top posts of `subreddit` within `time` were fetched."""
+        listing = self.listings.get((subreddit.lower(), time))
+        if listing is None:
+            return None
+        return f"Updated {time_since(listing.fetched_at, precision='minutes', max_units=1)}"
+
     async def get_top_posts(
             self, subreddit: Subreddit, time: str = "all", amount: int = 5, paginate: bool = False
     ) -> Union[Embed, list[tuple]]:
@@ -224,11 +298,11 @@ class Reddit(Cog):
         """
         embed = Embed()
 
-        posts = await self.fetch_posts(
-            route=f"{subreddit}/top",
-            amount=amount,
-            params={"t": time}
-        )
+        if not 25 >= amount > 0:
+            raise ValueError("Invalid amount of subreddit posts requested.")
+
+        listing = await self.get_listing(subreddit, time)
+        posts = listing.posts[:amount]
         if not posts:
             embed.title = random.choice(ERROR_REPLIES)
             embed.colour = Colour.red()
@@ -245,8 +319,36 @@ class Reddit(Cog):
         # Use only starting summary page for #reddit channel posts.
         embed.description = self.build_pagination_pages(posts, paginate=False)
         embed.colour = Colour.blurple()
+        embed.set_footer(text=self.listing_footer(subreddit, time))
         return embed
 
+    @loop()
+    async def prewarm_loop(self) -> None:
+        """Refresh the top posts of the relayed subreddits shortly before the auto poster needs them."""
+        now = datetime.utcnow()
+        tomorrow = now + timedelta(days=1)
+        midnight_tomorrow = tomorrow.replace(hour=0, minute=0, second=0)
+
+        await sleep_until(midnight_tomorrow - self.PREWARM_LEAD)
+
+        timeframes = ["day"]
+        if midnight_tomorrow.weekday() == 0:
+            # The top weekly posts are posted on mondays as well
+            timeframes.append("week")
+
+        log.debug(f"Refreshing the top posts of {len(RedditConfig.subreddits)} subreddits for the auto poster.")
+        refreshes = [(subreddit, time) for subreddit in RedditConfig.subreddits for time in timeframes]
+        results = await asyncio.gather(
+            *(self.get_listing(subreddit, time, refresh=True) for subreddit, time in refreshes),
+            return_exceptions=True
+        )
+        for (subreddit, time), result in zip(refreshes, results):
+            if isinstance(result, Exception):
+                log.warning(f"Failed to refresh the top {time} posts of {subreddit}: {result!r}")
+
+        # Don't refresh again until the next day
+        await sleep_until(midnight_tomorrow)
+
     @loop()
     async def auto_poster_loop(self) -> None:
         """Post the top 5 posts daily, and the top 5 posts weekly."""
@@ -315,7 +417,7 @@ class Reddit(Cog):
             color=Colour.blurple()
         )
 
-        await ImagePaginator.paginate(pages, ctx, embed)
+        await ImagePaginator.paginate(pages, ctx, embed, footer_text=self.listing_footer(subreddit, "all"))
 
     @reddit_group.command(name="daily")
     async def daily_command(self, ctx: Context, subreddit: Subreddit = "r/Python") -> None:
@@ -328,7 +430,7 @@ class Reddit(Cog):
             color=Colour.blurple()
         )
 
-        await ImagePaginator.paginate(pages, ctx, embed)
+        await ImagePaginator.paginate(pages, ctx, embed, footer_text=self.listing_footer(subreddit, "day"))
 
     @reddit_group.command(name="weekly")
     async def weekly_command(self, ctx: Context, subreddit: Subreddit = "r/Python") -> None:
@@ -341,7 +443,7 @@ class Reddit(Cog):
             color=Colour.blurple()
         )
 
-        await ImagePaginator.paginate(pages, ctx, embed)
+        await ImagePaginator.paginate(pages, ctx, embed, footer_text=self.listing_footer(subreddit, "week"))
 
     @has_any_role(*STAFF_ROLES)
     @reddit_group.command(name="subreddits", aliases=("subs",))
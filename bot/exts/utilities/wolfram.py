@@ -1,3 +1,6 @@
+import base64
+import hashlib
+import json
 import logging
 from io import BytesIO
 from typing import Callable, Optional
@@ -5,6 +8,7 @@ from urllib.parse import urlencode
 
 import arrow
 import discord
+from async_rediscache import RedisCache
 from discord import Embed
 from discord.ext import commands
 from discord.ext.commands import BucketType, Cog, Context, check, group
@@ -22,11 +26,138 @@ WOLF_IMAGE = "https://www.symbols.com/gi.php?type=1&id=2886&i=1"
 
 MAX_PODS = 20
 
+# Answers are cached for this long. Pod pages are kept for a shorter time, as they
+# link to images that Wolfram|Alpha only hosts temporarily.
+ANSWER_CACHE_TTL = 7 * 24 * 60 * 60  # Seconds
+POD_PAGES_CACHE_TTL = 60 * 60  # Seconds
+# Answers with these statuses are cached, the others are errors that may go away
+CACHED_STATUSES = frozenset({200, 501})
+
 # Allows for 10 wolfram calls pr user pr day
 usercd = commands.CooldownMapping.from_cooldown(Wolfram.user_limit_day, 60 * 60 * 24, BucketType.user)
 
-# Allows for max api requests / days in month per day for the entire guild (Temporary)
-guildcd = commands.CooldownMapping.from_cooldown(Wolfram.guild_limit_day, 60 * 60 * 24, BucketType.guild)
+# Responses are stored in keys under the namespace of this cache, so they can expire individually
+response_cache = RedisCache(namespace="wolfram_responses")
+# The number of API calls made per day and per month, in keys that expire once they're no longer needed
+quota_cache = RedisCache(namespace="wolfram_quota")
+
+
+class WolframQuota:
+    """
+    Accounts for the calls made to the Wolfram|Alpha API, to keep them within the app's quota.
+
+    Calls are counted per UTC day and month in Redis, so that the counts survive restarts.
+    The daily budget spreads the monthly quota over the month.
+    """
+
+    def __init__(self, daily_limit: int, monthly_limit: int):
+        self.daily_limit = daily_limit
+        self.monthly_limit = monthly_limit
+
+    @staticmethod
+    def _keys() -> tuple[str, str]:
+        """Get the keys of the call counts of the current day and month."""
+        now = arrow.utcnow()
+        return (
+            f"{quota_cache.namespace}:day:{now.format('YYYY-MM-DD')}",
+            f"{quota_cache.namespace}:month:{now.format('YYYY-MM')}",
+        )
+
+    async def remaining(self) -> tuple[int, int]:
+        """Get the number of calls that can still be made today and this month."""
+        day_key, month_key = self._keys()
+        with await quota_cache._get_pool_connection() as connection:
+            day_calls, month_calls = await connection.mget(day_key, month_key)
+
+        return (
+            max(0, self.daily_limit - int(day_calls or 0)),
+            max(0, self.monthly_limit - int(month_calls or 0)),
+        )
+
+    async def spend(self) -> bool:
+        """Count a call against the budget, returning False instead if the daily or monthly budget is used up."""
+        day_key, month_key = self._keys()
+        with await quota_cache._get_pool_connection() as connection:
+            transaction = connection.multi_exec()
+            transaction.incr(day_key)
+            transaction.expire(day_key, 2 * 24 * 60 * 60)
+            transaction.incr(month_key)
+            transaction.expire(month_key, 32 * 24 * 60 * 60)
+            day_calls, _, month_calls, _ = await transaction.execute()
+
+            if day_calls > self.daily_limit or month_calls > self.monthly_limit:
+                transaction = connection.multi_exec()
+                transaction.decr(day_key)
+                transaction.decr(month_key)
+                await transaction.execute()
+                return False
+
+        log.debug(
+            f"Made Wolfram|Alpha call {day_calls}/{self.daily_limit} of the day "
+            f"and {month_calls}/{self.monthly_limit} of the month."
+        )
+        return True
+
+
+quota = WolframQuota(Wolfram.guild_limit_day, Wolfram.monthly_limit)
+
+
+def normalise_query(query: str) -> str:
+    """Normalise `query`, so that queries that only differ in case or whitespace share their cached responses."""
+    return " ".join(query.lower().split())
+
+
+def _cache_key(endpoint: str, query: str) -> str:
+    """Get the Redis key of the cached response of `endpoint` to `query`."""
+    query_hash = hashlib.sha256(normalise_query(query).encode()).hexdigest()
+    return f"{response_cache.namespace}:{endpoint}:{query_hash}"
+
+
+async def _get_cached(endpoint: str, query: str) -> Optional[dict]:
+    """Get the response of `endpoint` to `query` that's cached, if any."""
+    with await response_cache._get_pool_connection() as connection:
+        cached = await connection.get(_cache_key(endpoint, query), encoding="utf-8")
+
+    return None if cached is None else json.loads(cached)
+
+
+async def _store(endpoint: str, query: str, response: dict, ttl: int) -> None:
+    """Cache the response of `endpoint` to `query` for `ttl` seconds."""
+    with await response_cache._get_pool_connection() as connection:
+        await connection.set(_cache_key(endpoint, query), json.dumps(response), expire=ttl)
+
+
+async def get_answer(bot: Bot, endpoint: str, query: str, params: dict) -> Optional[tuple[int, bytes]]:
+    """
+    Get the status and body of the response of `endpoint` to `query`, made with `params`.
+
+    Answers are served from the cache where possible. Otherwise, the call is counted
+    against the quota, and None is returned if the quota doesn't allow for it.
+    """
+    if (cached := await _get_cached(endpoint, query)) is not None:
+        log.trace(f"Using the cached Wolfram|Alpha {endpoint} response to {query!r}.")
+        return cached["status"], base64.b64decode(cached["body"])
+
+    if not await quota.spend():
+        return None
+
+    # Not retried, every attempt would use up another call of the quota that was only spent once
+    response = await bot.api_client.get(QUERY.format(request=endpoint), params=params, retries=0)
+    if response.status in CACHED_STATUSES:
+        cached = {"status": response.status, "body": base64.b64encode(response.body).decode()}
+        await _store(endpoint, query, cached, ANSWER_CACHE_TTL)
+
+    return response.status, response.body
+
+
+async def send_quota_exhausted(ctx: Context) -> None:
+    """Let the user know that the API can't be used until the quota resets."""
+    _, monthly = await quota.remaining()
+    if monthly:
+        message = "The max limit of requests for the server has been reached for today."
+    else:
+        message = "The max limit of requests for the server has been reached for this month."
+    await send_embed(ctx, message)
 
 
 async def send_embed(
@@ -56,19 +187,19 @@ async def send_embed(
 
 def custom_cooldown(*ignore: int) -> Callable:
     """
-    Implement per-user and per-guild cooldowns for requests to the Wolfram API.
+    Implement per-user cooldowns for requests to the Wolfram API.
 
-    A list of roles may be provided to ignore the per-user cooldown.
+    A list of roles may be provided to ignore the per-user cooldown. The calls
+    made for the whole server are limited by the quota instead, see `WolframQuota`.
     """
     async def predicate(ctx: Context) -> bool:
         if ctx.invoked_with == "help":
             # if the invoked command is help we don't want to increase the ratelimits since it's not actually
-            # invoking the command/making a request, so instead just check if the user/guild are on cooldown.
-            guild_cooldown = not guildcd.get_bucket(ctx.message).get_tokens() == 0  # if guild is on cooldown
+            # invoking the command/making a request, so instead just check if the user is on cooldown.
             # check the message is in a guild, and check user bucket if user is not ignored
             if ctx.guild and not any(r.id in ignore for r in ctx.author.roles):
-                return guild_cooldown and not usercd.get_bucket(ctx.message).get_tokens() == 0
-            return guild_cooldown
+                return not usercd.get_bucket(ctx.message).get_tokens() == 0
+            return True
 
         user_bucket = usercd.get_bucket(ctx.message)
 
@@ -85,21 +216,6 @@ def custom_cooldown(*ignore: int) -> Callable:
                 await send_embed(ctx, message)
                 return False
 
-        guild_bucket = guildcd.get_bucket(ctx.message)
-        guild_rate = guild_bucket.update_rate_limit()
-
-        # Repr has a token attribute to read requests left
-        log.debug(guild_bucket)
-
-        if guild_rate:
-            # Can't use api; cause: guild limit
-            message = (
-                "The max limit of requests for the server has been reached for today.\n"
-                f"Cooldown: {int(guild_rate)}"
-            )
-            await send_embed(ctx, message)
-            return False
-
         return True
 
     return check(predicate)
@@ -108,6 +224,10 @@ def custom_cooldown(*ignore: int) -> Callable:
 async def get_pod_pages(ctx: Context, bot: Bot, query: str) -> Optional[list[tuple[str, str]]]:
     """Get the Wolfram API pod pages for the provided query."""
     async with ctx.typing():
+        if (cached := await _get_cached("query", query)) is not None:
+            log.trace(f"Using the cached Wolfram|Alpha pod pages for {query!r}.")
+            return [tuple(page) for page in cached["pages"]]
+
         params = {
             "input": query,
             "appid": APPID,
@@ -119,10 +239,14 @@ async def get_pod_pages(ctx: Context, bot: Bot, query: str) -> Optional[list[tup
         }
         request_url = QUERY.format(request="query")
 
-        async with bot.http_session.get(url=request_url, params=params) as response:
-            json = await response.json(content_type="text/plain")
+        if not await quota.spend():
+            await send_quota_exhausted(ctx)
+            return None
+
+        response = await bot.api_client.get(request_url, params=params, retries=0)
+        data = response.json()
 
-        result = json["queryresult"]
+        result = data["queryresult"]
         log_full_url = f"{request_url}?{urlencode(params)}"
         if result["error"]:
             # API key not set up correctly
@@ -130,13 +254,13 @@ async def get_pod_pages(ctx: Context, bot: Bot, query: str) -> Optional[list[tup
                 message = "Wolfram API key is invalid or missing."
                 log.warning(
                     "API key seems to be missing, or invalid when "
-                    f"processing a wolfram request: {log_full_url}, Response: {json}"
+                    f"processing a wolfram request: {log_full_url}, Response: {data}"
                 )
                 await send_embed(ctx, message)
                 return None
 
             message = "Something went wrong internally with your request, please notify staff!"
-            log.warning(f"Something went wrong getting a response from wolfram: {log_full_url}, Response: {json}")
+            log.warning(f"Something went wrong getting a response from wolfram: {log_full_url}, Response: {data}")
             await send_embed(ctx, message)
             return None
 
@@ -159,6 +283,8 @@ async def get_pod_pages(ctx: Context, bot: Bot, query: str) -> Optional[list[tup
                 title = sub.get("title") or sub.get("plaintext") or sub.get("id", "")
                 img = sub["img"]["src"]
                 pages.append((title, img))
+
+        await _store("query", query, {"pages": pages}, POD_PAGES_CACHE_TTL)
         return pages
 
 
@@ -179,13 +305,14 @@ class Wolfram(Cog):
             "latlong": "0.0,0.0",
             "ip": "1.1.1.1"
         }
-        request_url = QUERY.format(request="simple")
 
         # Give feedback that the bot is working.
         async with ctx.typing():
-            async with self.bot.http_session.get(url=request_url, params=params) as response:
-                status = response.status
-                image_bytes = await response.read()
+            if (answer := await get_answer(self.bot, "simple", query, params)) is None:
+                await send_quota_exhausted(ctx)
+                return
+
+            status, image_bytes = answer
 
             f = discord.File(BytesIO(image_bytes), filename="image.png")
             image_url = "attachment://image.png"
@@ -231,7 +358,7 @@ class Wolfram(Cog):
         )
         embed.colour = Colours.soft_orange
 
-        await ImagePaginator.paginate(pages, ctx, embed)
+        await ImagePaginator.paginate(pages, ctx, embed, prefetch_images=True)
 
     @wolfram_command.command(name="cut", aliases=("c",))
     @custom_cooldown(*STAFF_ROLES)
@@ -253,6 +380,16 @@ class Wolfram(Cog):
 
         await send_embed(ctx, page[0], colour=Colours.soft_orange, img_url=page[1])
 
+    @wolfram_command.command(name="quota", aliases=("q",))
+    async def wolfram_quota_command(self, ctx: Context) -> None:
+        """Shows how many Wolfram|Alpha requests the server has left."""
+        daily, monthly = await quota.remaining()
+        message = (
+            f"Requests left today: {daily}/{quota.daily_limit}\n"
+            f"Requests left this month: {monthly}/{quota.monthly_limit}"
+        )
+        await send_embed(ctx, message, Colours.soft_orange, footer="Answers that were asked for before are free.")
+
     @wolfram_command.command(name="short", aliases=("sh", "s"))
     @custom_cooldown(*STAFF_ROLES)
     async def wolfram_short_command(self, ctx: Context, *, query: str) -> None:
@@ -264,13 +401,15 @@ class Wolfram(Cog):
             "latlong": "0.0,0.0",
             "ip": "1.1.1.1"
         }
-        request_url = QUERY.format(request="result")
 
         # Give feedback that the bot is working.
         async with ctx.typing():
-            async with self.bot.http_session.get(url=request_url, params=params) as response:
-                status = response.status
-                response_text = await response.text()
+            if (answer := await get_answer(self.bot, "result", query, params)) is None:
+                await send_quota_exhausted(ctx)
+                return
+
+            status, response_body = answer
+            response_text = response_body.decode("utf-8", errors="replace")
 
             if status == 501:
                 message = "Failed to get response."
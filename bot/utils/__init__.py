@@ -67,7 +67,7 @@ async def disambiguate(
         if embed is None:
             embed = discord.Embed()
 
-        coro1 = ctx.bot.wait_for("message", check=check, timeout=timeout)
+        coro1 = ctx.bot.waiters.wait_for("message", channel_id=ctx.channel.id, check=check, timeout=timeout)
         coro2 = LinePaginator.paginate(
             choices, ctx, embed=embed, max_lines=entries_per_page,
             empty=empty, max_size=6000, timeout=9000
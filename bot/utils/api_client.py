@@ -0,0 +1,304 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from bot.utils.exceptions import APIError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HOST_LIMIT = 8
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30)
+DEFAULT_MAX_RETRIES = 2
+MAX_CACHED_BYTES = 16 * 2**20
+
+BACKOFF_BASE = 0.5  # Seconds
+BACKOFF_MAX = 10  # Seconds
+MAX_RETRY_AFTER = 60  # Seconds
+
+# Responses with these statuses are worth trying again after a short while
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Only requests with these methods are retried by default, as retrying the others may repeat side effects
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclasses.dataclass(frozen=True)
+class APIResponse:
+    """
+    A fully read HTTP response.
+
+    The body is read before the connection is released, so the response can be
+    used, cached and shared between requests without worrying about its lifetime.
+    """
+
+    method: str
+    url: str
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether the status of the response is below 400."""
+        return self.status < 400
+
+    @property
+    def content_type(self) -> str:
+        """The content type of the response, without its parameters."""
+        return self.headers.get("Content-Type", "").partition(";")[0].strip().lower()
+
+    def text(self, encoding: str = "utf-8") -> str:
+        """Decode the body of the response."""
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self) -> Any:
+        """Decode the body of the response as JSON."""
+        return json.loads(self.body)
+
+    def raise_for_status(self, api: str) -> None:
+        """Raise an `APIError` for `api` if the status of the response is 400 or higher."""
+        if not self.ok:
+            raise APIError(api, self.status, self.text()[:200] or None)
+
+
+@dataclasses.dataclass
+class _CacheEntry:
+    response: APIResponse
+    expires_at: float
+
+
+def _freeze(value: Any) -> Any:
+    """Turn `value` into something hashable that doesn't depend on the order of mappings."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return repr(value)
+
+
+def _cache_control(headers: Mapping[str, str]) -> dict[str, Optional[str]]:
+    """Parse the Cache-Control header into a mapping of directives to their values."""
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class APIClient:
+    """
+    A client for external HTTP APIs built on top of the bot's HTTP session.
+
+    - At most `host_limit` requests are made to the same host at once. The limit can
+      be changed for specific hosts with `set_host_limit`.
+    - Requests that fail with a connection error, a timeout or a status in
+      `RETRY_STATUSES` are retried up to `max_retries` times, with an exponential
+      backoff and full jitter, or after the time given in the Retry-After header.
+      Only idempotent requests are retried unless `retries` is given explicitly.
+    - GET responses can be cached by passing a `cache_ttl`. The TTL is shortened by
+      the max-age of the response and `no-cache`/`no-store` are honoured. Expired
+      responses with an ETag or Last-Modified header are revalidated with a
+      conditional request instead of being fetched again.
+    - Identical GET requests that are in flight at the same time share one request.
+    - Responses are read in full and released before they're returned, see `APIResponse`.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        host_limit: int = DEFAULT_HOST_LIMIT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_cached_bytes: int = MAX_CACHED_BYTES,
+    ):
+        self.session = session
+        self.host_limit = host_limit
+        self.max_retries = max_retries
+        self.max_cached_bytes = max_cached_bytes
+
+        self._host_limits: dict[str, int] = {}
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+
+        self._cache: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+
+        self.requests = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.revalidations = 0
+        self.coalesced = 0
+
+    @property
+    def cached_bytes(self) -> int:
+        """The total size of the bodies of the cached responses."""
+        return self._cached_bytes
+
+    def set_host_limit(self, host: str, limit: int) -> None:
+        """Allow at most `limit` concurrent requests to `host`."""
+        if host in self._host_slots:
+            log.warning(f"The request limit of {host} was changed after requests were made to it.")
+            del self._host_slots[host]
+        self._host_limits[host] = limit
+
+    def _slots_for(self, host: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting the concurrent requests to `host`."""
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self._host_limits.get(host, self.host_limit))
+        return self._host_slots[host]
+
+    async def get(self, url: str, **kwargs) -> APIResponse:
+        """Make a GET request, see `request`."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> APIResponse:
+        """Make a POST request, see `request`."""
+        return await self.request("POST", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> APIResponse:
+        """Make a HEAD request, see `request`."""
+        return await self.request("HEAD", url, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        cache_ttl: float = 0,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> APIResponse:
+        """
+        Make a request and return the response once it's been read in full.
+
+        `cache_ttl` is the number of seconds a GET response may be cached for, and
+        `retries` overrides the number of times a failed request is retried. All
+        other keyword arguments are passed to `aiohttp.ClientSession.request`.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+
+        if method != "GET" or "data" in kwargs or "json" in kwargs:
+            return await self._send(method, url, retries, kwargs)
+
+        key = (url, _freeze({name: value for name, value in kwargs.items() if name != "timeout"}))
+
+        entry = self._cache.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            log.trace(f"Using cached response for GET {url}.")
+            return entry.response
+
+        if key in self._in_flight:
+            self.coalesced += 1
+            log.trace(f"Waiting for the identical in-flight request to GET {url}.")
+        else:
+            task = asyncio.create_task(self._get(key, url, cache_ttl, retries, kwargs))
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self._in_flight[key] = task
+
+        # Shielded so that cancelling one of the callers doesn't cancel the request for the others
+        return await asyncio.shield(self._in_flight[key])
+
+    async def _get(self, key: tuple, url: str, cache_ttl: float, retries: int, kwargs: dict) -> APIResponse:
+        """Make a GET request, revalidating and caching the response where possible."""
+        entry = self._cache.get(key)
+        if entry is not None:
+            validators = {}
+            if etag := entry.response.headers.get("ETag"):
+                validators["If-None-Match"] = etag
+            if last_modified := entry.response.headers.get("Last-Modified"):
+                validators["If-Modified-Since"] = last_modified
+            kwargs = {**kwargs, "headers": {**(kwargs.get("headers") or {}), **validators}}
+
+        response = await self._send("GET", url, retries, kwargs)
+
+        if entry is not None and response.status == 304:
+            self.revalidations += 1
+            log.trace(f"Cached response for GET {url} is still valid.")
+            entry.expires_at = time.monotonic() + self._ttl_for(response, cache_ttl)
+            self._cache.move_to_end(key)
+            return dataclasses.replace(entry.response, from_cache=True)
+
+        if cache_ttl and response.status == 200:
+            self._store(key, response, cache_ttl)
+        return response
+
+    @staticmethod
+    def _ttl_for(response: APIResponse, cache_ttl: float) -> float:
+        """Get the number of seconds `response` may be cached for, taking its Cache-Control header into account."""
+        directives = _cache_control(response.headers)
+        if "no-cache" in directives:
+            return 0
+
+        try:
+            return min(cache_ttl, int(directives["max-age"]))
+        except (KeyError, TypeError, ValueError):
+            return cache_ttl
+
+    def _store(self, key: tuple, response: APIResponse, cache_ttl: float) -> None:
+        """Cache `response`, evicting the least recently used responses if the cache grows too large."""
+        if "no-store" in _cache_control(response.headers) or len(response.body) > self.max_cached_bytes:
+            return
+
+        ttl = self._ttl_for(response, cache_ttl)
+        # Responses that can be revalidated are worth keeping even if they expire immediately
+        if not ttl and "ETag" not in response.headers and "Last-Modified" not in response.headers:
+            return
+
+        if key in self._cache:
+            self._cached_bytes -= len(self._cache.pop(key).response.body)
+
+        self._cache[key] = _CacheEntry(dataclasses.replace(response, from_cache=True), time.monotonic() + ttl)
+        self._cached_bytes += len(response.body)
+
+        while self._cached_bytes > self.max_cached_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted.response.body)
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+        """Get the number of seconds to wait before retrying for the `attempt`th time."""
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), MAX_RETRY_AFTER)
+            except ValueError:
+                pass  # It's an HTTP date, which isn't worth parsing for this
+
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    async def _send(self, method: str, url: str, retries: int, kwargs: dict) -> APIResponse:
+        """Make the request, retrying it according to the retry policy."""
+        host = urlsplit(url).hostname
+        for attempt in range(retries + 1):
+            retry_after = None
+            try:
+                async with self._slots_for(host):
+                    self.requests += 1
+                    async with self.session.request(method, url, **kwargs) as resp:
+                        response = APIResponse(method, str(resp.url), resp.status, resp.headers, await resp.read())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    raise
+                log.debug(f"{method} {url} failed with {e!r}, retrying ({attempt + 1}/{retries}).")
+            else:
+                if response.status not in RETRY_STATUSES or attempt == retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                log.debug(f"{method} {url} returned status {response.status}, retrying ({attempt + 1}/{retries}).")
+
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
@@ -4,6 +4,8 @@ from typing import Union
 import discord
 from discord.ext import commands
 
+SUBREDDIT_CACHE_TTL = 60 * 60  # Seconds
+
 
 class WrappedMessageConverter(commands.MessageConverter):
     """A converter that handles embed-suppressed links like <http://example.com>."""
@@ -101,12 +103,13 @@ class Subreddit(commands.Converter):
         if not sub.startswith("r/"):
             sub = f"r/{sub}"
 
-        resp = await ctx.bot.http_session.get(
+        resp = await ctx.bot.api_client.get(
             "https://www.reddit.com/subreddits/search.json",
-            params={"q": sub}
+            params={"q": sub},
+            cache_ttl=SUBREDDIT_CACHE_TTL
         )
 
-        json = await resp.json()
+        json = resp.json()
         if not json["data"]["children"]:
             raise commands.BadArgument(
                 f"The subreddit `{sub}` either doesn't exist, or it has no posts."
@@ -15,3 +15,9 @@ class APIError(Exception):
         self.api = api
         self.status_code = status_code
         self.error_msg = error_msg
+
+
+class ImageQueueFullError(Exception):
+    """Raised when an image processing job is rejected because too many jobs are pending."""
+
+    pass
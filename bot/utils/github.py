@@ -0,0 +1,197 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from async_rediscache import RedisCache
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from bot.constants import Tokens
+from bot.utils.api_client import APIClient, APIResponse
+
+log = logging.getLogger(__name__)
+
+GITHUB_API_HOST = "api.github.com"
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+REQUEST_HEADERS = {"Accept": "application/vnd.github.v3+json"}
+if GITHUB_TOKEN := Tokens.github:
+    REQUEST_HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
+
+# Cached responses are kept this long after they were last validated
+CACHE_EXPIRY = 24 * 60 * 60  # Seconds
+# Once less than this fraction of a rate limit is left, cached responses are used without revalidating them
+LOW_BUDGET_FRACTION = 0.1
+
+# The headers that are kept with cached responses
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+# Responses are stored in keys under the namespace of this cache, so they can expire individually
+response_cache = RedisCache(namespace="github_responses")
+
+
+@dataclasses.dataclass
+class RateLimit:
+    """The state of one of GitHub's rate limits, as last reported by the API."""
+
+    limit: int
+    remaining: int
+    reset: float
+
+    @property
+    def low(self) -> bool:
+        """Whether the budget is running low and hasn't been reset since."""
+        return self.reset > time.time() and self.remaining <= self.limit * LOW_BUDGET_FRACTION
+
+
+class GitHubClient:
+    """
+    A client for the GitHub API that caches responses in Redis.
+
+    Cached responses are revalidated with conditional requests, which don't count
+    against the rate limit when the response is unchanged. The rate limits reported
+    by GitHub are tracked for every resource, and while the budget of a resource is
+    low, cached responses are used as they are, without revalidating them.
+    """
+
+    def __init__(self, api_client: APIClient):
+        self.api_client = api_client
+        self.rate_limits: dict[str, RateLimit] = {}
+
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    @staticmethod
+    def _resource_for(url: str) -> str:
+        """Get the name of the rate limit that requests to `url` count against."""
+        return "search" if urlsplit(url).path.startswith("/search/") else "core"
+
+    @staticmethod
+    def _cache_key(url: str, headers: dict, params: Optional[dict]) -> str:
+        """Get the Redis key of the response to the request."""
+        request = json.dumps([url, headers.get("Accept"), sorted((params or {}).items())], default=str)
+        return f"{response_cache.namespace}:{hashlib.sha256(request.encode()).hexdigest()}"
+
+    @property
+    def can_use_graphql(self) -> bool:
+        """Whether the GraphQL API can be used, which requires a token."""
+        return bool(GITHUB_TOKEN)
+
+    def remaining_budget(self, resource: str = "core") -> Optional[int]:
+        """Get the number of requests left for the rate limit of `resource`, or None if it isn't known yet."""
+        rate_limit = self.rate_limits.get(resource)
+        if rate_limit is None:
+            return None
+        if rate_limit.reset <= time.time():
+            return rate_limit.limit
+        return rate_limit.remaining
+
+    def _update_rate_limit(self, response: APIResponse) -> None:
+        """Record the rate limit reported in the headers of `response`."""
+        try:
+            rate_limit = RateLimit(
+                int(response.headers["X-RateLimit-Limit"]),
+                int(response.headers["X-RateLimit-Remaining"]),
+                float(response.headers["X-RateLimit-Reset"]),
+            )
+        except (KeyError, ValueError):
+            return
+
+        resource = response.headers.get("X-RateLimit-Resource", self._resource_for(response.url))
+        self.rate_limits[resource] = rate_limit
+        if rate_limit.low:
+            log.info(f"GitHub {resource} rate limit is running low, {rate_limit.remaining} requests remaining.")
+
+    async def _get_cached(self, key: str) -> Optional[APIResponse]:
+        """Get the cached response stored at `key`, if any."""
+        with await response_cache._get_pool_connection() as connection:
+            cached = await connection.get(key, encoding="utf-8")
+
+        if cached is None:
+            return None
+
+        cached = json.loads(cached)
+        return APIResponse(
+            "GET",
+            cached["url"],
+            200,
+            CIMultiDictProxy(CIMultiDict(cached["headers"])),
+            cached["body"].encode("utf-8"),
+            from_cache=True,
+        )
+
+    async def _store(self, key: str, response: APIResponse) -> None:
+        """Cache `response` at `key`, so that it can be revalidated later."""
+        cached = {
+            "url": response.url,
+            "headers": {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            "body": response.text(),
+        }
+        with await response_cache._get_pool_connection() as connection:
+            await connection.set(key, json.dumps(cached), expire=CACHE_EXPIRY)
+
+    async def _refresh_expiry(self, key: str) -> None:
+        """Keep the response cached at `key` for longer, after it was found to still be valid."""
+        with await response_cache._get_pool_connection() as connection:
+            await connection.expire(key, CACHE_EXPIRY)
+
+    async def get(self, url: str, *, headers: Optional[dict] = None, params: Optional[dict] = None) -> APIResponse:
+        """
+        Make a GET request to the GitHub API.
+
+        The default headers, including the token if there is one, are added to `headers`.
+        """
+        headers = {**REQUEST_HEADERS, **(headers or {})}
+        key = self._cache_key(url, headers, params)
+        cached = await self._get_cached(key)
+
+        rate_limit = self.rate_limits.get(self._resource_for(url))
+        if cached is not None and rate_limit is not None and rate_limit.low:
+            self.hits += 1
+            log.trace(f"Using cached GitHub response for {url} without revalidating, the rate limit is running low.")
+            return cached
+
+        if cached is not None:
+            if etag := cached.headers.get("ETag"):
+                headers["If-None-Match"] = etag
+            if last_modified := cached.headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = last_modified
+
+        response = await self.api_client.get(url, headers=headers, params=params)
+        self._update_rate_limit(response)
+
+        if cached is not None and response.status == 304:
+            self.revalidations += 1
+            await self._refresh_expiry(key)
+            return cached
+
+        self.misses += 1
+
+        if response.status == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+            await self._store(key, response)
+        elif cached is not None and response.status in (403, 429):
+            # Rate limited, the cached response is better than nothing
+            log.info(f"GitHub returned status {response.status} for {url}, using the cached response instead.")
+            return cached
+
+        return response
+
+    async def graphql(self, query: str, variables: Optional[dict] = None) -> APIResponse:
+        """
+        Make a query to the GraphQL API.
+
+        GraphQL responses aren't cached, but their rate limit is tracked like the others.
+        """
+        response = await self.api_client.post(
+            GRAPHQL_URL,
+            headers=REQUEST_HEADERS,
+            json={"query": query, "variables": variables or {}},
+            # Queries don't have side effects, so they're safe to retry
+            retries=self.api_client.max_retries,
+        )
+        self._update_rate_limit(response)
+        return response
@@ -4,6 +4,8 @@ from random import choice, randint
 from PIL import Image
 from PIL import ImageOps
 
+from bot.utils.image_assets import image_assets
+
 log = logging.getLogger()
 
 
@@ -22,8 +24,7 @@ def pentagram(im: Image) -> Image:
     """Adds pentagram to the image."""
     im = im.convert("RGB")
     wt, ht = im.size
-    penta = Image.open("bot/resources/holidays/halloween/bloody-pentagram.png")
-    penta = penta.resize((wt, ht))
+    penta = image_assets.get_shared("bot/resources/holidays/halloween/bloody-pentagram.png", size=(wt, ht))
     im.paste(penta, (0, 0), penta)
     return im
 
@@ -37,7 +38,7 @@ def bat(im: Image) -> Image:
     """
     im = im.convert("RGB")
     wt, ht = im.size
-    bat = Image.open("bot/resources/holidays/halloween/bat-clipart.png")
+    bat = image_assets.get_shared("bot/resources/holidays/halloween/bat-clipart.png")
     bat_size = randint(wt//10, wt//7)
     rot = randint(0, 90)
     bat = bat.resize((bat_size, bat_size))
@@ -50,9 +51,13 @@ def bat(im: Image) -> Image:
     return im
 
 
+EFFECTS = (inversion, pentagram, bat)
+# The effects that give a different result every time
+RANDOM_EFFECTS = frozenset({bat})
+
+
 def get_random_effect(im: Image) -> Image:
     """Randomly selects and applies an effect."""
-    effects = [inversion, pentagram, bat]
-    effect = choice(effects)
+    effect = choice(EFFECTS)
     log.info("Spookyavatar's chosen effect: " + effect.__name__)
     return effect(im)
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+MAX_CACHED_BYTES = 128 * 2**20
+
+AssetKey = tuple[str, Optional[tuple[int, int]], Optional[str]]
+
+
+class ImageAssetRegistry:
+    """
+    A registry of decoded image resources.
+
+    Resources are decoded once, on first use, and stored at the size and in the
+    mode they're actually used at, so that they don't have to be opened, decoded
+    and resized on every use. At most `max_bytes` of decoded image data is kept;
+    the least recently used assets are dropped when that limit is exceeded.
+
+    `get` hands out copies that can be modified freely. `get_shared` hands out the
+    cached image itself, which is cheaper, but it must not be modified.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self._assets: OrderedDict[AssetKey, Image.Image] = OrderedDict()
+        self._cached_bytes = 0
+        # Assets may be requested from executor threads as well as the event loop
+        self._lock = threading.Lock()
+
+        # The time in seconds it took to load each asset the first time, for diagnostics
+        self.load_times: dict[AssetKey, float] = {}
+
+    @property
+    def cached_bytes(self) -> int:
+        """The approximate number of bytes of decoded image data that's cached."""
+        return self._cached_bytes
+
+    @staticmethod
+    def _size_of(image: Image.Image) -> int:
+        """Get the approximate number of bytes the decoded image data takes up."""
+        return image.width * image.height * len(image.getbands())
+
+    def _load(self, key: AssetKey) -> Image.Image:
+        """Open and decode the asset, then resize and convert it as requested."""
+        path, size, mode = key
+
+        start = time.perf_counter()
+        image = Image.open(path)
+        if size is not None:
+            image = image.resize(size)
+        if mode is not None:
+            image = image.convert(mode)
+        image.load()
+
+        self.load_times[key] = time.perf_counter() - start
+        log.trace(f"Loaded image asset {path} (size={size}, mode={mode}) in {self.load_times[key]:.4f}s.")
+        return image
+
+    def get_shared(
+        self,
+        path: Union[str, Path],
+        *,
+        size: Optional[tuple[int, int]] = None,
+        mode: Optional[str] = None
+    ) -> Image.Image:
+        """
+        Get the image at `path`, resized to `size` and converted to `mode` if given.
+
+        The returned image is shared and must not be modified.
+        """
+        key = (str(path), size, mode)
+
+        with self._lock:
+            if key in self._assets:
+                self._assets.move_to_end(key)
+                return self._assets[key]
+
+            image = self._load(key)
+            self._assets[key] = image
+            self._cached_bytes += self._size_of(image)
+
+            while self._cached_bytes > self.max_bytes and len(self._assets) > 1:
+                _, evicted = self._assets.popitem(last=False)
+                self._cached_bytes -= self._size_of(evicted)
+
+            return image
+
+    def get(
+        self,
+        path: Union[str, Path],
+        *,
+        size: Optional[tuple[int, int]] = None,
+        mode: Optional[str] = None
+    ) -> Image.Image:
+        """Get a copy of the image at `path`, resized to `size` and converted to `mode` if given."""
+        return self.get_shared(path, size=size, mode=mode).copy()
+
+
+image_assets = ImageAssetRegistry(MAX_CACHED_BYTES)
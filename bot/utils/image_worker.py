@@ -0,0 +1,285 @@
+import asyncio
+import dataclasses
+import functools
+import logging
+import random
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, TypeVar
+
+from discord.ext.commands import Context
+
+from bot.utils.exceptions import ImageQueueFullError
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_WORKERS = 2
+MAX_PENDING_JOBS = 20
+MAX_JOBS_PER_USER = 2
+
+
+def _initialize_worker(preloaders: tuple[Callable[[], object], ...]) -> None:
+    """Prepare a freshly started worker process by running all registered preloaders."""
+    # Forked workers inherit the random state of the bot, so make sure they don't all produce the same results.
+    random.seed()
+
+    for preloader in preloaders:
+        preloader()
+
+
+@dataclasses.dataclass(eq=False)
+class _SharedJob:
+    """A job shared by the callers of `ImageWorkerPool.run_shared` with the same key."""
+
+    # The place of the job in the queue
+    ticket: object
+    task: Optional[asyncio.Task] = None
+    # The `on_queued` callbacks of the callers waiting for the job
+    notifiers: list[Callable[[int], Awaitable[None]]] = dataclasses.field(default_factory=list)
+
+    async def notify(self, position: int) -> None:
+        """Let all callers know the position of the job in the queue."""
+        results = await asyncio.gather(*(notify(position) for notify in self.notifiers), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                log.warning("Failed to notify a caller of a queued image job.", exc_info=result)
+
+
+class ImageWorkerPool:
+    """
+    A pool of worker processes for CPU-bound image processing.
+
+    Even when ran in a thread, image processing with PIL holds the GIL for a large part
+    of the work, which stalls the event loop and the gateway heartbeat. Jobs submitted
+    to this pool are ran in separate processes instead, so the functions and their
+    arguments and return values must be picklable.
+
+    At most `max_pending_jobs` jobs may be running or waiting for a worker at once, and
+    at most `max_jobs_per_user` of those may belong to a single user. Jobs that would
+    exceed these limits are rejected by raising an `ImageQueueFullError`.
+    """
+
+    def __init__(self, max_workers: int, max_pending_jobs: int, max_jobs_per_user: int):
+        self.max_workers = max_workers
+        self.max_pending_jobs = max_pending_jobs
+        self.max_jobs_per_user = max_jobs_per_user
+
+        self._preloaders: list[Callable[[], object]] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self._waiting: list[object] = []
+        self._shared_jobs: dict[Hashable, _SharedJob] = {}
+        self._pending_jobs = 0
+        self._jobs_per_user = Counter()
+
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.rejected_jobs = 0
+        self.total_job_time = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of jobs waiting for a free worker."""
+        return len(self._waiting)
+
+    @property
+    def average_job_time(self) -> float:
+        """The average time in seconds it took to run a job, including the transfer of its data."""
+        if not self.completed_jobs:
+            return 0.0
+        return self.total_job_time / self.completed_jobs
+
+    def register_preloader(self, preloader: Callable[[], object]) -> None:
+        """
+        Register a function to run in every worker process when it starts.
+
+        This can be used to load resources before the first job arrives. The
+        preloader must be a picklable, module-level function. Preloaders that are
+        registered after the workers have started only apply to restarted workers.
+        """
+        if preloader in self._preloaders:
+            return
+
+        if self._executor is not None:
+            log.warning(f"Preloader {preloader.__qualname__} was registered after the image workers were started.")
+        self._preloaders.append(preloader)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the process pool, starting it if it's not running yet."""
+        if self._executor is None:
+            log.info(f"Starting {self.max_workers} image worker processes.")
+            self._executor = ProcessPoolExecutor(
+                self.max_workers,
+                initializer=_initialize_worker,
+                initargs=(tuple(self._preloaders),),
+            )
+        return self._executor
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args,
+        user_id: Optional[int] = None,
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        Run `func` with `args` in a worker process and return its result.
+
+        If all workers are busy, `on_queued` is awaited with the position of
+        the job in the queue before waiting for a worker to become free.
+        """
+        self._admit(user_id)
+        return await self._run_admitted(object(), func, args, user_id, on_queued)
+
+    async def run_shared(
+        self,
+        key: Hashable,
+        func: Callable[..., T],
+        *args,
+        user_id: Optional[int] = None,
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        Like `run`, but callers that give the same `key` while its job is pending share that job.
+
+        Every caller counts towards their own per-user limit, and is notified with `on_queued`
+        while the shared job waits for a worker. The job itself only counts towards the
+        limit of pending jobs once, and isn't cancelled when the callers are.
+        """
+        self._check_user_limit(user_id)
+
+        job = self._shared_jobs.get(key)
+        if job is None:
+            self._admit(None)
+            job = _SharedJob(object())
+            job.task = asyncio.create_task(self._run_admitted(job.ticket, func, args, None, job.notify))
+            job.task.add_done_callback(functools.partial(self._forget_shared_job, key))
+            self._shared_jobs[key] = job
+
+        self._jobs_per_user[user_id] += 1
+        try:
+            if on_queued:
+                job.notifiers.append(on_queued)
+                if job.ticket in self._waiting:
+                    await on_queued(self._waiting.index(job.ticket) + 1)
+
+            return await asyncio.shield(job.task)
+        finally:
+            if on_queued in job.notifiers:
+                job.notifiers.remove(on_queued)
+            self._release_user(user_id)
+
+    def _forget_shared_job(self, key: Hashable, task: asyncio.Task) -> None:
+        """Stop sharing the finished job of `key`, retrieving its error in case none of its callers did."""
+        del self._shared_jobs[key]
+        if not task.cancelled():
+            task.exception()
+
+    def _check_user_limit(self, user_id: Optional[int]) -> None:
+        """Raise an `ImageQueueFullError` if the user with `user_id` can't have another job."""
+        if user_id is not None and self._jobs_per_user[user_id] >= self.max_jobs_per_user:
+            self.rejected_jobs += 1
+            raise ImageQueueFullError("You already have too many images being processed, please wait for those first.")
+
+    def _admit(self, user_id: Optional[int]) -> None:
+        """Count a new job of the user with `user_id` towards the limits, or raise if it exceeds them."""
+        if self._pending_jobs >= self.max_pending_jobs:
+            self.rejected_jobs += 1
+            raise ImageQueueFullError("The image workers are too busy right now, please try again later.")
+
+        self._check_user_limit(user_id)
+        self._pending_jobs += 1
+        self._jobs_per_user[user_id] += 1
+
+    async def _run_admitted(
+        self,
+        ticket: object,
+        func: Callable[..., T],
+        args: tuple,
+        user_id: Optional[int],
+        on_queued: Optional[Callable[[int], Awaitable[None]]],
+    ) -> T:
+        """Run an admitted job, using `ticket` as its place in the queue."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        try:
+            if self._slots.locked():
+                self._waiting.append(ticket)
+                log.trace(f"Queued image job {func.__qualname__}, {self.queue_depth} jobs waiting.")
+                if on_queued:
+                    await on_queued(self.queue_depth)
+
+            await self._slots.acquire()
+        except BaseException:
+            # The job never got to a worker, so it only has to leave the queue
+            self._release_job(user_id)
+            raise
+        finally:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+
+        start = time.perf_counter()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        except BaseException:
+            self._slots.release()
+            self._release_job(user_id)
+            raise
+        future.add_done_callback(functools.partial(self._finish_job, func.__qualname__, user_id, start))
+
+        # A job keeps running in its worker when the caller is cancelled, so it's shielded
+        # and holds on to its slot and counts against the limits until it's done.
+        return await asyncio.shield(future)
+
+    def _release_job(self, user_id: Optional[int]) -> None:
+        """Stop counting a job of the user with `user_id` towards the limits."""
+        self._pending_jobs -= 1
+        self._release_user(user_id)
+
+    def _release_user(self, user_id: Optional[int]) -> None:
+        """Stop counting a job towards the per-user limit of the user with `user_id`."""
+        self._jobs_per_user[user_id] -= 1
+        if not self._jobs_per_user[user_id]:
+            del self._jobs_per_user[user_id]
+
+    def _finish_job(self, name: str, user_id: Optional[int], start: float, future: asyncio.Future) -> None:
+        """Free the worker of the job with `name` once it's done, and record how it went."""
+        self._slots.release()
+        self._release_job(user_id)
+
+        if future.cancelled():
+            self.failed_jobs += 1
+            return
+
+        if (exception := future.exception()) is not None:
+            if isinstance(exception, BrokenProcessPool):
+                log.error("An image worker process died unexpectedly, the workers will be restarted.")
+                self._executor = None
+            self.failed_jobs += 1
+            return
+
+        elapsed = time.perf_counter() - start
+        self.completed_jobs += 1
+        self.total_job_time += elapsed
+        log.trace(f"Image job {name} took {elapsed:.3f}s, {self.queue_depth} jobs waiting.")
+
+
+def queue_notifier(ctx: Context) -> Callable[[int], Awaitable[None]]:
+    """Get an `on_queued` callback that lets the invoking user know their position in the queue."""
+    async def notify(position: int) -> None:
+        await ctx.send(
+            f"{ctx.author.mention} Your image is queued at position {position}, it will be processed shortly!",
+            delete_after=10,
+        )
+
+    return notify
+
+
+image_workers = ImageWorkerPool(MAX_WORKERS, MAX_PENDING_JOBS, MAX_JOBS_PER_USER)
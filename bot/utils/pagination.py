@@ -1,8 +1,9 @@
 import asyncio
 import logging
-from collections.abc import Iterable
-from typing import Optional
+from collections.abc import Awaitable, Iterable
+from typing import Optional, Union
 
+import aiohttp
 from discord import Embed, Member, Reaction
 from discord.abc import User
 from discord.embeds import EmptyEmbed
@@ -195,7 +196,13 @@ class LinePaginator(Paginator):
 
         while True:
             try:
-                reaction, user = await ctx.bot.wait_for("reaction_add", timeout=timeout, check=event_check)
+                reaction, user = await ctx.bot.waiters.wait_for(
+                    "reaction_add",
+                    channel_id=message.channel.id,
+                    message_id=message.id,
+                    timeout=timeout,
+                    check=event_check
+                )
                 log.trace(f"Got reaction: {reaction}")
             except asyncio.TimeoutError:
                 log.debug("Timed out waiting for a reaction")
@@ -313,15 +320,32 @@ class ImagePaginator(Paginator):
         """Adds an image to a page given the url."""
         self.images.append(image)
 
+    @staticmethod
+    async def _prefetch_image(ctx: Context, url: str) -> None:
+        """Request the image at `url`, so that it's ready by the time Discord fetches it for the embed."""
+        try:
+            await ctx.bot.api_client.get(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.debug(f"Failed to prefetch image {url}: {e!r}")
+
     @classmethod
-    async def paginate(cls, pages: list[tuple[str, str]], ctx: Context, embed: Embed,
-                       prefix: str = "", suffix: str = "", timeout: int = 300,
-                       exception_on_empty_embed: bool = False) -> None:
+    async def paginate(cls, pages: list[Union[tuple[str, str], Awaitable[tuple[str, str]]]], ctx: Context,
+                       embed: Embed, prefix: str = "", suffix: str = "", timeout: int = 300,
+                       exception_on_empty_embed: bool = False, footer_text: str = None,
+                       prefetch_images: bool = False) -> None:
         """
         Use a paginator and set of reactions to provide pagination over a set of title/image pairs.
 
-        `pages` is a list of tuples of page title/image url pairs.
+        `pages` is a list of tuples of page title/image url pairs. Pages that are still being loaded
+        may be given as awaitables, e.g. tasks, of those tuples instead. The first page is shown as
+        soon as it's loaded, and the others are waited for when they're first shown. Pages that are
+        still loading when the pagination ends are cancelled.
         `prefix` and `suffix` will be prepended and appended respectively to the message.
+        `footer_text` will be shown in the footer of the embed, next to the page number.
+
+        If `prefetch_images` is True, the images of the pages next to the current page are
+        requested in the background. This is useful for images that are generated when they're
+        first requested, like those of Wolfram|Alpha, so that they show up right away on a page flip.
 
         When used, this will send a message using `ctx.send()` and apply a set of reactions to it.
         These reactions may be used to change page, or to remove pagination from the message.
@@ -344,8 +368,33 @@ class ImagePaginator(Paginator):
                 not member.bot
             ))
 
+        def prefetch_around(page: int) -> None:
+            """Prefetch the images of the pages next to `page` that weren't prefetched yet."""
+            if not prefetch_images:
+                return
+
+            for neighbour in (page + 1, page - 1):
+                if not 0 <= neighbour < len(pages) or neighbour in prefetches:
+                    continue
+
+                # Pages are only added to the paginator when they're shown, so the URL is read from the page
+                # itself, or from the result of its task if it already finished loading
+                neighbour_page = pages[neighbour]
+                if asyncio.isfuture(neighbour_page):
+                    if not neighbour_page.done() or neighbour_page.cancelled() or neighbour_page.exception():
+                        continue
+                    neighbour_page = neighbour_page.result()
+                elif not isinstance(neighbour_page, tuple):
+                    continue
+
+                _, image_url = neighbour_page
+                if image_url:
+                    prefetches[neighbour] = asyncio.create_task(cls._prefetch_image(ctx, image_url))
+
         paginator = cls(prefix=prefix, suffix=suffix)
         current_page = 0
+        # The prefetches of page images, by page
+        prefetches: dict[int, asyncio.Task] = {}
 
         if not pages:
             if exception_on_empty_embed:
@@ -355,90 +404,120 @@ class ImagePaginator(Paginator):
             log.debug("No images to add to paginator, adding '(no images to display)' message")
             pages.append(("(no images to display)", ""))
 
-        for text, image_url in pages:
-            paginator.add_line(text)
-            paginator.add_image(image_url)
-
-        embed.description = paginator.pages[current_page]
-        image = paginator.images[current_page]
-
-        if image:
-            embed.set_image(url=image)
-
-        if len(paginator.pages) <= 1:
-            await ctx.send(embed=embed)
-            return
-
-        embed.set_footer(text=f"Page {current_page + 1}/{len(paginator.pages)}")
-        message = await ctx.send(embed=embed)
+        async def load_pages(until: int) -> None:
+            """Add the pages up to and including the page at `until` to the paginator, once they've loaded."""
+            for page in pages[len(paginator.images):until + 1]:
+                text, image_url = page if isinstance(page, tuple) else await page
+                paginator.add_line(text)
+                paginator.add_image(image_url)
 
-        for emoji in PAGINATION_EMOJI:
-            await message.add_reaction(emoji)
-
-        while True:
-            # Start waiting for reactions
-            try:
-                reaction, user = await ctx.bot.wait_for("reaction_add", timeout=timeout, check=check_event)
-            except asyncio.TimeoutError:
-                log.debug("Timed out waiting for a reaction")
-                break  # We're done, no reactions for the last 5 minutes
-
-            # Deletes the users reaction
-            await message.remove_reaction(reaction.emoji, user)
+        try:
+            await load_pages(current_page)
 
-            # Delete reaction press - [:trashcan:]
-            if str(reaction.emoji) == DELETE_EMOJI:  # Note: DELETE_EMOJI is a string and not unicode
-                log.debug("Got delete reaction")
-                return await message.delete()
-
-            # First reaction press - [:track_previous:]
-            if reaction.emoji == FIRST_EMOJI:
-                if current_page == 0:
-                    log.debug("Got first page reaction, but we're on the first page - ignoring")
-                    continue
-
-                current_page = 0
-                reaction_type = "first"
-
-            # Last reaction press - [:track_next:]
-            if reaction.emoji == LAST_EMOJI:
-                if current_page >= len(paginator.pages) - 1:
-                    log.debug("Got last page reaction, but we're on the last page - ignoring")
-                    continue
-
-                current_page = len(paginator.pages) - 1
-                reaction_type = "last"
-
-            # Previous reaction press - [:arrow_left: ]
-            if reaction.emoji == LEFT_EMOJI:
-                if current_page <= 0:
-                    log.debug("Got previous page reaction, but we're on the first page - ignoring")
-                    continue
+            embed.description = paginator.pages[current_page]
+            image = paginator.images[current_page]
 
-                current_page -= 1
-                reaction_type = "previous"
+            if image:
+                embed.set_image(url=image)
 
-            # Next reaction press - [:arrow_right:]
-            if reaction.emoji == RIGHT_EMOJI:
-                if current_page >= len(paginator.pages) - 1:
-                    log.debug("Got next page reaction, but we're on the last page - ignoring")
-                    continue
-
-                current_page += 1
-                reaction_type = "next"
+            if len(pages) <= 1:
+                if footer_text:
+                    embed.set_footer(text=footer_text)
+                await ctx.send(embed=embed)
+                return
 
-            # Magic happens here, after page and reaction_type is set
-            embed.description = ""
-            await message.edit(embed=embed)
-            embed.description = paginator.pages[current_page]
+            if footer_text:
+                embed.set_footer(text=f"{footer_text} (Page {current_page + 1}/{len(pages)})")
+            else:
+                embed.set_footer(text=f"Page {current_page + 1}/{len(pages)}")
+            message = await ctx.send(embed=embed)
+            prefetch_around(current_page)
+
+            for emoji in PAGINATION_EMOJI:
+                await message.add_reaction(emoji)
+
+            while True:
+                # Start waiting for reactions
+                try:
+                    reaction, user = await ctx.bot.waiters.wait_for(
+                        "reaction_add",
+                        channel_id=message.channel.id,
+                        message_id=message.id,
+                        timeout=timeout,
+                        check=check_event
+                    )
+                except asyncio.TimeoutError:
+                    log.debug("Timed out waiting for a reaction")
+                    break  # We're done, no reactions for the last 5 minutes
+
+                # Deletes the users reaction
+                await message.remove_reaction(reaction.emoji, user)
 
-            image = paginator.images[current_page] or EmptyEmbed
-            embed.set_image(url=image)
+                # Delete reaction press - [:trashcan:]
+                if str(reaction.emoji) == DELETE_EMOJI:  # Note: DELETE_EMOJI is a string and not unicode
+                    log.debug("Got delete reaction")
+                    return await message.delete()
+
+                # First reaction press - [:track_previous:]
+                if reaction.emoji == FIRST_EMOJI:
+                    if current_page == 0:
+                        log.debug("Got first page reaction, but we're on the first page - ignoring")
+                        continue
+
+                    current_page = 0
+                    reaction_type = "first"
+
+                # Last reaction press - [:track_next:]
+                if reaction.emoji == LAST_EMOJI:
+                    if current_page >= len(pages) - 1:
+                        log.debug("Got last page reaction, but we're on the last page - ignoring")
+                        continue
+
+                    current_page = len(pages) - 1
+                    reaction_type = "last"
+
+                # Previous reaction press - [:arrow_left: ]
+                if reaction.emoji == LEFT_EMOJI:
+                    if current_page <= 0:
+                        log.debug("Got previous page reaction, but we're on the first page - ignoring")
+                        continue
+
+                    current_page -= 1
+                    reaction_type = "previous"
+
+                # Next reaction press - [:arrow_right:]
+                if reaction.emoji == RIGHT_EMOJI:
+                    if current_page >= len(pages) - 1:
+                        log.debug("Got next page reaction, but we're on the last page - ignoring")
+                        continue
+
+                    current_page += 1
+                    reaction_type = "next"
+
+                # Magic happens here, after page and reaction_type is set
+                await load_pages(current_page)
+                embed.description = ""
+                await message.edit(embed=embed)
+                embed.description = paginator.pages[current_page]
 
-            embed.set_footer(text=f"Page {current_page + 1}/{len(paginator.pages)}")
-            log.debug(f"Got {reaction_type} page reaction - changing to page {current_page + 1}/{len(paginator.pages)}")
+                image = paginator.images[current_page] or EmptyEmbed
+                embed.set_image(url=image)
 
-            await message.edit(embed=embed)
+                if footer_text:
+                    embed.set_footer(text=f"{footer_text} (Page {current_page + 1}/{len(pages)})")
+                else:
+                    embed.set_footer(text=f"Page {current_page + 1}/{len(pages)}")
+                log.debug(f"Got {reaction_type} page reaction - changing to page {current_page + 1}/{len(pages)}")
 
-        log.debug("Ending pagination and clearing reactions...")
-        await message.clear_reactions()
+                await message.edit(embed=embed)
+                prefetch_around(current_page)
+
+            log.debug("Ending pagination and clearing reactions...")
+            await message.clear_reactions()
+        finally:
+            # The pages that weren't shown may still be loading, and aren't needed anymore
+            for page in pages:
+                if asyncio.isfuture(page):
+                    page.cancel()
+                elif asyncio.iscoroutine(page):
+                    page.close()
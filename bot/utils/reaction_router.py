@@ -0,0 +1,130 @@
+import asyncio
+import dataclasses
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Optional
+
+from discord import RawReactionActionEvent
+
+log = logging.getLogger(__name__)
+
+ReactionHandler = Callable[[RawReactionActionEvent], Awaitable[None]]
+
+REACTION_EVENTS = frozenset({"raw_reaction_add", "raw_reaction_remove"})
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class ReactionRoute:
+    """A handler for the reactions on a message or in a channel, as returned by `ReactionRouter.add_route`."""
+
+    handler: ReactionHandler
+    events: frozenset[str]
+    # The emojis the handler is interested in, or None for all emojis
+    emojis: Optional[frozenset[str]]
+
+    def matches(self, event: str, emoji: str) -> bool:
+        """Whether the route handles `event` with `emoji`."""
+        return event in self.events and (self.emojis is None or emoji in self.emojis)
+
+
+class ReactionRouter:
+    """
+    Routes raw reaction events to the handlers registered for their message or channel.
+
+    Only the handlers registered for the message or channel of a reaction are looked
+    at, and only those interested in its emoji are run, so that the reactions that
+    nothing cares about are dropped right away. Handlers receive the raw event, and
+    don't depend on the message being in the message cache.
+    """
+
+    def __init__(self):
+        self._message_routes: dict[int, list[ReactionRoute]] = {}
+        self._channel_routes: dict[int, list[ReactionRoute]] = {}
+        # The running handlers, kept referenced so that they aren't garbage collected mid-run
+        self._tasks: set[asyncio.Task] = set()
+
+        self.started_at = time.monotonic()
+        self.handled_events = 0
+        self.dropped_events = 0
+
+    @property
+    def handled_per_second(self) -> float:
+        """The average number of events per second that were passed to at least one handler."""
+        return self.handled_events / (time.monotonic() - self.started_at)
+
+    @property
+    def dropped_per_second(self) -> float:
+        """The average number of events per second that no handler was interested in."""
+        return self.dropped_events / (time.monotonic() - self.started_at)
+
+    def add_route(
+        self,
+        handler: ReactionHandler,
+        *,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        emojis: Optional[Iterable[str]] = None,
+        events: Iterable[str] = ("raw_reaction_add",),
+    ) -> ReactionRoute:
+        """
+        Run `handler` for the reactions on the message with `message_id`, or in the channel with `channel_id`.
+
+        Only the reactions with one of `emojis` are handled if given, and only the events in `events`.
+        The returned route can be passed to `remove_route` to stop handling the reactions.
+        """
+        if (message_id is None) == (channel_id is None):
+            raise ValueError("Either a message_id or a channel_id must be given.")
+
+        events = frozenset(events)
+        if not events <= REACTION_EVENTS:
+            raise ValueError(f"Only the {', '.join(sorted(REACTION_EVENTS))} events can be routed.")
+
+        route = ReactionRoute(handler, events, None if emojis is None else frozenset(emojis))
+        if message_id is not None:
+            self._message_routes.setdefault(message_id, []).append(route)
+        else:
+            self._channel_routes.setdefault(channel_id, []).append(route)
+
+        return route
+
+    def remove_route(self, route: ReactionRoute) -> None:
+        """Stop running the handler of `route`."""
+        for routes_by_id in (self._message_routes, self._channel_routes):
+            for id_, routes in routes_by_id.items():
+                if route in routes:
+                    routes.remove(route)
+                    if not routes:
+                        del routes_by_id[id_]
+                    return
+
+    def dispatch(self, event: str, payload: RawReactionActionEvent) -> None:
+        """Run the handlers that are interested in the reaction event."""
+        if event not in REACTION_EVENTS:
+            return
+
+        message_routes = self._message_routes.get(payload.message_id, ())
+        channel_routes = self._channel_routes.get(payload.channel_id, ())
+        if not message_routes and not channel_routes:
+            self.dropped_events += 1
+            return
+
+        emoji = str(payload.emoji)
+        routes = [route for route in (*message_routes, *channel_routes) if route.matches(event, emoji)]
+        if not routes:
+            self.dropped_events += 1
+            return
+
+        self.handled_events += 1
+        for route in routes:
+            task = asyncio.create_task(self._run(route, payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(route: ReactionRoute, payload: RawReactionActionEvent) -> None:
+        """Run the handler of `route`, logging any errors it raises."""
+        try:
+            await route.handler(payload)
+        except Exception:
+            log.exception(f"Reaction handler {route.handler!r} failed on message {payload.message_id}")
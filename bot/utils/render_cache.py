@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """
+    A content-addressed cache for rendered images.
+
+    Entries are kept in memory in least recently used order, up to `max_memory_bytes`
+    of image data in total. If a `disk_path` is given, entries are also written to that
+    directory, which is limited to `max_disk_bytes`; the least recently used files are
+    removed when the directory outgrows that budget. Entries evicted from memory can
+    then still be served from disk.
+    """
+
+    def __init__(self, max_memory_bytes: int, disk_path: Optional[Path] = None, max_disk_bytes: int = 0):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_path = disk_path
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+
+        # The size of each file in the disk cache, in least recently used order
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path is not None:
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Create a cache key from the given parts, e.g. the hash of the source image, the effect and its arguments."""
+        return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or key in self._disk
+
+    @property
+    def cached_bytes(self) -> int:
+        """The total number of bytes cached in memory."""
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        """The total number of bytes cached on disk."""
+        return self._disk_bytes
+
+    def _load_disk_index(self) -> None:
+        """Index the files that are already in the disk cache, oldest first."""
+        self.disk_path.mkdir(parents=True, exist_ok=True)
+
+        files = sorted(self.disk_path.iterdir(), key=lambda file: file.stat().st_mtime)
+        for file in files:
+            size = file.stat().st_size
+            self._disk[file.name] = size
+            self._disk_bytes += size
+
+        log.info(f"Indexed {len(self._disk)} cached renders ({self._disk_bytes} bytes) in {self.disk_path}.")
+        self._evict_disk()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Store `data` in memory, evicting the least recently used entries if needed."""
+        if len(data) > self.max_memory_bytes:
+            return
+
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        """Remove the least recently used files from the disk cache until it fits within its budget."""
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            name, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            (self.disk_path / name).unlink(missing_ok=True)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the data cached for `key`, or None if it's not cached."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+
+        if key in self._disk:
+            loop = asyncio.get_running_loop()
+            try:
+                data = await loop.run_in_executor(None, (self.disk_path / key).read_bytes)
+            except OSError:
+                log.warning(f"Cached render {key} disappeared from the disk cache.")
+                self._disk_bytes -= self._disk.pop(key, 0)
+            else:
+                self._disk.move_to_end(key)
+                self._remember(key, data)
+                self.disk_hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, data: bytes) -> None:
+        """Cache `data` for `key`."""
+        self._remember(key, data)
+
+        if self.disk_path is None or len(data) > self.max_disk_bytes:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, (self.disk_path / key).write_bytes, data)
+        except OSError:
+            log.exception(f"Failed to write render {key} to the disk cache.")
+            return
+
+        self._disk_bytes += len(data) - self._disk.pop(key, 0)
+        self._disk[key] = len(data)
+        self._evict_disk()
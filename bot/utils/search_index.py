@@ -0,0 +1,144 @@
+import bisect
+import re
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple, Optional
+
+from rapidfuzz import fuzz, process
+
+REGEX_WORD = re.compile(r"\w+")
+
+
+class Match(NamedTuple):
+    """A key found in a `SearchIndex`, the value it was indexed with and how well it matched, out of 100."""
+
+    key: str
+    value: Any
+    score: float
+
+
+def normalise(text: str) -> str:
+    """Normalise `text` for comparisons, ignoring case and surrounding whitespace."""
+    return text.strip().casefold()
+
+
+def trigrams(text: str) -> set[str]:
+    """Get the trigrams of `text`, padded so that its start and end make trigrams of their own."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    An in-memory index for looking up keys exactly, by prefix and fuzzily.
+
+    The index is built from pairs of keys and values, and lookups return the matching
+    keys along with their values, so several keys (e.g. a name and its aliases) can
+    point to the same value. All lookups ignore case.
+
+    - Exact lookups are a dict lookup.
+    - Prefix lookups find the keys that start with the query, or that have a word
+      that does, with a binary search over the sorted keys and words.
+    - Fuzzy lookups only score the keys that share at least one trigram with the
+      query, which are looked up in an inverted index of the trigrams of all keys.
+
+    The index is meant to be built once, when an extension is loaded, from static resources.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, Any]]):
+        self.keys: list[str] = []
+        self.values: list[Any] = []
+        self._normalised: list[str] = []
+
+        self._exact: dict[str, list[int]] = {}
+        # Pairs of normalised keys and their words with the ID of their entry, sorted for prefix lookups
+        self._terms: list[tuple[str, int]] = []
+        # The IDs of the entries whose normalised keys contain each trigram
+        self._trigrams: dict[str, list[int]] = {}
+
+        for key, value in entries:
+            self._add(key, value)
+        self._terms.sort()
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "SearchIndex":
+        """Create an index of `names`, where each name is its own value."""
+        return cls((name, name) for name in names)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _add(self, key: str, value: Any) -> None:
+        """Index `key` with `value`."""
+        entry_id = len(self.keys)
+        normalised = normalise(key)
+
+        self.keys.append(key)
+        self.values.append(value)
+        self._normalised.append(normalised)
+
+        self._exact.setdefault(normalised, []).append(entry_id)
+
+        for term in {normalised, *REGEX_WORD.findall(normalised)}:
+            self._terms.append((term, entry_id))
+
+        for trigram in trigrams(normalised):
+            self._trigrams.setdefault(trigram, []).append(entry_id)
+
+    def _match(self, entry_id: int, score: float) -> Match:
+        """Get the match of the entry with `entry_id`."""
+        return Match(self.keys[entry_id], self.values[entry_id], score)
+
+    def exact(self, query: str) -> list[Match]:
+        """Get the entries whose key is `query`."""
+        return [self._match(entry_id, 100) for entry_id in self._exact.get(normalise(query), ())]
+
+    def prefix(self, query: str, *, limit: Optional[int] = None) -> list[Match]:
+        """
+        Get the entries whose key, or a word in whose key, starts with `query`, in alphabetical order.
+
+        At most `limit` entries are returned if it's given.
+        """
+        query = normalise(query)
+        matches = []
+        seen = set()
+
+        for term, entry_id in self._terms[bisect.bisect_left(self._terms, (query,)):]:
+            if not term.startswith(query) or len(matches) == limit:
+                break
+            if entry_id not in seen:
+                seen.add(entry_id)
+                matches.append(self._match(entry_id, 100))
+
+        return matches
+
+    def fuzzy(
+        self,
+        query: str,
+        *,
+        scorer: Callable[..., float] = fuzz.ratio,
+        score_cutoff: float = 0,
+        limit: Optional[int] = None,
+    ) -> list[Match]:
+        """
+        Get the entries whose key scores at least `score_cutoff` against `query`, best matches first.
+
+        `scorer` is a rapidfuzz scorer, or a function that takes the same arguments, which is
+        given the normalised query and keys. At most `limit` entries are returned if it's given.
+        """
+        query = normalise(query)
+
+        candidates = set()
+        for trigram in trigrams(query):
+            candidates.update(self._trigrams.get(trigram, ()))
+        if not candidates:
+            return []
+
+        results = process.extract(
+            query,
+            {entry_id: self._normalised[entry_id] for entry_id in candidates},
+            scorer=scorer,
+            processor=None,
+            score_cutoff=score_cutoff,
+            limit=limit or len(candidates),
+        )
+        return [self._match(entry_id, score) for _, score, entry_id in results]
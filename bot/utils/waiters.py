@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any, Optional
+
+log = logging.getLogger(__name__)
+
+# The event, channel ID and message ID a waiter is waiting for. A message ID of None matches any message.
+WaiterKey = tuple[str, int, Optional[int]]
+Waiter = tuple[asyncio.Future, Optional[Callable[..., bool]]]
+
+SUPPORTED_EVENTS = frozenset({
+    "message",
+    "message_delete",
+    "message_edit",
+    "reaction_add",
+    "reaction_remove",
+    "raw_reaction_add",
+    "raw_reaction_remove",
+})
+
+
+def _channel_and_message(event: str, args: tuple) -> tuple[int, int]:
+    """Get the IDs of the channel and message that the event with `args` happened to."""
+    if event in ("message", "message_delete"):
+        message = args[0]
+        return message.channel.id, message.id
+    if event == "message_edit":
+        message = args[1]
+        return message.channel.id, message.id
+    if event in ("reaction_add", "reaction_remove"):
+        message = args[0].message
+        return message.channel.id, message.id
+    if event in ("raw_reaction_add", "raw_reaction_remove"):
+        return args[0].channel_id, args[0].message_id
+    raise ValueError(f"Waiting for {event!r} events isn't supported.")
+
+
+class WaiterRegistry:
+    """
+    A registry of waiters for message and reaction events, indexed by channel and message.
+
+    `Bot.wait_for` checks the predicate of every waiter against every event of the type
+    it's waiting for, so every message and reaction the bot sees is checked against all
+    running games and paginators. Waiters in this registry are only checked against
+    the events that happen in their channel, and to their message if they're given one.
+    """
+
+    def __init__(self):
+        self._waiters: dict[WaiterKey, list[Waiter]] = {}
+
+        self.dispatched_events = 0
+        self.checks = 0
+
+    @property
+    def active_waiters(self) -> int:
+        """The number of waiters that are waiting for an event."""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def wait_for(
+        self,
+        event: str,
+        *,
+        channel_id: int,
+        message_id: Optional[int] = None,
+        check: Optional[Callable[..., bool]] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Wait for `event` to happen in the channel with `channel_id`, to the message with `message_id` if given.
+
+        This works like `Bot.wait_for`: the event is only returned if `check` returns True for it,
+        and an `asyncio.TimeoutError` is raised if that doesn't happen within `timeout` seconds.
+        """
+        if event not in SUPPORTED_EVENTS:
+            raise ValueError(f"Waiting for {event!r} events isn't supported.")
+
+        key = (event, channel_id, message_id)
+        waiter = (asyncio.get_running_loop().create_future(), check)
+        self._waiters.setdefault(key, []).append(waiter)
+
+        try:
+            return await asyncio.wait_for(waiter[0], timeout)
+        finally:
+            self._remove(key, waiter)
+
+    def _remove(self, key: WaiterKey, waiter: Waiter) -> None:
+        """Remove `waiter` from the waiters for `key`, if it's still there."""
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+
+        if waiter in waiters:
+            waiters.remove(waiter)
+        if not waiters:
+            del self._waiters[key]
+
+    def dispatch(self, event: str, *args) -> None:
+        """Resolve the waiters that are waiting for this event and whose check passes."""
+        if not self._waiters or event not in SUPPORTED_EVENTS:
+            return
+
+        channel_id, message_id = _channel_and_message(event, args)
+        self.dispatched_events += 1
+
+        for key in ((event, channel_id, message_id), (event, channel_id, None)):
+            for waiter in list(self._waiters.get(key, ())):
+                future, check = waiter
+                if future.done():
+                    self._remove(key, waiter)
+                    continue
+
+                self.checks += 1
+                try:
+                    result = check is None or check(*args)
+                except Exception as e:
+                    future.set_exception(e)
+                    self._remove(key, waiter)
+                    continue
+
+                if result:
+                    future.set_result(args[0] if len(args) == 1 else args)
+                    self._remove(key, waiter)